@@ -9,6 +9,20 @@ Includes:
 - Rail Fence Cipher
 """
 
+import re
+from array import array
+from functools import lru_cache
+from itertools import accumulate
+from string import ascii_letters
+
+from permutation import TYPECODE, Permutation
+
+# Anything that isn't an ASCII letter (the only letters in ASCII text)
+_NOT_ASCII_LETTERS = "[^A-Za-z]+"
+
+# ASCII texts at least this long use NumPy for Vigenère, if installed
+VIGENERE_NUMPY_MIN = 64 * 1024
+
 
 def xor_encrypt(text, key):
     """XOR each character with a key value (printable-safe version).
@@ -75,22 +89,7 @@ def vigenere_encrypt(text, key):
     Returns:
         Encrypted text with letters shifted
     """
-    keyword = key.get("vigenere_key", "KEY")
-    result = []
-    key_index = 0  # Track position in keyword separately
-    for char in text:
-        if char.isalpha():
-            shift = ord(keyword[key_index % len(keyword)].upper()) - ord("A")
-            code = ord(char)
-            if char.isupper():
-                new_char = chr((code - ord("A") + shift) % 26 + ord("A"))
-            else:
-                new_char = chr((code - ord("a") + shift) % 26 + ord("a"))
-            result.append(new_char)
-            key_index += 1  # Only advance key for letters
-        else:
-            result.append(char)
-    return "".join(result)
+    return _vigenere(text, key.get("vigenere_key", "KEY"), 1)
 
 
 def vigenere_decrypt(text, key):
@@ -98,22 +97,145 @@ def vigenere_decrypt(text, key):
 
     Uses subtraction instead of addition for the shift.
     """
-    keyword = key.get("vigenere_key", "KEY")
-    result = []
-    key_index = 0
-    for char in text:
-        if char.isalpha():
-            shift = ord(keyword[key_index % len(keyword)].upper()) - ord("A")
-            code = ord(char)
-            if char.isupper():
-                new_char = chr((code - ord("A") - shift) % 26 + ord("A"))
-            else:
-                new_char = chr((code - ord("a") - shift) % 26 + ord("a"))
-            result.append(new_char)
-            key_index += 1
-        else:
-            result.append(char)
-    return "".join(result)
+    return _vigenere(text, key.get("vigenere_key", "KEY"), -1)
+
+
+def _vigenere_char(char, shift):
+    """Shift one letter, keeping upper case upper and lower case lower."""
+    base = ord("A") if char.isupper() else ord("a")
+    return chr((ord(char) - base + shift) % 26 + base)
+
+
+@lru_cache(maxsize=256)
+def _vigenere_table(shift, letters=ascii_letters):
+    """Translate table shifting every one of 'letters' by 'shift'."""
+    return {ord(char): _vigenere_char(char, shift) for char in letters}
+
+
+def _numpy_backend():
+    """The numpy_backend module, or None if NumPy is not installed."""
+    try:
+        import numpy_backend
+    except ImportError:
+        return None
+    return numpy_backend
+
+
+def _vigenere(text, keyword, direction):
+    """Shift the letters of 'text' by the keyword, skipping everything else.
+
+    Only letters move the keyword along, so the Nth letter of the text
+    uses keyword letter N % len(keyword) wherever it sits. That means all
+    the letters can be pulled out, shifted a whole keyword position at a
+    time with translate(), and put back where they came from.
+
+    Args:
+        text: The text to shift
+        keyword: The Vigenère keyword
+        direction: 1 to encrypt, -1 to decrypt
+    """
+    if text.isascii():
+        if len(text) >= VIGENERE_NUMPY_MIN and keyword:
+            arrays = _numpy_backend()
+            if arrays is not None:
+                return arrays.vigenere(text, keyword, direction)
+        letters = ascii_letters
+        separator = _NOT_ASCII_LETTERS
+    else:
+        # Only the characters that actually appear need checking
+        present = set(text)
+        letters = "".join(sorted(char for char in present if char.isalpha()))
+        others = sorted(present.difference(letters))
+        separator = "[" + "".join(map(re.escape, others)) + "]+" if others else None
+
+    # Letter runs end up at the even indexes, everything else at the odd ones
+    parts = re.split(f"({separator})", text) if separator else [text]
+    runs = parts[0::2]
+    joined = "".join(runs)
+    if not joined:
+        return text
+    if not keyword:
+        raise ValueError("vigenere_key must not be empty")
+
+    step = len(keyword)
+    shifted = [""] * len(joined)
+    for offset in range(min(step, len(joined))):
+        shift = direction * (ord(keyword[offset].upper()) - ord("A")) % 26
+        table = _vigenere_table(shift, letters)
+        shifted[offset::step] = joined[offset::step].translate(table)
+    shifted = "".join(shifted)
+
+    # Cut the shifted letters back into runs of the original lengths
+    ends = list(accumulate(map(len, runs)))
+    parts[0::2] = [shifted[start:end] for start, end in zip([0] + ends, ends)]
+    return "".join(parts)
+
+
+def _rail_starts(rails):
+    """Where each rail picks up characters, in closed form.
+
+    The zigzag repeats every 2 * (rails - 1) characters. In each cycle the
+    top and bottom rails get one character, and every middle rail r gets
+    two: position r on the way down and cycle - r on the way back up.
+
+    Returns:
+        Tuple of (cycle, [(down start, up start or None) for each rail])
+    """
+    cycle = 2 * (rails - 1)
+    starts = [(0, None)]
+    starts += [(rail, cycle - rail) for rail in range(1, rails - 1)]
+    starts.append((rails - 1, None))
+    return cycle, starts
+
+
+def _rail_lengths(length, rails):
+    """How many characters land on each rail."""
+    cycle, starts = _rail_starts(rails)
+    return [
+        len(range(down, length, cycle))
+        + (len(range(up, length, cycle)) if up is not None else 0)
+        for down, up in starts
+    ]
+
+
+def rail_fence_order(length, rails):
+    """Permutation used by the rail fence, for a message of 'length'.
+
+    Built from slices of the positions, one rail at a time. Not cached:
+    pipelines keep the permutations they reuse (see pipeline.py).
+
+    Returns:
+        Compact array where entry i is the plaintext position of
+        ciphertext character i
+    """
+    positions = array(TYPECODE, range(length))
+    if rails < 2:
+        return positions
+
+    cycle, starts = _rail_starts(rails)
+    order = array(TYPECODE)
+    for down, up in starts:
+        row = positions[down::cycle]
+        if up is not None:
+            # The up positions interleave with the down positions
+            ups = positions[up::cycle]
+            merged = array(TYPECODE, [0]) * (len(row) + len(ups))
+            merged[0::2] = row
+            merged[1::2] = ups
+            row = merged
+        order.extend(row)
+    return order
+
+
+def rail_fence_permutation(length, key):
+    """Rail fence as a Permutation (see permutation.py).
+
+    Args:
+        length: Length of the message
+        key: Dictionary containing "rails" (default: 3)
+    """
+    order = rail_fence_order(length, key.get("rails", 3))
+    return Permutation(order, check=False)
 
 
 def rail_fence_encrypt(text, key):
@@ -129,6 +251,9 @@ def rail_fence_encrypt(text, key):
 
     Result: HOR + ELWL + LOD = "HORELWLLOD"
 
+    Each rail is read straight out of the text with slices (see
+    _rail_starts), so the work is linear in the length of the text.
+
     Args:
         text: The text to encrypt
         key: Dictionary containing "rails" (default: 3)
@@ -140,57 +265,42 @@ def rail_fence_encrypt(text, key):
     if rails < 2 or len(text) == 0:
         return text
 
-    fence = [[] for _ in range(rails)]
-
-    rail = 0
-    direction = 1
-
-    for char in text:
-        fence[rail].append(char)
-        rail += direction
-        if rail == 0 or rail == rails - 1:
-            direction *= -1
-
-    return "".join(["".join(row) for row in fence])
+    cycle, starts = _rail_starts(rails)
+    pieces = []
+    for down, up in starts:
+        if up is None:
+            pieces.append(text[down::cycle])
+            continue
+        downs, ups = text[down::cycle], text[up::cycle]
+        row = [""] * (len(downs) + len(ups))
+        row[0::2] = downs
+        row[1::2] = ups
+        pieces.append("".join(row))
+    return "".join(pieces)
 
 
 def rail_fence_decrypt(text, key):
     """Reverse rail fence cipher.
 
     To decrypt, we first calculate how many characters go on each rail,
-    split the ciphertext into those segments, then read in zigzag order.
+    split the ciphertext into those segments, then put each segment
+    back into the positions its rail came from.
     """
     rails = key.get("rails", 3)
     if rails < 2 or len(text) == 0:
         return text
 
-    # First, calculate how many chars go on each rail
-    rail_lengths = [0] * rails
-    rail = 0
-    direction = 1
-    for _ in text:
-        rail_lengths[rail] += 1
-        rail += direction
-        if rail == 0 or rail == rails - 1:
-            direction *= -1
-
-    # Split ciphertext into rail segments
-    fence = []
+    cycle, starts = _rail_starts(rails)
+    result = [""] * len(text)
     pos = 0
-    for length in rail_lengths:
-        fence.append(list(text[pos : pos + length]))
+    for (down, up), length in zip(starts, _rail_lengths(len(text), rails)):
+        segment = text[pos : pos + length]
         pos += length
-
-    # Read off in zigzag order
-    result = []
-    rail = 0
-    direction = 1
-    for _ in text:
-        result.append(fence[rail].pop(0))
-        rail += direction
-        if rail == 0 or rail == rails - 1:
-            direction *= -1
-
+        if up is None:
+            result[down::cycle] = segment
+        else:
+            result[down::cycle] = segment[0::2]
+            result[up::cycle] = segment[1::2]
     return "".join(result)
 
 
@@ -3,18 +3,115 @@
 Provides a web interface for the 5-phase encryption algorithm.
 """
 
+import math
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from functools import wraps
-from flask import Flask, render_template, request, session, redirect, url_for
-from engine import encrypt, decrypt
+from flask import (
+    Flask,
+    Response,
+    g,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    session,
+    stream_with_context,
+    url_for,
+)
+from werkzeug.utils import secure_filename
+import database
+from engine import (
+    Decryptor,
+    Encryptor,
+    ciphertext_length,
+    compile_key,
+    decrypt,
+    enable_profiling,
+    encrypt,
+    plaintext_length,
+)
+from result_cache import ResultCache, cache_key
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)  # Required for sessions
 
-# Store users (in real apps, use a database with hashed passwords!)
-# SECURITY NOTE: Never store plain text passwords in production.
-# Use werkzeug.security.generate_password_hash() to hash passwords.
-USERS = {"admin": "supersecret", "student": "password123"}
+# Users live in the database (see database.py) with hashed passwords.
+# These demo accounts are created the first time an empty database is used.
+# SECURITY NOTE: Change or delete them before running this anywhere real.
+DEMO_USERS = {"admin": "supersecret", "student": "password123"}
+
+# How often (seconds) a logged-in session checks its user still exists
+SESSION_RECHECK = 60
+
+_ready_databases = set()  # Database files already set up
+_database_lock = threading.Lock()
+
+# JSON API settings
+# Messages up to this many characters are encrypted straight away
+API_INLINE_LIMIT = 64 * 1024
+# Most large jobs that can be held at once - waiting, running or done but
+# not yet collected - before new ones get 429
+API_MAX_JOBS = 8
+# Worker processes for large jobs
+API_WORKERS = min(4, os.cpu_count() or 1)
+# How long (seconds) a finished job's result is kept for collection
+API_RESULT_TTL = 300
+
+_pool = None  # Created when the first large job arrives
+_jobs = {}  # Job id -> details (see api_convert)
+_jobs_lock = threading.Lock()
+
+# How much of an upload to read at a time when streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+# Largest block_size a stream accepts - a whole block is held in memory
+STREAM_MAX_BLOCK_SIZE = 1024 * 1024
+
+# Recent results, kept in memory only (0 turns the cache off)
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+results = ResultCache(RESULT_CACHE_BYTES)
+
+# Time every step of the cipher for /metrics (see engine.Profile).
+# Large API jobs run in worker processes and are not included.
+PROFILE_ENGINE = True
+engine_profile = None  # Set by start_profiling()
+_profile_lock = threading.Lock()
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def ensure_database():
+    """Create the users table (and demo users) once per database file."""
+    with _database_lock:
+        if database.DATABASE in _ready_databases:
+            return
+        database.init_db()
+        if next(database.list_users(), None) is None:
+            database.import_users(DEMO_USERS.items())
+        _ready_databases.add(database.DATABASE)
+
+
+def current_user():
+    """The logged-in username, or None.
+
+    The identity is kept in the session, so most requests never touch
+    the database - it is only rechecked every SESSION_RECHECK seconds,
+    in case the user has been deleted.
+    """
+    if not session.get("logged_in"):
+        return None
+    username = session.get("username")
+    if time.time() - session.get("checked_at", 0) > SESSION_RECHECK:
+        ensure_database()
+        if not database.user_exists(username):
+            session.clear()
+            return None
+        session["checked_at"] = time.time()
+    return username
 
 
 def login_required(f):
@@ -22,13 +119,82 @@ def login_required(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not session.get("logged_in"):
+        if current_user() is None:
             return redirect(url_for("login"))
         return f(*args, **kwargs)
 
     return decorated_function
 
 
+def api_login_required(f):
+    """Like login_required, but answers with JSON instead of a redirect."""
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if current_user() is None:
+            return jsonify(error="login required"), 401
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def build_key(values):
+    """Build an encryption key from form fields or JSON values.
+
+    Anything left out uses the engine's default.
+
+    Raises:
+        ValueError: If a number setting is not a whole number
+    """
+    try:
+        key = {
+            "shift": int(values.get("shift", 5)),
+            "block_size": int(values.get("block_size", 4)),
+            "password": values.get("password", "SECRET"),
+            "noise_interval": int(values.get("noise_interval", 3)),
+            "noise_char": values.get("noise_char", "~"),
+        }
+    except (TypeError, ValueError):
+        raise ValueError("shift, block_size and noise_interval must be whole numbers")
+    return key
+
+
+def result_digest(action, message, key, values):
+    """Where this request's result lives in the cache.
+
+    A request can skip the cache with a "cache" field set to false/off/0,
+    or a "Cache-Control: no-store" (or no-cache) header.
+
+    Returns:
+        The cache digest, or None if the cache should not be used
+    """
+    control = request.headers.get("Cache-Control", "")
+    if "no-store" in control or "no-cache" in control:
+        return None
+    if str(values.get("cache", "on")).lower() in ("0", "false", "off", "no"):
+        return None
+    try:
+        return cache_key(message, key, action)
+    except ValueError:
+        return None  # Unusual keys are still encrypted, just not cached
+
+
+def convert(action, message, key, digest=None):
+    """Encrypt or decrypt, using the result cache when 'digest' is given.
+
+    Returns:
+        Tuple of (result, seconds spent working, whether it was cached)
+    """
+    if digest is not None:
+        result = results.get(digest)
+        if result is not None:
+            return result, 0.0, True
+    result, seconds = _timed(action, message, key)
+    if digest is not None:
+        results.put(digest, result)
+    return result, seconds, False
+
+
 @app.route("/")
 def index():
     """Display the homepage."""
@@ -42,9 +208,21 @@ def login():
         username = request.form.get("username", "")
         password = request.form.get("password", "")
 
-        if username in USERS and USERS[username] == password:
+        ensure_database()
+        try:
+            valid = database.verify_user(username, password, request.remote_addr)
+        except database.LoginThrottled as throttled:
+            # Refused without hashing: too many failures, or too busy
+            wait = math.ceil(throttled.retry_after)
+            error = f"Too many login attempts - try again in {wait} s"
+            page = render_template("login.html", error=error)
+            return page, 429, {"Retry-After": str(wait)}
+
+        if valid:
+            session.clear()
             session["logged_in"] = True
             session["username"] = username
+            session["checked_at"] = time.time()
             return redirect(url_for("workshop"))
         else:
             return render_template("login.html", error="Invalid credentials")
@@ -72,22 +250,374 @@ def workshop():
         action = request.form.get("action", "encrypt")
 
         # Build the key from form inputs
-        key = {
-            "shift": int(request.form.get("shift", 5)),
-            "block_size": int(request.form.get("block_size", 4)),
-            "password": request.form.get("password", "SECRET"),
-            "noise_interval": int(request.form.get("noise_interval", 3)),
-            "noise_char": request.form.get("noise_char", "~"),
-        }
+        key = build_key(request.form)
 
-        # Perform the operation
-        if action == "encrypt":
-            result = encrypt(original, key)
-        else:
-            result = decrypt(original, key)
+        # Perform the operation (or reuse a recent result)
+        action = "encrypt" if action == "encrypt" else "decrypt"
+        digest = result_digest(action, original, key, request.form)
+        result, _, _ = convert(action, original, key, digest)
 
     return render_template("workshop.html", result=result, original=original)
 
 
+###############################################
+# JSON API
+###############################################
+
+# POST /api/encrypt or /api/decrypt with {"message": "...", "key": {...}}
+#
+# Short messages are answered straight away (200, with the result).
+# Longer ones are handed to a pool of worker processes so the web server
+# stays free: the answer is 202 with a job URL to collect the result from.
+# When too many jobs are already held (even finished ones not yet
+# collected) the answer is 429 - try later.
+
+
+def _timed(action, message, key):
+    """Run encrypt/decrypt in a worker and time it."""
+    started = time.perf_counter()
+    convert = encrypt if action == "encrypt" else decrypt
+    return convert(message, key), time.perf_counter() - started
+
+
+def _get_pool():
+    """The worker pool for large jobs (created on first use)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=API_WORKERS)
+    return _pool
+
+
+def _forget_old_jobs(now):
+    """Drop finished jobs nobody collected in time (call with the lock held)."""
+    for job_id, job in list(_jobs.items()):
+        if job["finished"] is not None and now - job["finished"] > API_RESULT_TTL:
+            del _jobs[job_id]
+
+
+def _job_finished(job, future):
+    """Record when a job finished (runs as the future's callback)."""
+    job["finished"] = time.monotonic()
+
+
+def _milliseconds(seconds):
+    return round(seconds * 1000, 3)
+
+
+@app.route("/api/<action>", methods=["POST"])
+@api_login_required
+def api_convert(action):
+    """Encrypt or decrypt a JSON message, inline or as a background job."""
+    if action not in ("encrypt", "decrypt"):
+        return jsonify(error="unknown action"), 404
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("message"), str):
+        return jsonify(error='expected JSON like {"message": "...", "key": {}}'), 400
+    settings = data.get("key", {})
+    if not isinstance(settings, dict):
+        return jsonify(error="key must be an object"), 400
+    try:
+        key = build_key(settings)
+        compile_key(key)  # Checks every setting before any work starts
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+
+    message = data["message"]
+    submitted = time.monotonic()
+    digest = result_digest(action, message, key, data)
+    inline = len(message) <= API_INLINE_LIMIT
+    # Inline requests look in the cache inside convert(), so each request
+    # is counted as one hit or miss
+    cached = results.get(digest) if digest is not None and not inline else None
+
+    if cached is not None or inline:
+        if cached is not None:
+            result, seconds, hit = cached, 0.0, True
+        else:
+            result, seconds, hit = convert(action, message, key, digest)
+        return jsonify(
+            status="done",
+            result=result,
+            cached=hit,
+            work_ms=_milliseconds(seconds),
+            latency_ms=_milliseconds(time.monotonic() - submitted),
+        )
+
+    with _jobs_lock:
+        _forget_old_jobs(submitted)
+        # Uncollected results count too, or they could pile up until
+        # API_RESULT_TTL while new jobs keep being accepted
+        if len(_jobs) >= API_MAX_JOBS:
+            response = jsonify(error="too many jobs, try again shortly")
+            return response, 429, {"Retry-After": "1"}
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "owner": session.get("username"),
+            "submitted": submitted,
+            "finished": None,
+            "digest": digest,
+        }
+        job["future"] = _get_pool().submit(_timed, action, message, key)
+        _jobs[job_id] = job
+    job["future"].add_done_callback(lambda future: _job_finished(job, future))
+
+    url = url_for("api_job", job_id=job_id)
+    return jsonify(status="queued", job=job_id, url=url), 202, {"Location": url}
+
+
+@app.route("/api/jobs/<job_id>")
+@api_login_required
+def api_job(job_id):
+    """Check on a background job, collecting the result once it's done."""
+    with _jobs_lock:
+        _forget_old_jobs(time.monotonic())
+        job = _jobs.get(job_id)
+        if job is None or job["owner"] != session.get("username"):
+            return jsonify(error="no such job"), 404
+        if job["finished"] is None:
+            status = "running" if job["future"].running() else "queued"
+            return jsonify(status=status, job=job_id)
+        # Results are handed out once
+        del _jobs[job_id]
+
+    latency = _milliseconds(job["finished"] - job["submitted"])
+    try:
+        result, seconds = job["future"].result()
+    except Exception as error:
+        return jsonify(status="failed", error=str(error), latency_ms=latency), 500
+    if job["digest"] is not None:
+        results.put(job["digest"], result)
+    return jsonify(
+        status="done",
+        result=result,
+        cached=False,
+        work_ms=_milliseconds(seconds),
+        latency_ms=latency,
+    )
+
+
+###############################################
+# STREAMING
+###############################################
+
+# POST /stream/encrypt or /stream/decrypt with the data as the request
+# body (chunked is fine) or as a "file" upload, and the key settings in
+# the query string (or as form fields next to the upload).
+#
+# The result is sent back piece by piece as it is produced, so the
+# server only ever holds one chunk of the data at a time. Like the
+# command-line tool, every byte is treated as one character, so any
+# file - text or not - comes back exactly as it went in.
+
+
+def _stream(source, converter):
+    """Feed chunks of 'source' through an Encryptor/Decryptor."""
+    while True:
+        chunk = source.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        # Latin-1 turns every byte into the character with the same code
+        output = converter.update(chunk.decode("latin-1"))
+        if output:
+            yield output.encode("latin-1")
+    yield converter.finalize().encode("latin-1")
+
+
+def _reopen(upload):
+    """Open an uploaded file again so it outlives the request.
+
+    Flask closes uploads as soon as the view returns, while the response
+    is still streaming. Werkzeug keeps uploads in a temporary file, so a
+    duplicate of its file descriptor stays readable after that.
+    """
+    # fileno() moves an upload still held in memory out to disk
+    copy = os.fdopen(os.dup(upload.stream.fileno()), "rb")
+    copy.seek(0)
+    return copy
+
+
+def _stream_file(source, converter):
+    """Stream an open file, closing it afterwards."""
+    with source:
+        yield from _stream(source, converter)
+
+
+@app.route("/stream/<action>", methods=["POST"])
+@api_login_required
+def stream_convert(action):
+    """Encrypt or decrypt an upload of any size, streaming the result."""
+    if action not in ("encrypt", "decrypt"):
+        return jsonify(error="unknown action"), 404
+
+    upload = None
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get("file")
+    # Anything else is the raw body - never parse it as a form, or it
+    # would be read in full before streaming starts
+    settings = request.args.to_dict()
+    if upload is not None:
+        settings.update(request.form.to_dict())
+    try:
+        key = compile_key(build_key(settings))
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    if ord(key.noise_char) > 255:
+        return jsonify(error="noise_char must fit in one byte"), 400
+    if key.block_size > STREAM_MAX_BLOCK_SIZE:
+        error = f"block_size must be at most {STREAM_MAX_BLOCK_SIZE} to stream"
+        return jsonify(error=error), 400
+
+    if action == "encrypt":
+        converter, output_length = Encryptor(key), ciphertext_length
+    else:
+        converter, output_length = Decryptor(key), plaintext_length
+    if upload is not None:
+        source = _reopen(upload)
+        size = os.fstat(source.fileno()).st_size
+        chunks = _stream_file(source, converter)
+    else:
+        size = request.content_length  # None if the body is chunked
+        chunks = stream_with_context(_stream(request.stream, converter))
+    response = Response(chunks, mimetype="application/octet-stream")
+    # The size of the result is known before the first byte is sent
+    if size is not None:
+        response.content_length = output_length(size, key)
+    filename = secure_filename(upload.filename or "") if upload is not None else ""
+    if filename:
+        suffix = ".enc" if action == "encrypt" else ".dec"
+        response.headers["Content-Disposition"] = (
+            f'attachment; filename="{filename}{suffix}"'
+        )
+    return response
+
+
+###############################################
+# METRICS
+###############################################
+#
+# GET /metrics reports, in the Prometheus text format:
+#   - how long each page took to answer, as a histogram per endpoint
+#     (for streams, until the first byte is ready)
+#   - the result cache counters
+#   - time and sizes for each step of the cipher (if PROFILE_ENGINE)
+
+
+class LatencyHistogram:
+    """Request latencies per endpoint, counted into fixed buckets."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._endpoints = {}  # endpoint -> [bucket counts..., count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, seconds):
+        """Count one request to 'endpoint' that took 'seconds'."""
+        with self._lock:
+            counts = self._endpoints.get(endpoint)
+            if counts is None:
+                counts = self._endpoints[endpoint] = [0] * len(self.buckets) + [0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[index] += 1
+            counts[-2] += 1
+            counts[-1] += seconds
+
+    def prometheus(self, name):
+        """
+        The histogram in the Prometheus text format.
+
+        Args:
+            name: Metric name
+
+        Returns:
+            String with the bucket, count and sum lines for every endpoint
+        """
+        with self._lock:
+            endpoints = sorted(
+                (endpoint, list(counts))
+                for endpoint, counts in self._endpoints.items()
+            )
+
+        lines = [
+            f"# HELP {name} Time taken to answer a request",
+            f"# TYPE {name} histogram",
+        ]
+        for endpoint, counts in endpoints:
+            label = f'endpoint="{endpoint}"'
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {counts[-2]}')
+            lines.append(f"{name}_count{{{label}}} {counts[-2]}")
+            lines.append(f"{name}_sum{{{label}}} {counts[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+latencies = LatencyHistogram()
+
+
+def start_profiling():
+    """
+    Start recording the engine for /metrics, if PROFILE_ENGINE is set.
+
+    Profiling covers the whole engine, so it starts when the app first
+    serves a request rather than whenever this module is imported.
+
+    Returns:
+        The Profile being filled in, or None
+    """
+    global engine_profile
+    with _profile_lock:
+        if PROFILE_ENGINE and engine_profile is None:
+            engine_profile = enable_profiling()
+    return engine_profile
+
+
+@app.before_request
+def _start_timer():
+    if PROFILE_ENGINE and engine_profile is None:
+        start_profiling()
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def _record_latency(response):
+    # Unknown URLs are left out, so scanners can't add endless endpoints
+    if request.endpoint is not None and "started" in g:
+        latencies.observe(request.endpoint, time.perf_counter() - g.started)
+    return response
+
+
+def _cache_metrics():
+    """The result cache counters in the Prometheus text format."""
+    stats = results.stats()
+    lines = []
+    for field, kind, description in (
+        ("hits", "counter", "Results found in the cache"),
+        ("misses", "counter", "Results not found in the cache"),
+        ("evictions", "counter", "Results dropped to make room"),
+        ("entries", "gauge", "Results in the cache"),
+        ("bytes", "gauge", "Memory used by cached results"),
+        ("max_bytes", "gauge", "Most memory cached results may use"),
+    ):
+        name = f"cipherforge_result_cache_{field}"
+        if kind == "counter":
+            name += "_total"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {stats[field]}")
+    return "\n".join(lines) + "\n"
+
+
+@app.route("/metrics")
+def metrics():
+    """Counters for Prometheus (or a curious human)."""
+    text = latencies.prometheus("cipherforge_request_seconds") + _cache_metrics()
+    if engine_profile is not None:
+        text += engine_profile.prometheus()
+    return Response(text, mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
@@ -0,0 +1,422 @@
+"""CipherForge performance benchmarks.
+
+Measures throughput (MB/s) and per-call latency for every phase function,
+the master encrypt()/decrypt() and the ciphers in additional_ciphers.py,
+over a range of message sizes, password lengths and block sizes.
+
+Usage:
+    python benchmark.py                          # print a table
+    python benchmark.py --output results.json    # save the results
+    python benchmark.py --baseline results.json  # compare against them
+    python benchmark.py --sizes 16 1M 100M --only encrypt decrypt
+
+Each setting is only varied for the functions that use it (the password
+only matters to Phase 3 and the full pipeline, for example). Slow
+functions stop at the first size that takes longer than --max-seconds
+per call, so the phase-by-phase functions don't run for hours on 100 MB.
+
+When comparing against a baseline, any case whose throughput dropped by
+more than --tolerance is reported and the exit status is 1.
+
+    python benchmark.py --login --clients 8
+
+measures the web app's login throughput instead: several clients log in
+over and over at the same time, against a throwaway user database.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import additional_ciphers
+import engine
+
+# Message sizes used when none are given (the full range is 16 B - 100 MB)
+DEFAULT_SIZES = (16, 1024, 64 * 1024, 1024 * 1024)
+FULL_SIZES = (16, 1024, 64 * 1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024)
+PASSWORD_LENGTHS = (1, 6, 64)
+BLOCK_SIZES = (1, 4, 16)
+
+# Keep timing one case until this much time has been spent on it
+MIN_SECONDS = 0.2
+
+
+def _backend(function, backend, accented=False):
+    """
+    function(text, key) on another backend, optionally on accented text.
+
+    With accented, the first character is swapped for "é" so the text is
+    no longer plain ASCII (the Python engine's slow case).
+    """
+
+    def run(text, key):
+        if accented:
+            text = "é" + text[1:]
+        return function(text, key, backend=backend)
+
+    return run
+
+
+# Which key settings each function cares about
+TARGETS = {
+    "phase1_encrypt": (engine.phase1_encrypt, ()),
+    "phase1_decrypt": (engine.phase1_decrypt, ()),
+    "phase2_encrypt": (engine.phase2_encrypt, ("block_size",)),
+    "phase2_decrypt": (engine.phase2_decrypt, ("block_size",)),
+    "phase3_encrypt": (engine.phase3_encrypt, ("password",)),
+    "phase3_decrypt": (engine.phase3_decrypt, ("password",)),
+    "phase4_encrypt": (engine.phase4_encrypt, ()),
+    "phase4_decrypt": (engine.phase4_decrypt, ()),
+    "phase5_encrypt": (engine.phase5_encrypt, ()),
+    "phase5_decrypt": (engine.phase5_decrypt, ()),
+    "encrypt": (engine.encrypt, ("password", "block_size")),
+    "decrypt": (engine.decrypt, ("password", "block_size")),
+    "encrypt_numpy": (_backend(engine.encrypt, "numpy"), ("password", "block_size")),
+    "decrypt_numpy": (_backend(engine.decrypt, "numpy"), ("password", "block_size")),
+    "encrypt_accented": (_backend(engine.encrypt, "python", accented=True), ()),
+    "encrypt_accented_numpy": (_backend(engine.encrypt, "numpy", accented=True), ()),
+    "xor_encrypt": (additional_ciphers.xor_encrypt, ()),
+    "xor_decrypt": (additional_ciphers.xor_decrypt, ()),
+    "vigenere_encrypt": (additional_ciphers.vigenere_encrypt, ("password",)),
+    "vigenere_decrypt": (additional_ciphers.vigenere_decrypt, ("password",)),
+    "rail_fence_encrypt": (additional_ciphers.rail_fence_encrypt, ()),
+    "rail_fence_decrypt": (additional_ciphers.rail_fence_decrypt, ()),
+}
+
+
+def parse_size(text):
+    """Turn '16', '64K', '1M' or '100M' into a number of bytes."""
+    units = {"K": 1024, "M": 1024 * 1024, "G": 1024 * 1024 * 1024}
+    text = text.strip().upper()
+    if text[-1:] in units:
+        return int(text[:-1]) * units[text[-1]]
+    return int(text)
+
+
+def make_text(size, seed=0):
+    """Deterministic printable-ASCII test message of 'size' characters."""
+    rng = random.Random(seed)
+    chunk = "".join(chr(rng.randint(32, 126)) for _ in range(min(size, 4096)))
+    # Repeating a random chunk is far quicker than drawing 100M characters
+    return (chunk * (size // max(len(chunk), 1) + 1))[:size]
+
+
+def make_key(password_length=6, block_size=4):
+    """Key with the given password length and block size."""
+    password = ("SECRET" * (password_length // 6 + 1))[:password_length]
+    return {
+        "shift": 5,
+        "block_size": block_size,
+        "password": password,
+        "noise_interval": 3,
+        "noise_char": "~",
+        "xor_value": 42,
+        "vigenere_key": password,
+        "rails": 3,
+    }
+
+
+def settings_for(uses, password_lengths, block_sizes):
+    """Every (password length, block size) combination worth timing."""
+    passwords = password_lengths if "password" in uses else (6,)
+    blocks = block_sizes if "block_size" in uses else (4,)
+    return [(length, size) for length in passwords for size in blocks]
+
+
+def time_call(function, text, key, min_seconds=MIN_SECONDS):
+    """
+    Call function(text, key) repeatedly and time each call.
+
+    Returns:
+        List of per-call times in seconds (always at least one)
+    """
+    times = []
+    spent = 0.0
+    while spent < min_seconds or not times:
+        started = time.perf_counter()
+        function(text, key)
+        elapsed = time.perf_counter() - started
+        times.append(elapsed)
+        spent += elapsed
+    return times
+
+
+def run_benchmarks(
+    names=None,
+    sizes=DEFAULT_SIZES,
+    password_lengths=PASSWORD_LENGTHS,
+    block_sizes=BLOCK_SIZES,
+    max_seconds=5.0,
+    min_seconds=MIN_SECONDS,
+):
+    """
+    Time every requested function over every size and key setting.
+
+    Args:
+        names: Functions to time (names from TARGETS, default: all)
+        sizes: Message sizes in characters
+        password_lengths: Password lengths to try where it matters
+        block_sizes: Block sizes to try where it matters
+        max_seconds: Skip bigger sizes once one call takes longer than this
+        min_seconds: Minimum time spent timing each case
+
+    Returns:
+        List of result dictionaries, one per case
+    """
+    names = list(TARGETS) if names is None else names
+    for name in names:
+        if name not in TARGETS:
+            raise ValueError(f"unknown benchmark {name!r}")
+
+    texts = {size: make_text(size) for size in sorted(sizes)}
+    results = []
+    for name in names:
+        function, uses = TARGETS[name]
+        for password_length, block_size in settings_for(
+            uses, password_lengths, block_sizes
+        ):
+            key = make_key(password_length, block_size)
+            for size, text in texts.items():
+                times = time_call(function, text, key, min_seconds)
+                latency = statistics.median(times)
+                results.append(
+                    {
+                        "name": name,
+                        "size": size,
+                        "password_length": password_length,
+                        "block_size": block_size,
+                        "calls": len(times),
+                        "latency": latency,
+                        "mb_per_s": size / latency / 1_000_000 if latency else 0.0,
+                    }
+                )
+                if latency > max_seconds:
+                    break
+    return results
+
+
+def case_id(result):
+    """What identifies a case when comparing runs."""
+    return (
+        result["name"],
+        result["size"],
+        result["password_length"],
+        result["block_size"],
+    )
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Find cases that got slower than the baseline.
+
+    Args:
+        results: Results from run_benchmarks()
+        baseline: Results from an earlier run
+        tolerance: Allowed drop in throughput (0.25 = 25% slower)
+
+    Returns:
+        List of (result, baseline result, ratio) for every regression,
+        where ratio is new throughput / old throughput
+    """
+    before = {case_id(old): old for old in baseline}
+    regressions = []
+    for result in results:
+        old = before.get(case_id(result))
+        if old is None or old["mb_per_s"] <= 0:
+            continue
+        ratio = result["mb_per_s"] / old["mb_per_s"]
+        if ratio < 1 - tolerance:
+            regressions.append((result, old, ratio))
+    return regressions
+
+
+def format_size(size):
+    """Short human-readable size, e.g. 64K or 1M."""
+    for unit, scale in (("M", 1024 * 1024), ("K", 1024)):
+        if size >= scale and size % scale == 0:
+            return f"{size // scale}{unit}"
+    return str(size)
+
+
+def format_table(results):
+    """Results as a plain-text table."""
+    lines = [
+        f"{'function':<24} {'size':>6} {'pw':>4} {'block':>5} "
+        f"{'latency':>12} {'MB/s':>10}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result['name']:<24} {format_size(result['size']):>6} "
+            f"{result['password_length']:>4} {result['block_size']:>5} "
+            f"{result['latency'] * 1000:>10.3f}ms {result['mb_per_s']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def run_login_benchmark(clients=8, logins=20, pages=10):
+    """
+    Time concurrent logins to the web app.
+
+    Each client logs in 'logins' times, opening 'pages' workshop pages
+    after each login (those reuse the identity cached in the session).
+
+    Args:
+        clients: Number of clients logging in at the same time
+        logins: Logins per client
+        pages: Workshop pages per login
+
+    Returns:
+        Dictionary with logins per second and login latency percentiles
+    """
+    # Imported here so the cipher benchmarks don't need Flask
+    import app as webapp
+    import database
+
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        with webapp.app.test_client() as browser:
+            for _ in range(logins):
+                started = time.perf_counter()
+                reply = browser.post(
+                    "/login", data={"username": "student", "password": "password123"}
+                )
+                elapsed = time.perf_counter() - started
+                if reply.status_code != 302:
+                    raise RuntimeError("login failed during benchmark")
+                for _ in range(pages):
+                    browser.get("/workshop")
+                with lock:
+                    latencies.append(elapsed)
+
+    saved = database.DATABASE
+    with tempfile.TemporaryDirectory() as folder:
+        database.DATABASE = os.path.join(folder, "users.db")
+        try:
+            webapp.ensure_database()
+            threads = [threading.Thread(target=client) for _ in range(clients)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            seconds = time.perf_counter() - started
+        finally:
+            database.close_all()
+            database.DATABASE = saved
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "logins": len(latencies),
+        "logins_per_s": len(latencies) / seconds,
+        "pages_per_s": len(latencies) * pages / seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def build_parser():
+    """Create the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="benchmark",
+        description="Measure CipherForge throughput and latency.",
+    )
+    parser.add_argument(
+        "--only", nargs="+", choices=list(TARGETS), help="functions to time"
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=parse_size, help="message sizes, e.g. 16 64K 1M"
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="use every size from 16 B to 100 MB"
+    )
+    parser.add_argument(
+        "--password-lengths", nargs="+", type=int, default=list(PASSWORD_LENGTHS)
+    )
+    parser.add_argument("--block-sizes", nargs="+", type=int, default=list(BLOCK_SIZES))
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=5.0,
+        help="stop growing the size once one call takes this long",
+    )
+    parser.add_argument(
+        "--login", action="store_true", help="benchmark web app logins instead"
+    )
+    parser.add_argument(
+        "--clients", type=int, default=8, help="concurrent clients for --login"
+    )
+    parser.add_argument("-o", "--output", help="save results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed throughput drop before it counts as a regression",
+    )
+    return parser
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    args = build_parser().parse_args(argv)
+    if args.login:
+        report = run_login_benchmark(clients=args.clients)
+        print(
+            f"{report['clients']} clients: {report['logins_per_s']:.1f} logins/s, "
+            f"{report['pages_per_s']:.1f} pages/s "
+            f"(login p50 {report['p50_ms']:.1f} ms, p95 {report['p95_ms']:.1f} ms)"
+        )
+        if args.output:
+            with open(args.output, "w") as output:
+                json.dump(report, output, indent=2)
+        return 0
+
+    sizes = args.sizes or (FULL_SIZES if args.full else DEFAULT_SIZES)
+
+    results = run_benchmarks(
+        names=args.only,
+        sizes=sizes,
+        password_lengths=args.password_lengths,
+        block_sizes=args.block_sizes,
+        max_seconds=args.max_seconds,
+    )
+    print(format_table(results))
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as source:
+            baseline = json.load(source)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for result, old, ratio in regressions:
+            print(
+                f"REGRESSION {result['name']} size={format_size(result['size'])} "
+                f"pw={result['password_length']} block={result['block_size']}: "
+                f"{old['mb_per_s']:.2f} -> {result['mb_per_s']:.2f} MB/s "
+                f"({ratio:.0%})",
+                file=sys.stderr,
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
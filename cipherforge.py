@@ -0,0 +1,249 @@
+"""CipherForge command-line tool.
+
+Encrypts or decrypts files (or stdin/stdout) with the 5-phase engine.
+
+Usage:
+    python cipherforge.py encrypt message.txt -o message.enc --password SECRET
+    python cipherforge.py decrypt message.enc -o message.txt --password SECRET
+    cat log.txt | python cipherforge.py encrypt > log.enc
+
+Input files are memory-mapped instead of being read into memory, and the
+output file is created at its final size up front (only Phase 4 changes
+the length, so the size is known before anything is encrypted) and
+memory-mapped too. The work is done in chunks cut at multiples of the
+cipher period, so every chunk can be encrypted on its own.
+
+Every byte is treated as one character, exactly like engine.encrypt_bytes().
+"""
+
+import argparse
+import mmap
+import os
+import sys
+import time
+
+from engine import (
+    cipher_period,
+    ciphertext_length,
+    compile_key,
+    decrypt_into,
+    encrypt_into,
+    plaintext_length,
+)
+
+# Roughly how much plaintext to handle per chunk (16 MB)
+CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def build_parser():
+    """Create the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="cipherforge",
+        description="Encrypt or decrypt files with the CipherForge algorithm.",
+    )
+    parser.add_argument("action", choices=["encrypt", "decrypt"])
+    parser.add_argument(
+        "input", nargs="?", default="-", help="input file (default: stdin)"
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="output file (default: stdout)"
+    )
+
+    # Key settings - anything left out uses the engine's default
+    parser.add_argument("--shift", type=int, help="Phase 1 shift")
+    parser.add_argument("--block-size", type=int, help="Phase 2 block size")
+    parser.add_argument("--password", help="Phase 3 password")
+    parser.add_argument("--noise-interval", type=int, help="Phase 4 interval")
+    parser.add_argument("--noise-char", help="Phase 4 noise character")
+
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="don't report throughput"
+    )
+    return parser
+
+
+def key_from_args(args):
+    """Build a key dictionary from the settings given on the command line."""
+    settings = {
+        "shift": args.shift,
+        "block_size": args.block_size,
+        "password": args.password,
+        "noise_interval": args.noise_interval,
+        "noise_char": args.noise_char,
+    }
+    return {name: value for name, value in settings.items() if value is not None}
+
+
+def chunk_sizes(key, action):
+    """
+    Work out how much input to handle at a time.
+
+    Returns:
+        Tuple of (input chunk size, output chunk size), both cut at a
+        multiple of the cipher period
+    """
+    period = cipher_period(key)
+    plain_chunk = max(period, CHUNK_SIZE - CHUNK_SIZE % period)
+    cipher_chunk = ciphertext_length(plain_chunk, key)
+    if action == "encrypt":
+        return plain_chunk, cipher_chunk
+    return cipher_chunk, plain_chunk
+
+
+def output_length(length, key, action):
+    """Length of the result for an input of 'length' bytes."""
+    if action == "encrypt":
+        return ciphertext_length(length, key)
+    return plaintext_length(length, key)
+
+
+def convert_file(source, output_path, key, action):
+    """
+    Convert a memory-mapped input into a file, also memory-mapped.
+
+    Args:
+        source: memoryview of the whole input
+        output_path: Where to write the result
+        key: CompiledKey to use
+        action: "encrypt" or "decrypt"
+
+    Returns:
+        Number of bytes written
+    """
+    convert = encrypt_into if action == "encrypt" else decrypt_into
+    in_chunk, out_chunk = chunk_sizes(key, action)
+    size = output_length(len(source), key, action)
+
+    with open(output_path, "w+b") as output:
+        output.truncate(size)
+        if size == 0:
+            return 0
+
+        with mmap.mmap(output.fileno(), size) as mapped:
+            with memoryview(mapped) as target:
+                written = 0
+                for start in range(0, len(source), in_chunk):
+                    written += convert(
+                        source[start : start + in_chunk],
+                        target[written : written + out_chunk],
+                        key,
+                    )
+            mapped.flush()
+
+    return written
+
+
+def convert_stream(source, output, key, action):
+    """
+    Convert chunks read from a stream (such as stdin) and write them out.
+
+    Args:
+        source: Binary file object to read from
+        output: Binary file object to write to
+        key: CompiledKey to use
+        action: "encrypt" or "decrypt"
+
+    Returns:
+        Tuple of (bytes read, bytes written)
+    """
+    convert = encrypt_into if action == "encrypt" else decrypt_into
+    in_chunk, out_chunk = chunk_sizes(key, action)
+    buffer = bytearray(out_chunk)
+    read = written = 0
+
+    with memoryview(buffer) as target:
+        while True:
+            # read() only comes up short at the end of the stream
+            chunk = source.read(in_chunk)
+            if not chunk:
+                break
+            count = convert(chunk, target, key)
+            output.write(target[:count])
+            read += len(chunk)
+            written += count
+
+    output.flush()
+    return read, written
+
+
+class _MemoryReader:
+    """Minimal file-like reader over a memoryview (no copying)."""
+
+    def __init__(self, view):
+        self._view = view
+        self._position = 0
+
+    def read(self, size):
+        """Return the next 'size' bytes as a memoryview slice."""
+        chunk = self._view[self._position : self._position + size]
+        self._position += len(chunk)
+        return chunk
+
+
+def run(args, stdin=None, stdout=None):
+    """
+    Carry out one encrypt/decrypt command.
+
+    Returns:
+        Tuple of (bytes read, bytes written)
+    """
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    key = compile_key(key_from_args(args))
+
+    if args.input == "-":
+        if args.output == "-":
+            return convert_stream(stdin, stdout, key, args.action)
+        data = stdin.read()
+        return len(data), convert_file(memoryview(data), args.output, key, args.action)
+
+    if args.output != "-" and os.path.exists(args.output):
+        if os.path.samefile(args.input, args.output):
+            raise ValueError("input and output must be different files")
+
+    with open(args.input, "rb") as source:
+        if os.fstat(source.fileno()).st_size == 0:
+            # mmap cannot map an empty file
+            if args.output == "-":
+                return 0, 0
+            return 0, convert_file(memoryview(b""), args.output, key, args.action)
+
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                if args.output == "-":
+                    return convert_stream(
+                        _MemoryReader(view), stdout, key, args.action
+                    )
+                return len(view), convert_file(view, args.output, key, args.action)
+
+
+def format_report(action, read, written, seconds):
+    """Describe how much was processed and how fast."""
+    megabytes = read / 1_000_000
+    rate = megabytes / seconds if seconds > 0 else float("inf")
+    verb = "Encrypted" if action == "encrypt" else "Decrypted"
+    return (
+        f"{verb} {read:,} bytes -> {written:,} bytes "
+        f"in {seconds:.3f} s ({rate:.1f} MB/s)"
+    )
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        read, written = run(args)
+    except (OSError, ValueError) as error:
+        parser.exit(1, f"cipherforge: error: {error}\n")
+    seconds = time.perf_counter() - started
+
+    if not args.quiet:
+        print(format_report(args.action, read, written, seconds), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
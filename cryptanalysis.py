@@ -0,0 +1,356 @@
+"""CipherForge key recovery (known-plaintext attack).
+
+For auditing: given a ciphertext and a piece of its plaintext, find a
+key that decrypts it. This shows how much (or how little) the 5-phase
+algorithm resists a determined attacker.
+
+Usage:
+    python cryptanalysis.py message.enc --known "Dear Sir"
+    python cryptanalysis.py message.enc --known "2026" --offset 120
+
+How it works - each phase is tackled on its own instead of trying every
+whole key:
+
+  1. Phase 5 needs no key, so it is undone straight away.
+  2. Phase 4: for each noise_interval, the ciphertext length must be one
+     Phase 4 can produce, and every noise slot must hold the same
+     character (which gives noise_char).
+  3. Phase 2: for each block_size, the known plaintext is moved to where
+     the block reversal would put it.
+  4. Phase 1 + Phase 3: each known character then gives the shift at
+     its position. For each password length, all the positions that use
+     the same password character must agree on it.
+
+Phase 1 and Phase 3 shifts simply add up, so no attack can tell them
+apart. The key found uses shift 0 and a password that does both jobs -
+it decrypts exactly like the original key.
+
+Every (noise_interval, block_size) pair is searched as a separate job
+on a process pool, and the search stops as soon as a key is found.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from engine import ciphertext_length, decrypt, phase4_decrypt, plaintext_length
+
+# Settings searched by default
+NOISE_INTERVALS = range(1, 11)
+BLOCK_SIZES = range(1, 21)
+MAX_PASSWORD_LENGTH = 32
+
+# Known characters that must agree with an earlier one (at the same
+# password position) before a password length is believed. Each one
+# only matches by chance 1 time in 95.
+MIN_CHECKS = 4
+
+
+def _swap_pairs(text):
+    """Undo Phase 5 (the pair swap is its own inverse)."""
+    chars = list(text)
+    even = len(chars) - len(chars) % 2
+    chars[0:even:2], chars[1:even:2] = chars[1:even:2], chars[0:even:2]
+    return "".join(chars)
+
+
+def noise_candidates(ciphertext, intervals=NOISE_INTERVALS):
+    """
+    Find the Phase 4 settings that could have made this ciphertext.
+
+    Args:
+        ciphertext: The whole ciphertext
+        intervals: noise_interval values to try
+
+    Yields:
+        Tuples of (noise_interval, noise_char, text with Phase 5 and
+        Phase 4 undone)
+    """
+    swapped = _swap_pairs(ciphertext)
+    for interval in intervals:
+        key = {"noise_interval": interval}
+        # Phase 4 can't make every length (each noise adds one more)
+        length = plaintext_length(len(swapped), key)
+        if ciphertext_length(length, key) != len(swapped):
+            continue
+
+        noise = swapped[interval :: interval + 1]
+        if noise != noise[:1] * len(noise):
+            continue
+        # Without any noise slots, any noise character will do
+        noise_char = noise[:1] or "~"
+        yield interval, noise_char, phase4_decrypt(swapped, key)
+
+
+def block_positions(offset, count, block_size, length):
+    """
+    Work out where Phase 2 moves some plaintext positions.
+
+    Args:
+        offset: First plaintext position
+        count: How many positions
+        block_size: Phase 2 block size
+        length: Length of the whole plaintext (the last block may be short)
+
+    Returns:
+        List with the new position of each one
+    """
+    full = length - length % block_size
+    positions = []
+    for position in range(offset, offset + count):
+        start = position - position % block_size
+        size = block_size if start < full else length - full
+        positions.append(start + size - 1 - (position - start))
+    return positions
+
+
+def solve_shifts(known, positions, observed, password_length):
+    """
+    Work out the combined Phase 1 + Phase 3 shift for each password position.
+
+    Args:
+        known: The known plaintext
+        positions: Where each known character is after Phase 2
+        observed: The character found there after undoing Phase 5 + 4
+        password_length: Password length to try
+
+    Returns:
+        Tuple of (shifts, checks) - shifts has one 0-94 value per
+        password position (None where no known character landed), and
+        checks counts how many characters agreed with an earlier one.
+        None if the known plaintext can't fit this password length.
+    """
+    shifts = [None] * password_length
+    checks = 0
+    for char, position, found in zip(known, positions, observed):
+        if not 32 <= ord(char) <= 126:
+            # Characters outside printable ASCII are never shifted
+            if found != char:
+                return None
+            continue
+        if not 32 <= ord(found) <= 126:
+            return None
+
+        shift = (ord(found) - ord(char)) % 95
+        slot = position % password_length
+        if shifts[slot] is None:
+            shifts[slot] = shift
+        elif shifts[slot] == shift:
+            checks += 1
+        else:
+            return None
+    return shifts, checks
+
+
+def password_for(shifts):
+    """
+    Build a password whose Phase 3 shifts (with shift 0) are 'shifts'.
+
+    Every value 0-94 is ord(char) % 95 for exactly one printable char.
+    """
+    return "".join(chr(shift if shift >= 32 else shift + 95) for shift in shifts)
+
+
+def _search_job(known, positions, observed, max_password_length):
+    """
+    Try every password length for one (noise_interval, block_size).
+
+    Returns:
+        Tuple of (shifts or None, how many password lengths were tried)
+    """
+    for password_length in range(1, max_password_length + 1):
+        solved = solve_shifts(known, positions, observed, password_length)
+        if solved is None:
+            continue
+        shifts, checks = solved
+        # Every password character must be pinned down and double-checked
+        if None not in shifts and checks >= MIN_CHECKS:
+            return shifts, password_length
+    return None, max_password_length
+
+
+def recover_key(
+    ciphertext,
+    known,
+    offset=0,
+    max_password_length=MAX_PASSWORD_LENGTH,
+    noise_intervals=NOISE_INTERVALS,
+    block_sizes=BLOCK_SIZES,
+    workers=None,
+    executor=None,
+):
+    """
+    Find a key that decrypts 'ciphertext' to text containing 'known'.
+
+    Args:
+        ciphertext: The whole ciphertext
+        known: A piece of the plaintext (at least MIN_CHECKS + 1 characters)
+        offset: Where 'known' starts in the plaintext (default: 0)
+        max_password_length: Longest password to try
+        noise_intervals: noise_interval values to try
+        block_sizes: block_size values to try
+        workers: Number of processes (default: os.cpu_count())
+        executor: concurrent.futures executor to use instead of a new
+            process pool
+
+    Returns:
+        Dictionary with "key" (a key dictionary, or None if no key
+        fits), "candidates" (settings tried: one per noise_interval,
+        block_size and password length), "seconds" and "keys_per_s"
+
+    Raises:
+        ValueError: If the known plaintext is too short to check
+    """
+    if len(known) <= MIN_CHECKS:
+        raise ValueError(f"known plaintext must be over {MIN_CHECKS} characters")
+    if offset < 0:
+        raise ValueError(f"offset must not be negative, got {offset}")
+
+    started = time.perf_counter()
+    jobs = []
+    for interval, noise_char, middle in noise_candidates(ciphertext, noise_intervals):
+        if offset + len(known) > len(middle):
+            continue
+        for block_size in block_sizes:
+            positions = block_positions(offset, len(known), block_size, len(middle))
+            observed = [middle[position] for position in positions]
+            settings = (interval, noise_char, block_size)
+            jobs.append((settings, (known, positions, observed, max_password_length)))
+
+    own_pool = executor is None and len(jobs) > 1
+    if own_pool:
+        executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+    try:
+        found, candidates = _run_jobs(jobs, executor)
+    finally:
+        if own_pool:
+            executor.shutdown(cancel_futures=True)
+
+    key = None
+    if found is not None:
+        (interval, noise_char, block_size), shifts = found
+        key = {
+            "shift": 0,
+            "block_size": block_size,
+            "password": password_for(shifts),
+            "noise_interval": interval,
+            "noise_char": noise_char,
+        }
+        plain = decrypt(ciphertext, key, verify=True)
+        if plain[offset : offset + len(known)] != known:
+            raise AssertionError("recovered key does not decrypt the known text")
+
+    seconds = time.perf_counter() - started
+    return {
+        "key": key,
+        "candidates": candidates,
+        "seconds": seconds,
+        "keys_per_s": candidates / seconds if seconds > 0 else float("inf"),
+    }
+
+
+def _run_jobs(jobs, executor):
+    """
+    Run search jobs until one finds a key.
+
+    Jobs finish in any order, but the key returned is always the one the
+    earliest job finds, so results don't depend on timing. Later jobs
+    are cancelled as soon as it is known.
+
+    Returns:
+        Tuple of ((settings, shifts) or None, candidates tried)
+    """
+    if executor is None:
+        results = []
+        for settings, arguments in jobs:
+            shifts, tried = _search_job(*arguments)
+            results.append(tried)
+            if shifts is not None:
+                return (settings, shifts), sum(results)
+        return None, sum(results)
+
+    futures = [executor.submit(_search_job, *arguments) for _, arguments in jobs]
+    pending = set(futures)
+    candidates = 0
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            candidates += sum(future.result()[1] for future in done)
+            for index, future in enumerate(futures):
+                if not future.done():
+                    break  # An earlier job might still find a key
+                if future.result()[0] is not None:
+                    return (jobs[index][0], future.result()[0]), candidates
+        return None, candidates
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def build_parser():
+    """Create the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="cryptanalysis",
+        description="Recover a CipherForge key from ciphertext and known plaintext.",
+    )
+    parser.add_argument(
+        "input", nargs="?", default="-", help="ciphertext file (default: stdin)"
+    )
+    parser.add_argument("--known", required=True, help="a piece of the plaintext")
+    parser.add_argument(
+        "--offset",
+        type=int,
+        default=0,
+        help="where the known text starts in the plaintext (default: 0)",
+    )
+    parser.add_argument(
+        "--max-password-length",
+        type=int,
+        default=MAX_PASSWORD_LENGTH,
+        help=f"longest password to try (default: {MAX_PASSWORD_LENGTH})",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="processes to use (default: one per CPU)"
+    )
+    return parser
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        if args.input == "-":
+            data = sys.stdin.buffer.read()
+        else:
+            with open(args.input, "rb") as source:
+                data = source.read()
+        # Every byte is one character, like cipherforge.py
+        report = recover_key(
+            data.decode("latin-1"),
+            args.known,
+            offset=args.offset,
+            max_password_length=args.max_password_length,
+            workers=args.workers,
+        )
+    except (OSError, ValueError) as error:
+        parser.exit(1, f"cryptanalysis: error: {error}\n")
+
+    print(
+        f"Tried {report['candidates']:,} candidate keys in "
+        f"{report['seconds']:.3f} s ({report['keys_per_s']:,.0f} keys/s)",
+        file=sys.stderr,
+    )
+    if report["key"] is None:
+        print("No key found", file=sys.stderr)
+        return 1
+    print(json.dumps(report["key"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,41 +15,308 @@ Usage:
     # Verify login
     if verify_user("admin", "secretpassword"):
         print("Login successful!")
+
+Connections are pooled: each thread keeps one open connection per
+database file and reuses it, instead of connecting for every query.
+
+verify_user() remembers recently looked-up password hashes for a short
+while, and checks passwords on a small pool of threads. Usernames with
+too many failed logins have to wait (longer after every failure) before
+their passwords are checked again, and when too many checks are already
+waiting new ones are refused straight away - either way LoginThrottled
+is raised without spending any time on hashing.
 """
 
+import csv
+import os
 import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing, contextmanager
 from werkzeug.security import generate_password_hash, check_password_hash
 
 DATABASE = 'users.db'
 
+# Settings applied to every new connection
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',  # Readers don't block the writer
+    'PRAGMA synchronous=NORMAL',  # Safe with WAL, and far fewer fsyncs
+    'PRAGMA cache_size=-8000',  # 8 MB page cache
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000',  # Wait up to 5 s for another writer
+)
+
+# Prepared statements kept per connection (reused on every call)
+CACHED_STATEMENTS = 64
+
+_local = threading.local()  # This thread's _ThreadConnections
+_all_pools = weakref.WeakSet()  # Every live thread's pool, for close_all()
+_generation = 0  # Goes up on close_all(), so threads know to reconnect
+_pool_lock = threading.Lock()
+
+# Password hashes remembered by verify_user()
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 60  # Seconds
+
+# Threads that check password hashes (hashing releases the GIL)
+HASH_WORKERS = min(4, os.cpu_count() or 1)
+
+# Password checks that may be waiting or running at once; any more are
+# refused instead of queueing
+HASH_QUEUE_LIMIT = 64
+
+# Failed logins allowed per username and client address; every failure
+# after that makes the next attempt wait
+LOGIN_FAILURE_LIMIT = 5
+LOGIN_BACKOFF = 1  # Seconds, doubled with every further failure
+LOGIN_BACKOFF_MAX = 300  # Seconds
+LOGIN_FAILURES_TRACKED = 10000  # Logins remembered (most recent kept)
+
+# import_users() hashes in worker processes from this many users up
+IMPORT_PARALLEL_MIN = 8
+
+# Largest number of ? placeholders used in one query
+_MAX_VARIABLES = 500
+
 
 def get_db():
-    """Get a database connection.
+    """Open a new database connection with the pool's settings.
+    
+    Most code should use connection() instead, which reuses this
+    thread's connection.
     
     Returns:
         sqlite3.Connection: Database connection with Row factory
     """
-    conn = sqlite3.connect(DATABASE)
+    conn = sqlite3.connect(
+        DATABASE,
+        cached_statements=CACHED_STATEMENTS,
+        check_same_thread=False,  # Only so close_all() can close it
+    )
     conn.row_factory = sqlite3.Row  # Access columns by name
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 
+def _close_connections(connections):
+    """Close and forget a set of pooled connections."""
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
+
+
+class _ThreadConnections:
+    """One thread's pooled connections, by database path.
+    
+    Only the thread itself holds on to this (through _local), so when the
+    thread exits it is dropped and its connections are closed.
+    """
+    
+    def __init__(self):
+        self.generation = _generation
+        self.connections = {}
+        weakref.finalize(self, _close_connections, self.connections)
+
+
+@contextmanager
+def connection():
+    """Borrow this thread's pooled connection as a transaction.
+    
+    Commits when the block finishes, or rolls back if it raises.
+    
+    Example:
+        with connection() as conn:
+            conn.execute('DELETE FROM users WHERE username = ?', (name,))
+    
+    Yields:
+        sqlite3.Connection: Connection reused by this thread
+    """
+    pool = getattr(_local, 'pool', None)
+    if pool is None or pool.generation != _generation:
+        pool = _local.pool = _ThreadConnections()
+        with _pool_lock:
+            _all_pools.add(pool)
+    connections = pool.connections
+
+    conn = connections.get(DATABASE)
+    if conn is None:
+        conn = connections[DATABASE] = get_db()
+
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
+def close_db():
+    """Close this thread's pooled connections."""
+    pool = getattr(_local, 'pool', None)
+    if pool is not None:
+        with _pool_lock:
+            _close_connections(pool.connections)
+
+
+def close_all():
+    """Close every pooled connection (e.g. before deleting the database).
+    
+    Also forgets any cached password hashes and failed logins.
+    
+    Call this when no other thread is using the database.
+    """
+    global _generation
+    with _pool_lock:
+        for pool in list(_all_pools):
+            _close_connections(pool.connections)
+        _all_pools.clear()
+        _generation += 1
+    _user_cache.clear()
+    _failed_logins.clear()
+
+
+class _TTLCache:
+    """Small thread-safe cache whose entries expire after 'ttl' seconds.
+    
+    Holds at most 'size' entries, dropping the least recently used.
+    """
+    
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+        self._version = 0  # Goes up on every invalidation
+    
+    def get(self, key):
+        """Look up 'key'.
+        
+        Returns:
+            tuple: (found, value, version) - pass version back to put()
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return True, entry[1], self._version
+            self._entries.pop(key, None)
+            return False, None, self._version
+    
+    def put(self, key, value, version):
+        """Remember 'value', unless something was invalidated since get()."""
+        with self._lock:
+            if version != self._version:
+                return  # The value might already be out of date
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, key):
+        """Forget 'key'."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._version += 1
+    
+    def clear(self):
+        """Forget everything."""
+        with self._lock:
+            self._entries.clear()
+            self._version += 1
+
+
+class LoginThrottled(Exception):
+    """A login was refused without checking the password.
+    
+    Attributes:
+        retry_after: Seconds to wait before trying again
+    """
+    
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _FailedLogins:
+    """Failed login counts per key, with a growing wait.
+    
+    The first 'limit' failures in a row are free; each one after that
+    makes the key wait: 'backoff' seconds, then twice that, and so on up
+    to 'backoff_max'. A successful login starts the count again.
+    """
+    
+    def __init__(self, limit, backoff, backoff_max, size):
+        self.limit = limit
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.size = size
+        self._entries = OrderedDict()  # key -> (failures, wait until)
+        self._lock = threading.Lock()
+    
+    def wait(self, key):
+        """Seconds 'key' still has to wait (0 if it may try now)."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return 0
+        return max(0, entry[1] - time.monotonic())
+    
+    def failed(self, key):
+        """Count a failed login."""
+        with self._lock:
+            failures = self._entries.pop(key, (0, 0))[0] + 1
+            until = 0
+            if failures > self.limit:
+                doublings = min(failures - self.limit - 1, 32)
+                delay = min(self.backoff * 2 ** doublings, self.backoff_max)
+                until = time.monotonic() + delay
+            self._entries[key] = (failures, until)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+    
+    def succeeded(self, key):
+        """Forget the failures of a successful login."""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        """Forget everything."""
+        with self._lock:
+            self._entries.clear()
+
+
+# (database path, username) -> password hash, or None for no such user
+_user_cache = _TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+# (database path, username, client address) -> recent failed logins
+_failed_logins = _FailedLogins(
+    LOGIN_FAILURE_LIMIT, LOGIN_BACKOFF, LOGIN_BACKOFF_MAX, LOGIN_FAILURES_TRACKED
+)
+_hash_pool = None  # Created on first use
+_hash_pending = 0  # Checks submitted to the pool and not finished yet
+# Checked for unknown users (see verify_user_async). Made now rather than
+# on first use, so the first unknown username isn't slower than the rest.
+_dummy_hash = generate_password_hash('not a real password')
+
+
 def init_db():
     """Create the users table if it doesn't exist.
     
     Call this once when setting up the application.
     """
-    conn = get_db()
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
     print("Database initialised!")
 
 
@@ -63,45 +330,170 @@ def create_user(username, password):
     Returns:
         bool: True if user was created, False if username exists
     """
-    conn = get_db()
+    # Hash the password before storing
+    password_hash = generate_password_hash(password)
     try:
-        # Hash the password before storing
-        password_hash = generate_password_hash(password)
-        conn.execute(
-            'INSERT INTO users (username, password_hash) VALUES (?, ?)',
-            (username, password_hash)
-        )
-        conn.commit()
+        with connection() as conn:
+            conn.execute(
+                'INSERT INTO users (username, password_hash) VALUES (?, ?)',
+                (username, password_hash)
+            )
+        _user_cache.invalidate((DATABASE, username))
         print(f"User '{username}' created successfully!")
         return True
     except sqlite3.IntegrityError:
         print(f"Error: Username '{username}' already exists!")
         return False
-    finally:
-        conn.close()
 
 
-def verify_user(username, password):
-    """Check if username and password are valid.
+def _password_hash(username):
+    """Look up a user's password hash, using the cache when possible.
+    
+    Returns:
+        str: The hash, or None if there is no such user
+    """
+    cache_key = (DATABASE, username)
+    found, password_hash, version = _user_cache.get(cache_key)
+    if found:
+        return password_hash
+    
+    with connection() as conn:
+        user = conn.execute(
+            'SELECT password_hash FROM users WHERE username = ?',
+            (username,)
+        ).fetchone()
+    
+    password_hash = user['password_hash'] if user is not None else None
+    _user_cache.put(cache_key, password_hash, version)
+    return password_hash
+
+
+def _get_hash_pool():
+    """The threads that check passwords (created on first use)."""
+    global _hash_pool
+    with _pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ThreadPoolExecutor(
+                max_workers=HASH_WORKERS, thread_name_prefix='verify'
+            )
+        return _hash_pool
+
+
+def _check_unknown_user(password):
+    """Spend as long as a real check would, then fail."""
+    check_password_hash(_dummy_hash, password)
+    return False
+
+
+def _submit_check(function, *args):
+    """Queue a password check, unless too many are waiting already."""
+    global _hash_pending
+    pool = _get_hash_pool()
+    with _pool_lock:
+        if _hash_pending >= HASH_QUEUE_LIMIT:
+            raise LoginThrottled('too many logins at once', retry_after=1)
+        _hash_pending += 1
+    
+    def finished(future):
+        global _hash_pending
+        with _pool_lock:
+            _hash_pending -= 1
+    
+    try:
+        future = pool.submit(function, *args)
+    except BaseException:
+        finished(None)
+        raise
+    future.add_done_callback(finished)
+    return future
+
+
+def _check_login(key, function, *args):
+    """Run a password check and count it towards the failed logins."""
+    valid = function(*args)
+    if valid:
+        _failed_logins.succeeded(key)
+    else:
+        _failed_logins.failed(key)
+    return valid
+
+
+def verify_user_async(username, password, client=None):
+    """Start checking a username and password on the hashing threads.
+    
+    Unknown usernames are checked against a dummy hash, so they take as
+    long as real ones and can't be told apart by timing. They are
+    throttled just like real ones, too.
+    
+    Failed logins are counted per username and client, so someone
+    guessing from one address can't lock the user out everywhere else.
     
     Args:
         username: The username to check
         password: The plain text password to verify
+        client: Where the login came from, e.g. the remote address
+            (default: None - counted per username only)
+    
+    Returns:
+        Future: Resolves to True if credentials are valid, False otherwise
+    
+    Raises:
+        LoginThrottled: If this username and client have failed too
+            often recently, or HASH_QUEUE_LIMIT checks are already waiting
+    """
+    key = (DATABASE, username, client)
+    wait = _failed_logins.wait(key)
+    if wait > 0:
+        raise LoginThrottled('too many failed logins', retry_after=wait)
+    
+    password_hash = _password_hash(username)
+    if password_hash is None:
+        return _submit_check(_check_login, key, _check_unknown_user, password)
+    return _submit_check(
+        _check_login, key, check_password_hash, password_hash, password
+    )
+
+
+def verify_user(username, password, client=None):
+    """Check if username and password are valid, waiting for the answer.
+    
+    This is a blocking wrapper around verify_user_async(), kept for
+    callers that have nothing else to do meanwhile - like a Flask view,
+    which has to answer the request with the result anyway. The calling
+    thread sleeps until its check is done; code that can carry on
+    should use verify_user_async() and collect the future later.
+    
+    Password hashes are cached for USER_CACHE_TTL seconds, and at most
+    HASH_WORKERS checks run at once, however many logins arrive.
+    Throttled logins are refused at once without hashing.
+    
+    Args:
+        username: The username to check
+        password: The plain text password to verify
+        client: Where the login came from (see verify_user_async)
     
     Returns:
         bool: True if credentials are valid, False otherwise
+    
+    Raises:
+        LoginThrottled: If the login was refused without checking
+            (see verify_user_async)
     """
-    conn = get_db()
-    user = conn.execute(
-        'SELECT password_hash FROM users WHERE username = ?',
-        (username,)
-    ).fetchone()
-    conn.close()
+    return verify_user_async(username, password, client).result()
+
+
+def user_exists(username):
+    """Check that a user is (still) in the database.
     
-    if user is None:
-        return False
+    Uses the same short-lived cache as verify_user().
     
-    return check_password_hash(user['password_hash'], password)
+    Args:
+        username: The username to look for
+    
+    Returns:
+        bool: True if the user exists
+    """
+    return _password_hash(username) is not None
 
 
 def delete_user(username):
@@ -113,14 +505,13 @@ def delete_user(username):
     Returns:
         bool: True if user was deleted, False if not found
     """
-    conn = get_db()
-    cursor = conn.execute(
-        'DELETE FROM users WHERE username = ?',
-        (username,)
-    )
-    conn.commit()
-    deleted = cursor.rowcount > 0
-    conn.close()
+    with connection() as conn:
+        cursor = conn.execute(
+            'DELETE FROM users WHERE username = ?',
+            (username,)
+        )
+        deleted = cursor.rowcount > 0
+    _user_cache.invalidate((DATABASE, username))
     
     if deleted:
         print(f"User '{username}' deleted.")
@@ -133,25 +524,128 @@ def delete_user(username):
 def list_users():
     """List all users in the database.
     
+    Rows are read from the database as they are needed, so even a huge
+    table is never held in memory all at once.
+    
+    Yields:
+        dict: User info (no passwords), one user at a time
+    """
+    with connection() as conn:
+        with closing(conn.execute(
+            'SELECT id, username, created_at FROM users'
+        )) as cursor:
+            for user in cursor:
+                yield dict(user)
+
+
+def _existing_usernames(conn, usernames):
+    """Which of 'usernames' are already in the database."""
+    existing = set()
+    for start in range(0, len(usernames), _MAX_VARIABLES):
+        batch = usernames[start:start + _MAX_VARIABLES]
+        placeholders = ', '.join('?' * len(batch))
+        rows = conn.execute(
+            f'SELECT username FROM users WHERE username IN ({placeholders})',
+            batch
+        )
+        existing.update(row['username'] for row in rows)
+    return existing
+
+
+def _hash_passwords(passwords, executor=None):
+    """Hash many passwords, spread over every CPU core if worthwhile."""
+    if executor is not None:
+        return list(executor.map(generate_password_hash, passwords))
+    if len(passwords) < IMPORT_PARALLEL_MIN:
+        return [generate_password_hash(password) for password in passwords]
+    
+    workers = os.cpu_count() or 1
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+
+def import_users(users, executor=None):
+    """Create many users at once.
+    
+    Passwords are hashed in parallel, and every new user is inserted in
+    a single transaction.
+    
+    Args:
+        users: Iterable of (username, password) pairs
+        executor: Optional concurrent.futures executor to hash with
+            (default: a process per CPU core for larger imports)
+    
     Returns:
-        list: List of dictionaries with user info (no passwords)
+        dict: 'created' - usernames added, 'duplicates' - usernames
+        skipped because they already exist (or appear twice)
     """
-    conn = get_db()
-    users = conn.execute(
-        'SELECT id, username, created_at FROM users'
-    ).fetchall()
-    conn.close()
+    wanted = {}
+    duplicates = []
+    for username, password in users:
+        if username in wanted:
+            duplicates.append(username)
+        else:
+            wanted[username] = password
+    
+    # Skip hashing for users that are already there
+    with connection() as conn:
+        existing = _existing_usernames(conn, list(wanted))
+    names = [name for name in wanted if name not in existing]
+    hashes = _hash_passwords([wanted[name] for name in names], executor)
+    
+    with connection() as conn:
+        # Take the write lock first, so nobody adds a user in between
+        conn.execute('BEGIN IMMEDIATE')
+        existing |= _existing_usernames(conn, names)
+        rows = [
+            (name, password_hash)
+            for name, password_hash in zip(names, hashes)
+            if name not in existing
+        ]
+        conn.executemany(
+            'INSERT INTO users (username, password_hash) VALUES (?, ?)',
+            rows
+        )
+    
+    for name in wanted:
+        _user_cache.invalidate((DATABASE, name))
+    duplicates.extend(name for name in wanted if name in existing)
     
-    return [dict(user) for user in users]
+    created = [name for name, _ in rows]
+    print(f"Imported {len(created)} users ({len(duplicates)} duplicates skipped).")
+    return {'created': created, 'duplicates': duplicates}
+
+
+def export_users(path):
+    """Write every user (no passwords) to a CSV file.
+    
+    Rows are streamed from the database straight into the file.
+    
+    Args:
+        path: Where to write the CSV file
+    
+    Returns:
+        int: Number of users written
+    """
+    count = 0
+    with open(path, 'w', newline='') as output:
+        writer = csv.DictWriter(output, fieldnames=['id', 'username', 'created_at'])
+        writer.writeheader()
+        for user in list_users():
+            writer.writerow(user)
+            count += 1
+    return count
 
 
 # Test the database functions
 if __name__ == "__main__":
     import os
     
-    # Remove test database if exists
-    if os.path.exists(DATABASE):
-        os.remove(DATABASE)
+    # Remove test database if exists (WAL mode adds two more files)
+    for path in (DATABASE, DATABASE + '-wal', DATABASE + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
     
     print("Testing database functions...")
     print()
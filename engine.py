@@ -20,6 +20,20 @@ RULES:
 
 # Your encryption code will go below this line!
 
+import math
+import os
+import sys
+import threading
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from time import perf_counter
+
+from permutation import Permutation
+
 
 def simple_shift(text, shift):
     """
@@ -89,16 +103,17 @@ def phase1_encrypt(text, key):
     """
     shift = key.get("shift", 5)
 
-    result = ""
-    for char in text:
+    # One slot per character, filled in as we go (no growing strings)
+    result = [""] * len(text)
+    for i, char in enumerate(text):
         if 32 <= ord(char) <= 126:  # Printable ASCII range
             position = ord(char) - 32
             new_position = (position + shift) % 95
-            result += chr(new_position + 32)
+            result[i] = chr(new_position + 32)
         else:
-            result += char
+            result[i] = char
 
-    return result
+    return "".join(result)
 
 
 def phase1_decrypt(text, key):
@@ -116,16 +131,16 @@ def phase1_decrypt(text, key):
     """
     shift = key.get("shift", 5)
 
-    result = ""
-    for char in text:
+    result = [""] * len(text)
+    for i, char in enumerate(text):
         if 32 <= ord(char) <= 126:
             position = ord(char) - 32
             new_position = (position - shift) % 95  # SUBTRACT to reverse!
-            result += chr(new_position + 32)
+            result[i] = chr(new_position + 32)
         else:
-            result += char
+            result[i] = char
 
-    return result
+    return "".join(result)
 
 
 ###############################################
@@ -149,16 +164,16 @@ def phase2_encrypt(text, key):
     """
     block_size = key.get("block_size", 4)
 
-    result = ""
+    result = [""] * len(text)
 
     # Process text in chunks of block_size
     for i in range(0, len(text), block_size):
         # Extract this block (might be shorter at the end)
         block = text[i : i + block_size]
-        # Reverse the block and add to result
-        result += block[::-1]
+        # Reverse the block into the same place in the result
+        result[i : i + block_size] = block[::-1]
 
-    return result
+    return "".join(result)
 
 
 def phase2_decrypt(text, key):
@@ -178,12 +193,12 @@ def phase2_decrypt(text, key):
     # Block reversal is self-inverting: encrypt == decrypt
     block_size = key.get("block_size", 4)
 
-    result = ""
+    result = [""] * len(text)
     for i in range(0, len(text), block_size):
         block = text[i : i + block_size]
-        result += block[::-1]
+        result[i : i + block_size] = block[::-1]
 
-    return result
+    return "".join(result)
 
 
 ###############################################
@@ -191,6 +206,14 @@ def phase2_decrypt(text, key):
 ###############################################
 
 
+def _phase3_password(key):
+    """The key's password, which must be a string (it is cached by value)."""
+    password = key.get("password", "SECRET")
+    if not isinstance(password, str):
+        raise ValueError(f"password must be a string, got {password!r}")
+    return password
+
+
 def phase3_encrypt(text, key):
     """
     Phase 3: Password-Dependent — Variable shifts based on password.
@@ -205,26 +228,20 @@ def phase3_encrypt(text, key):
 
     Returns:
         The password-encrypted string
+
+    Raises:
+        ValueError: If the password is not a string
     """
-    password = key.get("password", "SECRET")
+    password = _phase3_password(key)
 
-    result = ""
+    # The shift for each password position (ord(char) % 95) is worked
+    # out once per password, then every Nth character is shifted at once
+    shifts = _password_shifts(password)
+    as_bytes = text.isascii()
+    result = _buffer_of(text, as_bytes)
+    _substitute(result, shifts, as_bytes)
 
-    for i, char in enumerate(text):
-        if 32 <= ord(char) <= 126:
-            # Get the password character for this position (cycling)
-            password_char = password[i % len(password)]
-            # Calculate shift from password character
-            password_shift = ord(password_char) % 95
-
-            # Apply the shift (same math as Phase 1)
-            position = ord(char) - 32
-            new_position = (position + password_shift) % 95
-            result += chr(new_position + 32)
-        else:
-            result += char
-
-    return result
+    return _text_of(result, as_bytes)
 
 
 def phase3_decrypt(text, key):
@@ -240,25 +257,19 @@ def phase3_decrypt(text, key):
 
     Returns:
         The decrypted string (if password is correct)
-    """
-    password = key.get("password", "SECRET")
-
-    result = ""
 
-    for i, char in enumerate(text):
-        if 32 <= ord(char) <= 126:
-            # Get same password character for this position
-            password_char = password[i % len(password)]
-            password_shift = ord(password_char) % 95
+    Raises:
+        ValueError: If the password is not a string
+    """
+    password = _phase3_password(key)
 
-            # SUBTRACT the shift to reverse encryption
-            position = ord(char) - 32
-            new_position = (position - password_shift) % 95
-            result += chr(new_position + 32)
-        else:
-            result += char
+    # SUBTRACT the same shifts to reverse encryption
+    shifts = _password_shifts(password, reverse=True)
+    as_bytes = text.isascii()
+    result = _buffer_of(text, as_bytes)
+    _substitute(result, shifts, as_bytes)
 
-    return result
+    return _text_of(result, as_bytes)
 
 
 ###############################################
@@ -266,42 +277,104 @@ def phase3_decrypt(text, key):
 ###############################################
 
 
-def phase4_encrypt(text, key):
-    """Insert noise character every N positions."""
+def _phase4_interval(key):
+    """The key's noise_interval, which must be a whole number of 1 or more."""
     interval = key.get("noise_interval", 3)
+    if not isinstance(interval, int) or interval < 1:
+        raise ValueError(f"noise_interval must be at least 1, got {interval!r}")
+    return interval
+
+
+def phase4_encrypt(text, key):
+    """
+    Phase 4: Noise Injection — Insert a noise character every N positions.
+
+    Noise sits at every (N + 1)th position of the result, so the result
+    starts out as all noise and each of the N positions in a group is
+    filled with one stride copy. Plain ASCII is worked on as bytes.
+
+    Args:
+        text: The string to transform (already Phase 1-3 encrypted)
+        key: Dictionary containing encryption settings
+
+    Returns:
+        The string with noise after every N real characters
+
+    Raises:
+        ValueError: If noise_interval is not a whole number of 1 or more
+    """
+    interval = _phase4_interval(key)
     noise = key.get("noise_char", "~")
 
-    result = ""
-    count = 0
+    # One extra slot per N real characters (see ciphertext_length)
+    length = len(text) + len(text) // interval
+    as_bytes = text.isascii() and noise.isascii() and len(noise) == 1
+    if as_bytes:
+        source, result = text.encode("ascii"), bytearray(noise, "ascii") * length
+    else:
+        source, result = text, [noise] * length
 
-    for char in text:
-        result += char
-        count += 1
-        # Insert noise after every N real characters
-        if count % interval == 0:
-            result += noise
+    for offset in range(interval):
+        result[offset :: interval + 1] = source[offset::interval]
 
-    return result
+    return _text_of(result, as_bytes)
 
 
-def phase4_decrypt(text, key):
-    """Remove noise characters at their known positions."""
-    interval = key.get("noise_interval", 3)
+def phase4_decrypt(text, key, verify=False):
+    """
+    Phase 4: Remove the noise characters at their known positions.
 
-    result = ""
-    real_count = 0
-    i = 0
+    Noise sits at every (N + 1)th position, so it is deleted with one
+    stride. Plain ASCII is worked on as bytes.
 
-    while i < len(text):
-        result += text[i]
-        real_count += 1
-        i += 1
+    Args:
+        text: The string with noise
+        key: Dictionary containing the same encryption settings
+        verify: Check that every removed character really is the noise
+            character (default: False)
 
-        # Skip the noise character after every N real characters
-        if real_count % interval == 0 and i < len(text):
-            i += 1  # Skip noise
+    Returns:
+        The string without noise
 
-    return result
+    Raises:
+        ValueError: If noise_interval is not a whole number of 1 or more,
+            or verify is on and the noise has been changed
+    """
+    interval = _phase4_interval(key)
+
+    if verify:
+        noise = key.get("noise_char", "~")
+        removed = text[interval :: interval + 1]
+        if removed != noise * len(removed):
+            slots = range(interval, len(text), interval + 1)
+            raise _noise_error(text, slots, noise)
+
+    as_bytes = text.isascii()
+    result = _buffer_of(text, as_bytes)
+    del result[interval :: interval + 1]
+    return _text_of(result, as_bytes)
+
+
+def _noise_error(text, slots, noise, start=0):
+    """
+    Build the error for ciphertext whose noise has been changed.
+
+    Args:
+        text: The ciphertext (str or bytes-like)
+        slots: Positions in 'text' where noise should be, in order
+        noise: The noise character (str, or one byte for bytes)
+        start: How many characters of ciphertext came before 'text'
+
+    Returns:
+        ValueError naming the first position without noise
+    """
+    for slot in slots:
+        if text[slot : slot + 1] != noise:
+            return ValueError(
+                "ciphertext is corrupt or has been tampered with: "
+                f"expected noise at position {start + slot}"
+            )
+    return ValueError("ciphertext is corrupt or has been tampered with")
 
 
 ###############################################
@@ -311,18 +384,15 @@ def phase4_decrypt(text, key):
 
 def phase5_encrypt(text, key):
     """Swap adjacent character pairs."""
-    result = ""
+    # Odd-length strings keep their last char where it is
+    result = list(text)
 
     for i in range(0, len(text) - 1, 2):
         # Swap pairs: AB → BA
-        result += text[i + 1]
-        result += text[i]
+        result[i] = text[i + 1]
+        result[i + 1] = text[i]
 
-    # Handle odd-length strings (last char stays)
-    if len(text) % 2 == 1:
-        result += text[-1]
-
-    return result
+    return "".join(result)
 
 
 def phase5_decrypt(text, key):
@@ -330,41 +400,718 @@ def phase5_decrypt(text, key):
     return phase5_encrypt(text, key)  # Same operation!
 
 
+###############################################
+# TRANSPOSITIONS AS PERMUTATIONS
+###############################################
+
+# Phase 2 and Phase 5 never change a character, they only move it. For a
+# message of a given length each one is a fixed Permutation of positions
+# (see permutation.py), which can be combined with other transpositions
+# and applied in a single pass.
+
+
+def phase2_permutation(length, key):
+    """
+    Phase 2 as a permutation: every block of positions reversed.
+
+    Args:
+        length: Length of the message
+        key: Dictionary containing "block_size" (default: 4)
+
+    Returns:
+        Permutation of the given length
+    """
+    positions = Permutation.identity(length).order
+    order = positions[:]  # Every slot is overwritten below
+    _reverse_blocks(positions, order, key.get("block_size", 4))
+    return Permutation(order, check=False)
+
+
+def phase5_permutation(length, key):
+    """
+    Phase 5 as a permutation: neighbouring positions swapped.
+
+    Returns:
+        Permutation of the given length (an odd last position stays put)
+    """
+    order = Permutation.identity(length).order
+    even = length - length % 2
+    order[0:even:2], order[1:even:2] = order[1:even:2], order[0:even:2]
+    return Permutation(order, check=False)
+
+
+###############################################
+# COMPILED KEYS
+###############################################
+#
+# Reading the key dictionary and working out the password shifts costs
+# the same every time, so a key can be "compiled" once and reused.
+# Plain dictionaries are compiled automatically and kept in a small
+# cache, so encrypting many messages with the same key only pays once.
+
+# How many compiled keys to remember
+COMPILED_KEY_CACHE_SIZE = 128
+
+# How many password key schedules to remember (see _password_shifts)
+KEY_SCHEDULE_CACHE_SIZE = 64
+
+_COMPILED_KEY_FIELDS = (
+    "shift",  # Phase 1: the shift from the key
+    "block_size",  # Phase 2: block size for reversal
+    "password",  # Phase 3: the password from the key
+    "noise_interval",  # Phase 4: insert noise every N chars
+    "noise_char",  # Phase 4: which character to use as noise
+    "encrypt_shifts",  # Phase 1 + Phase 3 combined, per password position (bytes)
+    "decrypt_shifts",  # The same shifts, reversed for decryption
+)
+
+
+@lru_cache(maxsize=KEY_SCHEDULE_CACHE_SIZE)
+def _password_shifts(password, reverse=False):
+    """
+    Work out the Phase 3 shift for every password position (cached).
+
+    Long passphrases are only read once: the shifts are kept as compact
+    bytes (one 0-94 value per position), remembered per password.
+    With reverse, the shifts that undo them instead.
+    """
+    sign = -1 if reverse else 1
+    return bytes(sign * ord(char) % 95 for char in password)
+
+
+class CompiledKey(namedtuple("CompiledKey", _COMPILED_KEY_FIELDS)):
+    """
+    A checked, read-only key with its lookup tables worked out.
+
+    Build one with compile_key(). It can be passed anywhere a key
+    dictionary is accepted, including the phase functions.
+    """
+
+    __slots__ = ()
+
+    def get(self, name, default=None):
+        """Look up a setting by name, just like a key dictionary."""
+        if name in _COMPILED_KEY_FIELDS[:5]:
+            return getattr(self, name)
+        return default
+
+
+@lru_cache(maxsize=COMPILED_KEY_CACHE_SIZE, typed=True)
+def _compile_settings(shift, block_size, password, noise_interval, noise_char):
+    """
+    Check the key settings and build their lookup tables (cached).
+
+    Raises:
+        ValueError: If a setting cannot be used for encryption
+    """
+    # bool is a kind of int, but True/False make no sense as settings
+    for name, value in (
+        ("shift", shift),
+        ("block_size", block_size),
+        ("noise_interval", noise_interval),
+    ):
+        if type(value) is not int:
+            raise ValueError(f"{name} must be a whole number, got {value!r}")
+    if block_size < 1:
+        raise ValueError(f"block_size must be at least 1, got {block_size}")
+    if noise_interval < 1:
+        raise ValueError(f"noise_interval must be at least 1, got {noise_interval}")
+    if not isinstance(password, str) or not password:
+        raise ValueError("password must be a non-empty string")
+    if not isinstance(noise_char, str) or len(noise_char) != 1:
+        raise ValueError(f"noise_char must be a single character, got {noise_char!r}")
+
+    # Nothing here may grow with block_size: it comes straight from users
+    encrypt_shifts = bytes((shift + extra) % 95 for extra in _password_shifts(password))
+
+    return CompiledKey(
+        shift=shift,
+        block_size=block_size,
+        password=password,
+        noise_interval=noise_interval,
+        noise_char=noise_char,
+        encrypt_shifts=encrypt_shifts,
+        decrypt_shifts=bytes(-value % 95 for value in encrypt_shifts),
+    )
+
+
+def compile_key(key):
+    """
+    Check a key once and precompute everything the pipeline needs.
+
+    Compiled keys are cached by their settings, so calling this again
+    with an equal dictionary returns the same object.
+
+    Args:
+        key: Dictionary with settings for all phases (or a CompiledKey)
+
+    Returns:
+        CompiledKey ready to pass to encrypt()/decrypt()
+
+    Raises:
+        ValueError: If a setting cannot be used for encryption
+    """
+    if isinstance(key, CompiledKey):
+        return key
+
+    try:
+        return _compile_settings(
+            key.get("shift", 5),
+            key.get("block_size", 4),
+            key.get("password", "SECRET"),
+            key.get("noise_interval", 3),
+            key.get("noise_char", "~"),
+        )
+    except TypeError:
+        # An unhashable setting (a list, a dict, ...) is never valid
+        raise ValueError("key settings must be numbers and strings") from None
+
+
+def _compiled_or_none(key):
+    """
+    Compile 'key' for the fused pipeline.
+
+    Unusual keys (an empty password, a block size below 1, noise that is
+    not exactly one character, ...) return None so the caller can fall
+    back to the phase-by-phase path and behave exactly as it always has.
+    """
+    try:
+        return compile_key(key)
+    except ValueError:
+        return None
+
+
+###############################################
+# PROFILING
+###############################################
+#
+# To find out where the time goes, collect a Profile while encrypting:
+#
+#     with profiling() as profile:
+#         encrypt(message, key)
+#     print(profile.as_dict())
+#
+# Every step records its calls, wall time and sizes in and out (bytes,
+# or characters for text). The fused pipeline reports the steps it
+# really runs - "phase2", "phase1+phase3" and "phase4+phase5" - while
+# phase_by_phase=True reports each of the five phases.
+#
+# Profiling is off unless asked for; then each step only pays for one
+# "is a profile active?" check.
+
+_profile = None  # The Profile being filled in, if any
+
+
+class Profile:
+    """
+    Call counts, wall time and sizes for each step of the cipher.
+
+    Safe to share between threads.
+    """
+
+    # Metric name -> (field, help text), for Prometheus output
+    METRICS = {
+        "calls_total": (0, "Times the step ran"),
+        "seconds_total": (1, "Wall time spent in the step"),
+        "bytes_in_total": (2, "Bytes (or characters) going into the step"),
+        "bytes_out_total": (3, "Bytes (or characters) coming out of the step"),
+    }
+
+    def __init__(self):
+        self._steps = {}  # step -> [calls, seconds, bytes in, bytes out]
+        self._lock = threading.Lock()
+
+    def lap(self, step, started, size_in, size_out):
+        """
+        Record one run of a step that began at perf_counter() 'started'.
+
+        Returns:
+            perf_counter() now, ready to time the next step
+        """
+        now = perf_counter()
+        with self._lock:
+            totals = self._steps.get(step)
+            if totals is None:
+                totals = self._steps[step] = [0, 0.0, 0, 0]
+            totals[0] += 1
+            totals[1] += now - started
+            totals[2] += size_in
+            totals[3] += size_out
+        return now
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._steps.clear()
+
+    def as_dict(self):
+        """
+        Everything recorded so far.
+
+        Returns:
+            Dictionary of step -> {"calls", "seconds", "bytes_in",
+            "bytes_out"}
+        """
+        with self._lock:
+            return {
+                step: dict(zip(("calls", "seconds", "bytes_in", "bytes_out"), totals))
+                for step, totals in self._steps.items()
+            }
+
+    def prometheus(self, prefix="cipherforge_step"):
+        """
+        Everything recorded so far, in the Prometheus text format.
+
+        Args:
+            prefix: Start of every metric name
+
+        Returns:
+            String with one counter per metric, labelled by step
+        """
+        with self._lock:
+            steps = sorted((step, list(totals)) for step, totals in self._steps.items())
+
+        lines = []
+        for suffix, (field, description) in self.METRICS.items():
+            name = f"{prefix}_{suffix}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            for step, totals in steps:
+                lines.append(f'{name}{{step="{step}"}} {totals[field]}')
+        return "\n".join(lines) + "\n"
+
+
+def enable_profiling(profile=None):
+    """
+    Start recording into 'profile' (or a new Profile) in every thread.
+
+    Returns:
+        The Profile being filled in
+    """
+    global _profile
+    _profile = Profile() if profile is None else profile
+    return _profile
+
+
+def disable_profiling():
+    """
+    Stop recording.
+
+    Returns:
+        The Profile that was being filled in, or None
+    """
+    global _profile
+    profile, _profile = _profile, None
+    return profile
+
+
+@contextmanager
+def profiling(profile=None):
+    """
+    Record into 'profile' (or a new Profile) for the length of a block.
+
+    Whatever was being recorded before carries on afterwards.
+    """
+    global _profile
+    previous = _profile
+    try:
+        yield enable_profiling(profile)
+    finally:
+        _profile = previous
+
+
+###############################################
+# FUSED PIPELINE
+###############################################
+#
+# The phase functions above are easy to follow, but each one walks the
+# whole message in Python and builds a brand-new string. The fused
+# pipeline gives exactly the same output in three bulk steps:
+#
+#   1. Phase 2 as one gather (every block reversed with slice copies)
+#   2. Phase 1 + Phase 3 as one substitution (one translate table per
+#      password position, applied to every Nth character at once)
+#   3. Phase 4 + Phase 5 as one scatter (the noise slots and the pair
+#      swap both repeat, so each output stride is copied in one go)
+#
+# Phase 1 shifts every character the same way no matter where it sits,
+# so it can safely move after Phase 2 and merge with Phase 3.
+
+# All 95 printable characters, in order (space to tilde)
+_PRINTABLE = "".join(chr(code) for code in range(32, 127))
+
+
+# Messages shorter than this many password lengths are shifted one
+# byte at a time through _lookup_table(); longer ones a stride at a time
+LOOKUP_MAX_PERIODS = 4
+
+
+@lru_cache(maxsize=None)
+def _shift_table(shift, as_bytes):
+    """
+    Build a translate table that shifts printable ASCII by 'shift'.
+
+    Characters outside 32-126 are not in the table, so they pass through
+    unchanged exactly like the phase functions.
+    """
+    shift %= 95
+    shifted = _PRINTABLE[shift:] + _PRINTABLE[:shift]
+    if as_bytes:
+        return bytes.maketrans(_PRINTABLE.encode("ascii"), shifted.encode("ascii"))
+    return str.maketrans(_PRINTABLE, shifted)
+
+
+@lru_cache(maxsize=None)
+def _lookup_table():
+    """
+    All 95 byte shift tables end to end: byte b shifted by s is at
+    index (s << 8) + b.
+    """
+    return b"".join(_shift_table(shift, True) for shift in range(95))
+
+
+def _stride(start, count, step):
+    """Slice covering 'count' items from 'start', 'step' apart."""
+    return slice(start, start + (count - 1) * step + 1, step)
+
+
+def _reverse_blocks(source, target, block_size):
+    """
+    Copy 'source' into 'target' with every block reversed (Phase 2).
+
+    Small blocks are copied as one stride per block offset, large blocks
+    as one reversed slice per block - whichever needs fewer copies.
+    """
+    length = len(source)
+    full = length - length % block_size
+
+    if block_size * block_size <= full:
+        for offset in range(block_size):
+            target[offset:full:block_size] = source[
+                block_size - 1 - offset : full : block_size
+            ]
+    else:
+        for start in range(0, full, block_size):
+            target[start : start + block_size] = source[start : start + block_size][
+                ::-1
+            ]
+
+    # The last block might be shorter
+    target[full:] = source[full:][::-1]
+
+
+def _substitute(buffer, shifts, as_bytes, start=0):
+    """
+    Shift the characters of 'buffer' in place (Phase 1 + Phase 3).
+
+    Position i gets shifts[(start + i) % len(shifts)], so every Nth
+    character uses the same table and can be translated in a single call.
+    'start' is where the buffer begins in the whole message.
+
+    With a long password and a short buffer there would be a call for
+    only a few characters each, so bytes are looked up one at a time
+    instead, through the password's cached schedule repeated end to end.
+    """
+    step = len(shifts)
+    if not step:
+        # An empty password: text Phase 3 never changes passes through,
+        # anything else fails just as the old per-character loop did
+        low, high = (32, 126) if as_bytes else (" ", "~")
+        if any(low <= char <= high for char in buffer):
+            raise ZeroDivisionError("password is empty")
+        return
+
+    start %= step
+    shifts = shifts[start:] + shifts[:start]
+    if as_bytes and len(buffer) < LOOKUP_MAX_PERIODS * step:
+        _look_up_shifts(buffer, shifts)
+        return
+
+    for offset in range(min(step, len(buffer))):
+        table = _shift_table(shifts[offset], as_bytes)
+        if as_bytes:
+            buffer[offset::step] = buffer[offset::step].translate(table)
+        else:
+            buffer[offset::step] = "".join(buffer[offset::step]).translate(table)
+
+
+def _look_up_shifts(buffer, shifts):
+    """
+    Shift a bytearray in place, one _lookup_table() lookup per byte.
+
+    The schedule is repeated to the buffer's length and paired up with
+    the bytes, so each pair read as a 16-bit number is (shift << 8) + byte.
+    """
+    length = len(buffer)
+    pairs = bytearray(2 * length)
+    low, high = (0, 1) if sys.byteorder == "little" else (1, 0)
+    pairs[low::2] = buffer
+    pairs[high::2] = (shifts * -(-length // len(shifts)))[:length]
+    table = _lookup_table()
+    buffer[:] = bytes(map(table.__getitem__, memoryview(pairs).cast("H")))
+
+
+def _real_index(position, interval):
+    """Phase 3 position stored at a Phase 4 position (None for noise)."""
+    group, slot = divmod(position, interval + 1)
+    if slot == interval:
+        return None
+    return group * interval + slot
+
+
+@lru_cache(maxsize=1024)
+def _noise_swap_layout(length, interval):
+    """
+    Work out where Phase 4 + Phase 5 move every character.
+
+    Noise sits at every (interval + 1)th position and the pair swap
+    exchanges neighbours, so the combined pattern repeats every
+    interval + 1 characters (doubled if that is odd, to keep the pairs
+    lined up). Each position in that pattern becomes one stride.
+
+    Args:
+        length: Length of the final (noisy, swapped) text
+        interval: The noise_interval from the key
+
+    Returns:
+        Tuple of (final_slice, middle_slice, count) entries, where
+        middle_slice picks Phase 3 characters (None for a noise slot)
+    """
+    period = interval + 1
+    if period % 2:
+        period *= 2
+    middle_period = period - period // (interval + 1)
+    even = length - length % 2
+
+    layout = []
+    for offset in range(period):
+        count = len(range(offset, even, period))
+        if count == 0:
+            continue
+        real = _real_index(offset, interval)
+        middle = None if real is None else _stride(real, count, middle_period)
+        # Pair swap: position offset ends up at its neighbour
+        layout.append((_stride(offset ^ 1, count, period), middle, count))
+
+    # An odd-length text keeps its last character in place
+    if length % 2:
+        real = _real_index(length - 1, interval)
+        middle = None if real is None else slice(real, real + 1)
+        layout.append((slice(length - 1, length), middle, 1))
+
+    return tuple(layout)
+
+
+def _fused_encrypt_into(source, final, compiled, as_bytes):
+    """
+    Encrypt 'source' straight into the preallocated 'final' buffer.
+
+    With as_bytes the source is bytes-like and 'final' a bytearray or
+    memoryview; otherwise the source is a str and 'final' a list of
+    characters. 'final' must be exactly ciphertext_length() long.
+    """
+    noise = compiled.noise_char
+    length = len(source)
+    profile = _profile
+    started = profile and perf_counter()
+    middle = bytearray(length) if as_bytes else [""] * length
+
+    # Phase 2, then Phase 1 + Phase 3 together
+    _reverse_blocks(source, middle, compiled.block_size)
+    if profile:
+        started = profile.lap("phase2_encrypt", started, length, length)
+    _substitute(middle, compiled.encrypt_shifts, as_bytes)
+    if profile:
+        started = profile.lap("phase1+phase3_encrypt", started, length, length)
+
+    # Phase 4 + Phase 5 together
+    filler = noise.encode("latin-1") if as_bytes else [noise]
+    layout = _noise_swap_layout(len(final), compiled.noise_interval)
+    for final_slice, middle_slice, count in layout:
+        if middle_slice is None:
+            final[final_slice] = filler * count
+        else:
+            final[final_slice] = middle[middle_slice]
+    if profile:
+        profile.lap("phase4+phase5_encrypt", started, length, len(final))
+
+
+def _fused_decrypt_into(source, plain, compiled, as_bytes, verify=False):
+    """
+    Decrypt 'source' straight into the preallocated 'plain' buffer.
+
+    Runs the encryption steps backwards: un-swap and drop the noise,
+    undo the shifts, then reverse the blocks again. With verify, every
+    noise slot is compared with the noise character on the way.
+
+    Raises:
+        ValueError: If verify is on and the noise has been changed
+    """
+    length = len(plain)
+    profile = _profile
+    started = profile and perf_counter()
+    middle = bytearray(length) if as_bytes else [""] * length
+    noise = compiled.noise_char
+    if as_bytes and verify:
+        # Only needed for the check (decrypt_bytes() makes sure it fits)
+        noise = noise.encode("latin-1")
+
+    # Phase 5 + Phase 4 together
+    layout = _noise_swap_layout(len(source), compiled.noise_interval)
+    for final_slice, middle_slice, count in layout:
+        if middle_slice is not None:
+            middle[middle_slice] = source[final_slice]
+        elif verify and source[final_slice] != noise * count:
+            positions = range(len(source))
+            slots = sorted(
+                position
+                for final_slice, middle_slice, _ in layout
+                if middle_slice is None
+                for position in positions[final_slice]
+            )
+            raise _noise_error(source, slots, noise)
+    if profile:
+        started = profile.lap("phase4+phase5_decrypt", started, len(source), length)
+
+    # Phase 3 + Phase 1 together, then Phase 2 (self-inverse)
+    _substitute(middle, compiled.decrypt_shifts, as_bytes)
+    if profile:
+        started = profile.lap("phase1+phase3_decrypt", started, length, length)
+    _reverse_blocks(middle, plain, compiled.block_size)
+    if profile:
+        profile.lap("phase2_decrypt", started, length, length)
+
+
+def _fused_encrypt(text, compiled):
+    """
+    Encrypt with the fused pipeline (same output as the five phases).
+
+    Plain ASCII is handled as bytes, anything else as a list of
+    characters - both are filled in place.
+    """
+    length = ciphertext_length(len(text), compiled)
+    if text.isascii() and compiled.noise_char.isascii():
+        final = bytearray(length)
+        _fused_encrypt_into(text.encode("ascii"), final, compiled, True)
+        return final.decode("ascii")
+
+    final = [""] * length
+    _fused_encrypt_into(text, final, compiled, False)
+    return "".join(final)
+
+
+def _fused_decrypt(text, compiled, verify=False):
+    """Decrypt with the fused pipeline (same output as the five phases)."""
+    length = plaintext_length(len(text), compiled)
+    # Checking for non-ASCII noise needs the text as characters
+    if text.isascii() and (compiled.noise_char.isascii() or not verify):
+        plain = bytearray(length)
+        _fused_decrypt_into(text.encode("ascii"), plain, compiled, True, verify)
+        return plain.decode("ascii")
+
+    plain = [""] * length
+    _fused_decrypt_into(text, plain, compiled, False, verify)
+    return "".join(plain)
+
+
+# Engines that encrypt()/decrypt() can run on
+BACKENDS = ("python", "numpy")
+
+
+def _numpy_backend(backend):
+    """
+    Find the NumPy backend if the caller asked for it.
+
+    Args:
+        backend: One of BACKENDS
+
+    Returns:
+        The numpy_backend module, or None to use the pure-Python
+        pipeline (including when NumPy is not installed)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+    if backend != "numpy":
+        return None
+
+    try:
+        import numpy_backend
+    except ImportError:
+        return None
+    return numpy_backend
+
+
 ###############################################
 # MASTER ENCRYPT/DECRYPT FUNCTIONS
 ###############################################
 
 
-def encrypt(text, key):
+def encrypt(text, key, phase_by_phase=False, backend="python"):
     """
     CipherForge Master Encryption — Applies all 5 phases.
 
+    By default the fused pipeline does the work in a few bulk steps
+    (or NumPy array operations with backend="numpy").
+    Keys it cannot handle use the phase functions one after another,
+    which always gives the same output.
+
     Args:
         text: The plaintext to encrypt
-        key: Dictionary with settings for all phases
+        key: Dictionary with settings for all phases (or a CompiledKey)
+        phase_by_phase: Run phase1_encrypt ... phase5_encrypt one at a
+            time instead of the fused pipeline (default: False)
+        backend: "python" (default) or "numpy" to work on whole arrays;
+            falls back to "python" if NumPy is not installed
 
     Returns:
         Fully encrypted string
     """
+    profile = _profile
+    started = profile and perf_counter()
+    arrays = _numpy_backend(backend)
+    compiled = None if phase_by_phase else _compiled_or_none(key)
+    if compiled is not None:
+        if arrays is not None:
+            result = arrays.encrypt(text, compiled)
+        else:
+            result = _fused_encrypt(text, compiled)
+        if profile:
+            profile.lap("encrypt", started, len(text), len(result))
+        return result
+
+    mark = started
+
     # Phase 1: Substitution — change WHAT characters are
     result = phase1_encrypt(text, key)
+    if profile:
+        mark = profile.lap("phase1_encrypt", mark, len(text), len(result))
 
     # Phase 2: Transposition — change WHERE characters are
     result = phase2_encrypt(result, key)
+    if profile:
+        mark = profile.lap("phase2_encrypt", mark, len(result), len(result))
 
     # Phase 3: Password-Dependent — destroy frequency patterns
     result = phase3_encrypt(result, key)
+    if profile:
+        mark = profile.lap("phase3_encrypt", mark, len(result), len(result))
 
     # Phase 4: Noise Injection — add decoy characters
     result = phase4_encrypt(result, key)
+    if profile:
+        mark = profile.lap("phase4_encrypt", mark, len(text), len(result))
 
     # Phase 5: Wild Card — swap adjacent pairs
     result = phase5_encrypt(result, key)
+    if profile:
+        profile.lap("phase5_encrypt", mark, len(result), len(result))
 
+    if profile:
+        profile.lap("encrypt", started, len(text), len(result))
     return result
 
 
-def decrypt(text, key):
+def decrypt(text, key, phase_by_phase=False, backend="python", verify=False):
     """
     CipherForge Master Decryption — Reverses all 5 phases.
 
@@ -374,26 +1121,882 @@ def decrypt(text, key):
 
     Args:
         text: The encrypted text
-        key: Same key used for encryption
+        key: Same key used for encryption (dictionary or CompiledKey)
+        phase_by_phase: Run phase5_decrypt ... phase1_decrypt one at a
+            time instead of the fused pipeline (default: False)
+        backend: "python" (default) or "numpy" to work on whole arrays;
+            falls back to "python" if NumPy is not installed
+        verify: Check the noise characters are all where Phase 4 put
+            them, to catch corrupt or tampered ciphertext (default: False)
 
     Returns:
         Original plaintext
+
+    Raises:
+        ValueError: If verify is on and the noise has been changed
     """
+    profile = _profile
+    started = profile and perf_counter()
+    arrays = _numpy_backend(backend)
+    compiled = None if phase_by_phase else _compiled_or_none(key)
+    if compiled is not None:
+        if arrays is not None:
+            result = arrays.decrypt(text, compiled, verify)
+        else:
+            result = _fused_decrypt(text, compiled, verify)
+        if profile:
+            profile.lap("decrypt", started, len(text), len(result))
+        return result
+
     result = text
+    mark = started
 
     # Phase 5: Reverse Wild Card (pair swap is self-inverse)
     result = phase5_decrypt(result, key)
+    if profile:
+        mark = profile.lap("phase5_decrypt", mark, len(text), len(result))
 
     # Phase 4: Remove noise characters
-    result = phase4_decrypt(result, key)
+    result = phase4_decrypt(result, key, verify)
+    if profile:
+        mark = profile.lap("phase4_decrypt", mark, len(text), len(result))
 
     # Phase 3: Reverse Password-Dependent
     result = phase3_decrypt(result, key)
+    if profile:
+        mark = profile.lap("phase3_decrypt", mark, len(result), len(result))
 
     # Phase 2: Reverse Transposition
     result = phase2_decrypt(result, key)
+    if profile:
+        mark = profile.lap("phase2_decrypt", mark, len(result), len(result))
 
     # Phase 1: Reverse Substitution (last!)
     result = phase1_decrypt(result, key)
+    if profile:
+        profile.lap("phase1_decrypt", mark, len(result), len(result))
 
+    if profile:
+        profile.lap("decrypt", started, len(text), len(result))
     return result
+
+
+###############################################
+# BYTES AND BUFFERS
+###############################################
+#
+# The same algorithm for bytes-like data (bytes, bytearray, memoryview).
+# Every byte is treated as one character: bytes 32-126 are encrypted and
+# all other bytes pass through unchanged, exactly like the text version.
+# encrypt_into() writes straight into a buffer the caller already owns.
+
+
+def ciphertext_length(length, key):
+    """
+    Work out how long the ciphertext of a message will be.
+
+    Only Phase 4 changes the length: it adds one noise character after
+    every noise_interval real characters.
+
+    Args:
+        length: Length of the plaintext (characters or bytes)
+        key: Dictionary with settings for all phases (or a CompiledKey)
+
+    Returns:
+        Length of the ciphertext
+    """
+    return length + length // compile_key(key).noise_interval
+
+
+def plaintext_length(length, key):
+    """
+    Work out how long the plaintext of a ciphertext will be.
+
+    Args:
+        length: Length of the ciphertext (characters or bytes)
+        key: Same key used for encryption (dictionary or CompiledKey)
+
+    Returns:
+        Length of the plaintext
+    """
+    return length - length // (compile_key(key).noise_interval + 1)
+
+
+def cipher_period(key):
+    """
+    Work out how often the whole 5-phase pattern repeats.
+
+    Blocks (Phase 2), the password (Phase 3) and the noise (Phase 4) all
+    repeat, and the pairs of Phase 5 must stay lined up. If a message is
+    cut into pieces whose lengths are multiples of the period, each piece
+    can be encrypted on its own and the results simply joined:
+
+        encrypt(a + b, key) == encrypt(a, key) + encrypt(b, key)
+
+    whenever len(a) is a multiple of cipher_period(key). The same goes
+    for decrypting ciphertext cut at multiples of
+    ciphertext_length(cipher_period(key), key).
+
+    Args:
+        key: Dictionary with settings for all phases (or a CompiledKey)
+
+    Returns:
+        The period, in plaintext characters
+    """
+    compiled = compile_key(key)
+    period = math.lcm(
+        compiled.block_size, len(compiled.password), compiled.noise_interval
+    )
+    # Each piece of ciphertext must hold whole pairs
+    if ciphertext_length(period, compiled) % 2:
+        period *= 2
+    return period
+
+
+def _byte_key(key):
+    """Compile 'key' and check its noise character fits in one byte."""
+    compiled = compile_key(key)
+    if ord(compiled.noise_char) > 255:
+        raise ValueError("noise_char must fit in one byte to work on bytes")
+    return compiled
+
+
+def encrypt_bytes(data, key):
+    """
+    Encrypt bytes-like data.
+
+    Gives the same result as encrypting the text with one character per
+    byte, but without decoding or encoding anything.
+
+    Args:
+        data: bytes, bytearray or memoryview to encrypt
+        key: Dictionary with settings for all phases (or a CompiledKey)
+
+    Returns:
+        Encrypted bytes
+    """
+    compiled = _byte_key(key)
+    source = memoryview(data).cast("B")
+    result = bytearray(ciphertext_length(len(source), compiled))
+    _fused_encrypt_into(source, result, compiled, True)
+    return bytes(result)
+
+
+def decrypt_bytes(data, key, verify=False):
+    """
+    Decrypt bytes-like data made by encrypt_bytes() or encrypt_into().
+
+    Args:
+        data: bytes, bytearray or memoryview to decrypt
+        key: Same key used for encryption (dictionary or CompiledKey)
+        verify: Check the noise is intact, like decrypt() (default: False)
+
+    Returns:
+        Decrypted bytes
+
+    Raises:
+        ValueError: If verify is on and the noise has been changed, or
+            the noise character doesn't fit in one byte
+    """
+    compiled = _byte_key(key)
+    source = memoryview(data).cast("B")
+    result = bytearray(plaintext_length(len(source), compiled))
+    _fused_decrypt_into(source, result, compiled, True, verify)
+    return bytes(result)
+
+
+def encrypt_into(data, buffer, key):
+    """
+    Encrypt bytes-like data straight into a buffer you provide.
+
+    Use ciphertext_length(len(data), key) to size the buffer up front.
+    Only the start of the buffer is written; anything after it is left
+    alone. The buffer may even be the same memory as 'data'.
+
+    Args:
+        data: bytes, bytearray or memoryview to encrypt
+        buffer: Writable bytearray or memoryview (at least ciphertext size)
+        key: Dictionary with settings for all phases (or a CompiledKey)
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        ValueError: If the buffer is too small
+    """
+    compiled = _byte_key(key)
+    source = memoryview(data).cast("B")
+    target = memoryview(buffer).cast("B")
+    needed = ciphertext_length(len(source), compiled)
+    if len(target) < needed:
+        raise ValueError(f"buffer too small: need {needed} bytes, got {len(target)}")
+
+    _fused_encrypt_into(source, target[:needed], compiled, True)
+    return needed
+
+
+def decrypt_into(data, buffer, key):
+    """
+    Decrypt bytes-like data straight into a buffer you provide.
+
+    Use plaintext_length(len(data), key) to size the buffer up front.
+
+    Args:
+        data: bytes, bytearray or memoryview to decrypt
+        buffer: Writable bytearray or memoryview (at least plaintext size)
+        key: Same key used for encryption (dictionary or CompiledKey)
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        ValueError: If the buffer is too small, or the noise character
+            doesn't fit in one byte
+    """
+    compiled = _byte_key(key)
+    source = memoryview(data).cast("B")
+    target = memoryview(buffer).cast("B")
+    needed = plaintext_length(len(source), compiled)
+    if len(target) < needed:
+        raise ValueError(f"buffer too small: need {needed} bytes, got {len(target)}")
+
+    _fused_decrypt_into(source, target[:needed], compiled, True)
+    return needed
+
+
+###############################################
+# STREAMING
+###############################################
+#
+# Encryptor and Decryptor handle a message that arrives in pieces (log
+# streams, files too big for memory). Each piece is processed in bulk as
+# soon as possible; only the little bit of state that crosses a chunk
+# boundary is kept:
+#
+#   Phase 2: the start of an unfinished block
+#   Phase 3: how far through the password we are
+#   Phase 4: how many real characters since the last noise
+#   Phase 5: a character still waiting for its partner
+#
+# Joining every update() result and the finalize() result gives exactly
+# what encrypt()/decrypt() return for the whole message.
+
+
+def _blank(length, as_bytes):
+    """Preallocated buffer: bytearray for ASCII, list of characters otherwise."""
+    return bytearray(length) if as_bytes else [""] * length
+
+
+def _buffer_of(text, as_bytes):
+    """Mutable copy of 'text' in the chosen buffer type."""
+    return bytearray(text, "ascii") if as_bytes else list(text)
+
+
+def _text_of(buffer, as_bytes):
+    """Turn a buffer back into a string."""
+    return buffer.decode("ascii") if as_bytes else "".join(buffer)
+
+
+def _add_noise(middle, start, interval, filler, target, at):
+    """
+    Phase 4 for part of a message: insert noise after every Nth character.
+
+    The result is written into the preallocated 'target', starting at
+    index 'at'. 'start' is how many real characters came before this
+    part, so the first noise may come sooner than 'interval' characters in.
+    """
+    # Count positions as if the part started on a noise boundary
+    padding = start % interval
+    for offset in range(interval):
+        first = (offset - padding) % interval
+        count = len(range(first, len(middle), interval))
+        place = at + first + (padding + first) // interval
+        stop = place + (count - 1) * (interval + 1) + 1
+        target[place : stop : interval + 1] = middle[first::interval]
+
+    groups = (padding + len(middle)) // interval
+    place = at + interval - padding
+    stop = place + (groups - 1) * (interval + 1) + 1
+    target[place : stop : interval + 1] = filler * groups
+
+
+def _drop_noise(swapped, start, interval):
+    """
+    Phase 4 for part of a message: remove every (interval + 1)th character.
+
+    'start' is how many characters (noise included) came before this
+    part. The noise is deleted from 'swapped' in place.
+    """
+    first_noise = (interval - start) % (interval + 1)
+    del swapped[first_noise :: interval + 1]
+    return swapped
+
+
+def _swap_pairs(buffer):
+    """Phase 5: swap adjacent pairs of an even-length buffer in place."""
+    buffer[0::2], buffer[1::2] = buffer[1::2], buffer[0::2]
+
+
+class _PendingBlock:
+    """
+    The start of an unfinished Phase 2 block, for Encryptor/Decryptor.
+
+    Pieces are only joined once they make a whole block, so a large
+    block_size fed in small chunks is copied once rather than each time.
+    """
+
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self._pieces = []
+        self._length = 0
+
+    def take(self, piece):
+        """Add 'piece' and return the whole blocks so far (may be empty)."""
+        self._pieces.append(piece)
+        self._length += len(piece)
+        if self._length < self.block_size:
+            return ""
+        text = "".join(self._pieces)
+        full = len(text) - len(text) % self.block_size
+        self._pieces = [text[full:]]
+        self._length = len(text) - full
+        return text[:full]
+
+    def rest(self):
+        """Return everything still held (the short last block) and empty it."""
+        text = "".join(self._pieces)
+        self._pieces = []
+        self._length = 0
+        return text
+
+
+class Encryptor:
+    """
+    Encrypt a message that arrives in pieces.
+
+    Example:
+        encryptor = Encryptor(key)
+        for chunk in chunks:
+            output.write(encryptor.update(chunk))
+        output.write(encryptor.finalize())
+
+    The pieces written out join up to exactly encrypt("".join(chunks), key).
+    """
+
+    def __init__(self, key):
+        """
+        Args:
+            key: Dictionary with settings for all phases (or a CompiledKey)
+        """
+        self.key = compile_key(key)
+        self._block = _PendingBlock(self.key.block_size)  # Phase 2
+        self._position = 0  # Phase 3 + 4: characters encrypted so far
+        self._odd = ""  # Phase 5: character waiting for its partner
+        self._finished = False
+
+    def update(self, chunk):
+        """
+        Encrypt the next piece of the message.
+
+        Args:
+            chunk: The next piece of plaintext (any length)
+
+        Returns:
+            As much ciphertext as can be produced so far (may be empty)
+        """
+        if self._finished:
+            raise ValueError("Encryptor has already been finalised")
+
+        return self._encrypt(self._block.take(chunk))
+
+    def finalize(self):
+        """
+        Finish the message.
+
+        Returns:
+            The rest of the ciphertext (the short last block and any
+            character still waiting for a partner)
+        """
+        if self._finished:
+            raise ValueError("Encryptor has already been finalised")
+
+        # The last block may be short - it is reversed as a whole
+        result = self._encrypt(self._block.rest()) + self._odd
+        self._odd = ""
+        self._finished = True
+        return result
+
+    def _encrypt(self, segment):
+        """Encrypt whole blocks that carry on from the previous ones."""
+        compiled = self.key
+        noise = compiled.noise_char
+        as_bytes = segment.isascii() and noise.isascii() and self._odd.isascii()
+
+        # Phase 2, then Phase 1 + Phase 3 (continuing through the password)
+        source = segment.encode("ascii") if as_bytes else segment
+        middle = _blank(len(segment), as_bytes)
+        _reverse_blocks(source, middle, compiled.block_size)
+        _substitute(middle, compiled.encrypt_shifts, as_bytes, self._position)
+
+        # Phase 4 (continuing the noise count), written straight after
+        # any character still waiting from last time
+        start = self._position
+        end = start + len(segment)
+        length = ciphertext_length(end, compiled) - ciphertext_length(start, compiled)
+        waiting = len(self._odd)
+        pairs = _blank(waiting + length, as_bytes)
+        pairs[:waiting] = _buffer_of(self._odd, as_bytes)
+        filler = noise.encode("ascii") if as_bytes else [noise]
+        _add_noise(middle, start, compiled.noise_interval, filler, pairs, waiting)
+        self._position = end
+
+        # Phase 5: hold back an unpaired character for next time
+        even = len(pairs) - len(pairs) % 2
+        self._odd = _text_of(pairs[even:], as_bytes)
+        del pairs[even:]
+        _swap_pairs(pairs)
+        return _text_of(pairs, as_bytes)
+
+
+class Decryptor:
+    """
+    Decrypt a message that arrives in pieces.
+
+    Works just like Encryptor: join every update() result and the
+    finalize() result to get exactly decrypt("".join(chunks), key).
+    """
+
+    def __init__(self, key, verify=False):
+        """
+        Args:
+            key: Same key used for encryption (dictionary or CompiledKey)
+            verify: Check the noise is intact, like decrypt(); update()
+                and finalize() then raise ValueError for corrupt or
+                tampered ciphertext (default: False)
+        """
+        self.key = compile_key(key)
+        self.verify = verify
+        self._odd = ""  # Phase 5: character waiting for its partner
+        self._seen = 0  # Phase 4: ciphertext characters so far (noise too)
+        self._position = 0  # Phase 3: real characters so far
+        self._block = _PendingBlock(self.key.block_size)  # Phase 2
+        self._finished = False
+
+    def update(self, chunk):
+        """
+        Decrypt the next piece of the ciphertext.
+
+        Args:
+            chunk: The next piece of ciphertext (any length)
+
+        Returns:
+            As much plaintext as can be produced so far (may be empty)
+        """
+        if self._finished:
+            raise ValueError("Decryptor has already been finalised")
+
+        text = self._odd + chunk
+        even = len(text) - len(text) % 2
+        self._odd = text[even:]
+        return self._decrypt(text[:even], swap=True)
+
+    def finalize(self):
+        """
+        Finish the message.
+
+        Returns:
+            The rest of the plaintext
+        """
+        if self._finished:
+            raise ValueError("Decryptor has already been finalised")
+
+        # A final unpaired character was never swapped
+        result = self._decrypt(self._odd, swap=False, last=True)
+        self._odd = ""
+        self._finished = True
+        return result
+
+    def _decrypt(self, segment, swap, last=False):
+        """Decrypt characters that carry on from the previous ones."""
+        compiled = self.key
+        noise = compiled.noise_char
+        # Checking for non-ASCII noise needs the text as characters
+        as_bytes = segment.isascii() and (noise.isascii() or not self.verify)
+
+        # Phase 5, then Phase 4 (continuing the noise count)
+        buffer = _buffer_of(segment, as_bytes)
+        if swap:
+            _swap_pairs(buffer)
+        if self.verify:
+            self._check_noise(segment, buffer, swap, as_bytes)
+        real = _drop_noise(buffer, self._seen, compiled.noise_interval)
+        self._seen += len(segment)
+
+        # Phase 3 + Phase 1 (continuing through the password)
+        _substitute(real, compiled.decrypt_shifts, as_bytes, self._position)
+        self._position += len(real)
+
+        # Phase 2: only whole blocks, unless this is the end
+        text = self._block.take(_text_of(real, as_bytes))
+        if last:
+            text += self._block.rest()
+        as_bytes = text.isascii()
+        source = text.encode("ascii") if as_bytes else text
+        plain = _blank(len(text), as_bytes)
+        _reverse_blocks(source, plain, compiled.block_size)
+        return _text_of(plain, as_bytes)
+
+    def _check_noise(self, segment, buffer, swap, as_bytes):
+        """Raise ValueError unless every noise slot in 'buffer' holds noise."""
+        interval = self.key.noise_interval
+        noise = self.key.noise_char
+        first_noise = (interval - self._seen) % (interval + 1)
+        removed = buffer[first_noise :: interval + 1]
+        # A bytearray holds the character codes
+        if removed.count(ord(noise) if as_bytes else noise) == len(removed):
+            return
+
+        # Point at the bad character in the ciphertext, before the swap
+        slots = range(first_noise, len(buffer), interval + 1)
+        if swap:
+            slots = sorted(slot ^ 1 for slot in slots)
+        raise _noise_error(segment, slots, noise, self._seen)
+
+
+###############################################
+# PARALLEL ENCRYPTION
+###############################################
+#
+# cipher_period() tells us where a message can be cut so that every
+# piece encrypts on its own. A big message is cut into one piece per
+# worker at those points, the pieces are encrypted in separate processes
+# (one per CPU core) and the results are simply joined back together.
+
+# Below this many characters per piece, starting processes costs more
+# than it saves
+PARALLEL_MIN_SHARD = 1024 * 1024
+
+
+def _shards(text, unit, workers):
+    """Cut 'text' into about 'workers' pieces at multiples of 'unit'."""
+    size = max(PARALLEL_MIN_SHARD, -(-len(text) // workers))
+    size += -size % unit  # Round up to a whole number of units
+    return [text[start : start + size] for start in range(0, len(text), size)]
+
+
+def _run_shards(function, shards, compiled, workers, executor):
+    """Run 'function' on every piece (in parallel if worthwhile) and join."""
+    if len(shards) < 2:
+        return function("".join(shards), compiled)
+
+    if executor is not None:
+        return "".join(executor.map(function, shards, repeat(compiled)))
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+        return "".join(pool.map(function, shards, repeat(compiled)))
+
+
+def encrypt_parallel(text, key, workers=None, executor=None):
+    """
+    Encrypt a large message using several CPU cores.
+
+    Gives exactly the same result as encrypt(text, key). Messages too
+    small to be worth splitting, or no longer than cipher_period(key)
+    (which can be huge for a long password or block), are simply
+    encrypted here.
+
+    Args:
+        text: The plaintext to encrypt
+        key: Dictionary with settings for all phases (or a CompiledKey)
+        workers: How many processes to use (default: one per CPU core)
+        executor: Optional concurrent.futures executor to reuse instead
+            of starting a new process pool
+
+    Returns:
+        Fully encrypted string
+    """
+    compiled = compile_key(key)
+    period = cipher_period(compiled)
+    if period >= len(text):
+        # The pattern never repeats inside the message: nothing to split
+        return encrypt(text, compiled)
+    workers = workers or os.cpu_count() or 1
+    shards = _shards(text, period, workers)
+    return _run_shards(encrypt, shards, compiled, workers, executor)
+
+
+def decrypt_parallel(text, key, workers=None, executor=None):
+    """
+    Decrypt a large message using several CPU cores.
+
+    Gives exactly the same result as decrypt(text, key).
+
+    Args:
+        text: The encrypted text
+        key: Same key used for encryption (dictionary or CompiledKey)
+        workers: How many processes to use (default: one per CPU core)
+        executor: Optional concurrent.futures executor to reuse instead
+            of starting a new process pool
+
+    Returns:
+        Original plaintext
+    """
+    compiled = compile_key(key)
+    unit = ciphertext_length(cipher_period(compiled), compiled)
+    if unit >= len(text):
+        return decrypt(text, compiled)
+    workers = workers or os.cpu_count() or 1
+    shards = _shards(text, unit, workers)
+    return _run_shards(decrypt, shards, compiled, workers, executor)
+
+
+###############################################
+# BATCHES OF MESSAGES
+###############################################
+#
+# Lots of short messages spend most of their time in per-call overhead.
+# Messages with the same key and the same length all move their
+# characters the same way, so a whole group can be handled at once:
+# the messages are laid end to end and each output position is filled
+# for every message with a single strided copy.
+
+# Groups smaller than this are cheaper to encrypt one by one
+BATCH_MIN_GROUP = 4
+
+# Longer messages are already handled in bulk by encrypt() itself
+BATCH_MAX_LENGTH = 4096
+
+# How many messages to hand to each worker when an executor is used
+BATCH_CHUNK = 10_000
+
+
+def _block_partner(position, length, block_size):
+    """Where Phase 2 moves 'position' (and back again - it is self-inverse)."""
+    start = position - position % block_size
+    end = min(start + block_size, length)
+    return start + end - 1 - position
+
+
+@lru_cache(maxsize=256)
+def _position_plan(length, compiled, direction):
+    """
+    Work out where every output character of a message comes from.
+
+    The plan is kept as two flat vectors rather than a tuple per
+    position, so a full cache of long plans stays a few megabytes.
+
+    Args:
+        length: Length of the input message
+        compiled: CompiledKey to use
+        direction: "encrypt" or "decrypt"
+
+    Returns:
+        Tuple of (sources, shifts): sources is an array with the input
+        position each output position comes from (-1 for a noise
+        character), shifts is bytes with the shift to apply there
+    """
+    interval = compiled.noise_interval
+    key_shifts = (
+        compiled.encrypt_shifts if direction == "encrypt" else compiled.decrypt_shifts
+    )
+
+    if direction == "encrypt":
+        middle_length = length
+        total = ciphertext_length(length, compiled)
+    else:
+        middle_length = plaintext_length(length, compiled)
+        total = length
+    even = total - total % 2
+
+    size = total if direction == "encrypt" else middle_length
+    sources = array("l", [-1]) * size
+    shifts = bytearray(size)
+    for middle in range(middle_length):
+        # Phase 4 spreads the characters out, Phase 5 swaps the pairs
+        spread = middle + middle // interval
+        final = spread ^ 1 if spread < even else spread
+        partner = _block_partner(middle, middle_length, compiled.block_size)
+        if direction == "encrypt":
+            position, source = final, partner
+        else:
+            position, source = partner, final
+        sources[position] = source
+        shifts[position] = key_shifts[middle % len(key_shifts)]
+
+    return sources, bytes(shifts)
+
+
+def _apply_plan(group, length, plan, noise):
+    """
+    Encrypt/decrypt a group of same-length ASCII messages at once.
+
+    Args:
+        group: List of messages as bytes, all 'length' long
+        length: Length of each message
+        plan: Result of _position_plan() for that length
+        noise: The noise character as bytes
+
+    Returns:
+        List of results, in the same order as 'group'
+    """
+    count = len(group)
+    sources, shifts = plan
+    step = len(sources)
+    if step == 0:
+        return [""] * count
+
+    source = b"".join(group)
+    result = bytearray(step * count)
+    for position, index in enumerate(sources):
+        if index < 0:
+            result[position::step] = noise * count
+        else:
+            table = _shift_table(shifts[position], True)
+            result[position::step] = source[index::length].translate(table)
+
+    text = result.decode("ascii")
+    return [text[start : start + step] for start in range(0, len(text), step)]
+
+
+def _batch(messages, compiled, direction):
+    """Encrypt/decrypt a list of messages with one compiled key."""
+    single = encrypt if direction == "encrypt" else decrypt
+    ascii_noise = compiled.noise_char.isascii() or direction == "decrypt"
+    results = [None] * len(messages)
+
+    # Group the plain ASCII messages by length
+    groups = {}
+    for index, message in enumerate(messages):
+        if ascii_noise and len(message) <= BATCH_MAX_LENGTH and message.isascii():
+            groups.setdefault(len(message), []).append(index)
+        else:
+            results[index] = single(message, compiled)
+
+    # Decrypt plans never have noise slots, so any noise character will do
+    noise = b""
+    if direction == "encrypt" and ascii_noise:
+        noise = compiled.noise_char.encode("ascii")
+    for length, indexes in groups.items():
+        if len(indexes) < BATCH_MIN_GROUP:
+            for index in indexes:
+                results[index] = single(messages[index], compiled)
+            continue
+
+        plan = _position_plan(length, compiled, direction)
+        group = [messages[index].encode("ascii") for index in indexes]
+        for index, output in zip(indexes, _apply_plan(group, length, plan, noise)):
+            results[index] = output
+
+    return results
+
+
+def _run_batches(jobs, direction, executor):
+    """
+    Run (messages, compiled key) jobs, optionally on an executor.
+
+    Returns:
+        One list of results per job, in the same order
+    """
+    if executor is None:
+        return [_batch(messages, compiled, direction) for messages, compiled in jobs]
+
+    # Cut big jobs up so every worker gets a share
+    pieces = []
+    for number, (messages, compiled) in enumerate(jobs):
+        for start in range(0, len(messages), BATCH_CHUNK):
+            pieces.append((number, messages[start : start + BATCH_CHUNK], compiled))
+
+    results = [[] for _ in jobs]
+    outputs = executor.map(
+        _batch,
+        [messages for _, messages, _ in pieces],
+        [compiled for _, _, compiled in pieces],
+        repeat(direction),
+    )
+    for (number, _, _), output in zip(pieces, outputs):
+        results[number].extend(output)
+    return results
+
+
+def encrypt_many(messages, key, executor=None):
+    """
+    Encrypt lots of messages with the same key.
+
+    Much faster than calling encrypt() in a loop when there are many
+    short messages. Results are identical to encrypt().
+
+    Args:
+        messages: Iterable of plaintext strings
+        key: Dictionary with settings for all phases (or a CompiledKey)
+        executor: Optional concurrent.futures executor (thread or process
+            pool) to spread the work over
+
+    Returns:
+        List of encrypted strings, in the same order as 'messages'
+    """
+    jobs = [(list(messages), compile_key(key))]
+    return _run_batches(jobs, "encrypt", executor)[0]
+
+
+def decrypt_many(messages, key, executor=None):
+    """
+    Decrypt lots of messages with the same key.
+
+    Args:
+        messages: Iterable of encrypted strings
+        key: Same key used for encryption (dictionary or CompiledKey)
+        executor: Optional concurrent.futures executor to spread the work over
+
+    Returns:
+        List of decrypted strings, in the same order as 'messages'
+    """
+    jobs = [(list(messages), compile_key(key))]
+    return _run_batches(jobs, "decrypt", executor)[0]
+
+
+def _keyed(pairs, direction, executor):
+    """Group (message, key) pairs by key, run them, restore the order."""
+    by_key = {}
+    for index, (message, key) in enumerate(pairs):
+        indexes, messages = by_key.setdefault(compile_key(key), ([], []))
+        indexes.append(index)
+        messages.append(message)
+
+    jobs = [(messages, compiled) for compiled, (_, messages) in by_key.items()]
+    results = [None] * sum(len(messages) for messages, _ in jobs)
+    outputs = _run_batches(jobs, direction, executor)
+    for (indexes, _), output in zip(by_key.values(), outputs):
+        for index, text in zip(indexes, output):
+            results[index] = text
+    return results
+
+
+def encrypt_many_keyed(pairs, executor=None):
+    """
+    Encrypt lots of messages, each with its own key.
+
+    Messages that share a key are grouped together so each key is only
+    compiled once and its tables are reused.
+
+    Args:
+        pairs: Iterable of (plaintext, key) tuples
+        executor: Optional concurrent.futures executor to spread the work over
+
+    Returns:
+        List of encrypted strings, in the same order as 'pairs'
+    """
+    return _keyed(pairs, "encrypt", executor)
+
+
+def decrypt_many_keyed(pairs, executor=None):
+    """
+    Decrypt lots of messages, each with its own key.
+
+    Args:
+        pairs: Iterable of (ciphertext, key) tuples
+        executor: Optional concurrent.futures executor to spread the work over
+
+    Returns:
+        List of decrypted strings, in the same order as 'pairs'
+    """
+    return _keyed(pairs, "decrypt", executor)
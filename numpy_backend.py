@@ -0,0 +1,267 @@
+"""NumPy backend for the CipherForge encryption engine.
+
+This module runs the same 5-phase algorithm as engine.py, but works on
+whole arrays of character codes instead of one character at a time.
+It is used through engine.encrypt(..., backend="numpy") and always gives
+exactly the same output as the pure-Python engine.
+
+NumPy is optional. If it is not installed, importing this module raises
+ImportError and engine.py quietly uses its pure-Python pipeline instead.
+
+Includes:
+- Phase 1 + Phase 3 as one shift, looked up in a table for ASCII
+- Phase 2 block reversal with strided copies (or reshape)
+- Phase 4 noise insertion/removal with strided copies (or reshape)
+- Phase 5 pair swap with strided copies
+- The Vigenère cipher from additional_ciphers.py, for long ASCII texts
+
+Each step is a handful of array copies, so this is fastest where the
+pure-Python engine has to handle characters one by one: text that isn't
+plain ASCII is several times faster (see benchmark.py). Plain ASCII runs
+at about the same speed as the default backend.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+# Up to this many columns (password length, block size, noise interval)
+# one strided copy per column is fastest; above it rows are copied with
+# reshape instead
+STRIDE_MAX = 8
+
+
+def _to_codes(text, noise=""):
+    """Turn text into an array of character codes.
+
+    Plain ASCII becomes uint8 (one byte per character); anything else
+    becomes uint32 so every Unicode character keeps its own code.
+
+    Returns:
+        Tuple of (codes, encoding) - the encoding turns codes back into text
+    """
+    if text.isascii() and noise.isascii():
+        return np.frombuffer(text.encode("ascii"), dtype=np.uint8), "ascii"
+    raw = text.encode("utf-32-le", "surrogatepass")
+    return np.frombuffer(raw, dtype=np.uint32), "utf-32-le"
+
+
+def _from_codes(codes, encoding):
+    """Turn an array of character codes back into text."""
+    return codes.tobytes().decode(encoding, "surrogatepass")
+
+
+@lru_cache(maxsize=None)
+def _byte_tables():
+    """Row s maps every byte to itself shifted by s (printable ASCII only)."""
+    codes = np.arange(256)
+    shifts = np.arange(95)[:, np.newaxis]
+    printable = (codes >= 32) & (codes <= 126)
+    shifted = np.where(printable, (codes - 32 + shifts) % 95 + 32, codes)
+    return shifted.astype(np.uint8)
+
+
+def _shift(codes, shifts):
+    """Phase 1 + Phase 3: shift printable codes by a cycling list of shifts.
+
+    Bytes are looked up in _byte_tables(), one strided lookup per
+    password position. Wider codes are worked out: whole password cycles
+    are laid out as rows (one column per password position), so the
+    shifts broadcast down the columns. Codes outside 32-126 pass through
+    unchanged, just like the phases.
+    """
+    if codes.dtype == np.uint8:
+        return _look_up(codes, shifts)
+
+    shifts = np.frombuffer(bytes(shifts), dtype=np.uint8).astype(codes.dtype)
+    step = len(shifts)
+    full = len(codes) - len(codes) % step
+    result = np.empty_like(codes)
+
+    parts = (
+        (codes[:full].reshape(-1, step), result[:full].reshape(-1, step), shifts),
+        (codes[full:], result[full:], shifts[: len(codes) - full]),
+    )
+    for source, target, row in parts:
+        printable = (source >= 32) & (source <= 126)
+        # Unsigned maths wraps below 32, but those codes are not kept
+        target[...] = np.where(printable, (source - 32 + row) % 95 + 32, source)
+
+    return result
+
+
+def _look_up(codes, shifts):
+    """Phase 1 + Phase 3 for bytes, through the shift tables."""
+    tables = _byte_tables()
+    step = len(shifts)
+    result = np.empty_like(codes)
+    if step <= STRIDE_MAX:
+        for offset, shift in enumerate(shifts[: len(codes)]):
+            tables[shift].take(codes[offset::step], out=result[offset::step])
+        return result
+
+    # Row s of the tables starts at 256 * s
+    starts = np.frombuffer(bytes(shifts), dtype=np.uint8).astype(np.uint16) * 256
+    full = len(codes) - len(codes) % step
+    for source, target, row in (
+        (codes[:full].reshape(-1, step), result[:full].reshape(-1, step), starts),
+        (codes[full:], result[full:], starts[: len(codes) - full]),
+    ):
+        tables.ravel().take(source + row, out=target)
+    return result
+
+
+def _reverse_blocks(codes, block_size):
+    """Phase 2: reverse every block (self-inverse)."""
+    full = len(codes) - len(codes) % block_size
+    result = np.empty_like(codes)
+    if block_size <= STRIDE_MAX:
+        for offset in range(block_size):
+            result[offset:full:block_size] = codes[
+                block_size - 1 - offset : full : block_size
+            ]
+    else:
+        result[:full].reshape(-1, block_size)[...] = codes[:full].reshape(
+            -1, block_size
+        )[:, ::-1]
+    # The last block might be shorter
+    result[full:] = codes[full:][::-1]
+    return result
+
+
+def _add_noise(codes, interval, noise_code):
+    """Phase 4: insert the noise code after every 'interval' codes."""
+    groups = len(codes) // interval
+    if interval <= STRIDE_MAX:
+        # Noise everywhere, then each real column copied over it
+        result = np.full(len(codes) + groups, noise_code, dtype=codes.dtype)
+        for offset in range(interval):
+            result[offset :: interval + 1] = codes[offset::interval]
+        return result
+
+    full = groups * interval
+    result = np.empty(len(codes) + groups, dtype=codes.dtype)
+    rows = result[: groups * (interval + 1)].reshape(groups, interval + 1)
+    rows[:, :interval] = codes[:full].reshape(groups, interval)
+    rows[:, interval] = noise_code
+    result[groups * (interval + 1) :] = codes[full:]
+    return result
+
+
+def _remove_noise(codes, interval):
+    """Phase 4: drop every (interval + 1)th code."""
+    period = interval + 1
+    full = len(codes) - len(codes) % period
+    groups = full // period
+    # Same size as engine.plaintext_length()
+    result = np.empty(len(codes) - groups, dtype=codes.dtype)
+    if interval <= STRIDE_MAX:
+        for offset in range(interval):
+            result[offset::interval] = codes[offset :: interval + 1]
+        return result
+
+    rows = result[: groups * interval].reshape(groups, interval)
+    rows[...] = codes[:full].reshape(groups, period)[:, :interval]
+    # A short last group never reaches its noise slot
+    result[groups * interval :] = codes[full:]
+    return result
+
+
+def _check_noise(codes, interval, noise_code):
+    """Phase 4: raise ValueError unless every noise slot holds the noise code."""
+    wrong = np.flatnonzero(codes[interval :: interval + 1] != noise_code)
+    if len(wrong):
+        # Report where it was in the ciphertext, before the pair swap
+        positions = interval + wrong * (interval + 1)
+        even = len(codes) - len(codes) % 2
+        position = np.where(positions < even, positions ^ 1, positions).min()
+        raise ValueError(
+            "ciphertext is corrupt or has been tampered with: "
+            f"expected noise at position {position}"
+        )
+
+
+def _swap_pairs(codes):
+    """Phase 5: swap adjacent pairs (self-inverse)."""
+    even = len(codes) - len(codes) % 2
+    result = np.empty_like(codes)
+    result[0:even:2] = codes[1:even:2]
+    result[1:even:2] = codes[0:even:2]
+    # Odd-length text keeps its last code in place
+    result[even:] = codes[even:]
+    return result
+
+
+def encrypt(text, compiled):
+    """Encrypt with array operations.
+
+    Phase 1 shifts every character the same way wherever it sits, so it
+    is applied after Phase 2 together with Phase 3.
+
+    Args:
+        text: The plaintext to encrypt
+        compiled: CompiledKey from engine.compile_key()
+
+    Returns:
+        Fully encrypted string (identical to engine.encrypt())
+    """
+    codes, encoding = _to_codes(text, compiled.noise_char)
+    codes = _reverse_blocks(codes, compiled.block_size)
+    codes = _shift(codes, compiled.encrypt_shifts)
+    codes = _add_noise(codes, compiled.noise_interval, ord(compiled.noise_char))
+    codes = _swap_pairs(codes)
+    return _from_codes(codes, encoding)
+
+
+def decrypt(text, compiled, verify=False):
+    """Decrypt with array operations.
+
+    Args:
+        text: The encrypted text
+        compiled: CompiledKey from engine.compile_key()
+        verify: Check the noise is intact (see engine.decrypt())
+
+    Returns:
+        Original plaintext (identical to engine.decrypt())
+
+    Raises:
+        ValueError: If verify is on and the noise has been changed
+    """
+    codes, encoding = _to_codes(text, compiled.noise_char if verify else "")
+    codes = _swap_pairs(codes)
+    if verify:
+        _check_noise(codes, compiled.noise_interval, ord(compiled.noise_char))
+    codes = _remove_noise(codes, compiled.noise_interval)
+    codes = _shift(codes, compiled.decrypt_shifts)
+    codes = _reverse_blocks(codes, compiled.block_size)
+    return _from_codes(codes, encoding)
+
+
+def vigenere(text, keyword, direction):
+    """Vigenère cipher over ASCII text with array operations.
+
+    The letters are picked out with a mask; the Nth letter picked out
+    uses keyword letter N % len(keyword), so the keyword shifts are just
+    repeated to the number of letters.
+
+    Args:
+        text: ASCII text to shift
+        keyword: The Vigenère keyword (not empty)
+        direction: 1 to encrypt, -1 to decrypt
+
+    Returns:
+        Shifted text (identical to additional_ciphers.vigenere_encrypt/decrypt)
+    """
+    codes = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    letters = ((codes >= 65) & (codes <= 90)) | ((codes >= 97) & (codes <= 122))
+    picked = codes[letters]
+
+    shifts = [direction * (ord(char.upper()) - ord("A")) % 26 for char in keyword]
+    repeats = -(-len(picked) // len(shifts))
+    shifts = np.tile(np.array(shifts, dtype=np.uint8), repeats)[: len(picked)]
+    # Lower-case ASCII letters are the ones with the 32 bit set
+    base = (picked & 32) + 65
+
+    result = codes.copy()
+    result[letters] = (picked - base + shifts) % 26 + base
+    return _from_codes(result, "ascii")
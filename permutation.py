@@ -0,0 +1,159 @@
+"""Permutations of character positions for CipherForge.
+
+Transposition phases (Phase 2 block reversal, Phase 5 pair swap, the rail
+fence) never change a character - they only move it. For a message of a
+given length each of them is just a fixed reordering of positions, which
+can be written down once as a Permutation:
+
+    Permutation([2, 0, 1]).apply("abc")  ->  "cab"
+
+Entry i says which position of the input ends up at position i of the
+output. Permutations can be chained with compose() and undone with
+invert(), so several transpositions can be combined into one and applied
+in a single pass.
+
+The positions are stored in a compact array rather than a list.
+"""
+
+from array import array
+from operator import itemgetter
+
+# Array type used for positions (signed 64-bit)
+TYPECODE = "q"
+
+
+class Permutation:
+    """
+    A reordering of the positions 0 .. length-1.
+
+    Example:
+        swap = Permutation([1, 0, 3, 2])
+        swap.apply("abcd")                 ->  "badc"
+        swap.compose(swap).is_identity()   ->  True
+    """
+
+    __slots__ = ("order", "_inverse")
+
+    def __init__(self, order, check=True):
+        """
+        Args:
+            order: For each output position, the input position its
+                character comes from
+            check: Make sure 'order' holds every position exactly once
+                (default: True). Only worth skipping for long orders
+                built so that they can't be anything else.
+
+        Raises:
+            ValueError: If 'order' is not a reordering of 0 .. length-1
+        """
+        if isinstance(order, array) and order.typecode == TYPECODE:
+            self.order = order
+        else:
+            self.order = array(TYPECODE, order)
+        if check and not _is_reordering(self.order):
+            raise ValueError(
+                "order must hold every position from 0 to length-1 exactly once"
+            )
+        self._inverse = None
+
+    @classmethod
+    def identity(cls, length):
+        """The permutation that leaves everything where it is."""
+        return cls(range(length), check=False)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def __getitem__(self, position):
+        return self.order[position]
+
+    def __eq__(self, other):
+        if not isinstance(other, Permutation):
+            return NotImplemented
+        return self.order == other.order
+
+    __hash__ = None
+
+    def __repr__(self):
+        if len(self) > 10:
+            shown = ", ".join(map(str, self.order[:10]))
+            return f"Permutation([{shown}, ...] length {len(self)})"
+        return f"Permutation({self.order.tolist()})"
+
+    def is_identity(self):
+        """True if no position moves."""
+        return self.order == array(TYPECODE, range(len(self)))
+
+    def compose(self, other):
+        """
+        Combine two permutations into one.
+
+        Args:
+            other: Permutation of the same length
+
+        Returns:
+            Permutation that does this one first, then 'other'
+        """
+        if len(other) != len(self):
+            raise ValueError(
+                f"cannot compose permutations of length {len(self)} "
+                f"and {len(other)}"
+            )
+        return Permutation(other.apply(self.order), check=False)
+
+    def invert(self):
+        """
+        The permutation that puts everything back (worked out once).
+
+        Returns:
+            Permutation whose compose() with this one is the identity
+        """
+        if self._inverse is None:
+            # Sorting the positions by where they came from lists, for each
+            # input position, the output position that holds it
+            positions = sorted(range(len(self)), key=self.order.__getitem__)
+            inverse = Permutation(positions, check=False)
+            inverse._inverse = self
+            self._inverse = inverse
+        return self._inverse
+
+    def apply(self, sequence):
+        """
+        Reorder a sequence in one pass.
+
+        Args:
+            sequence: str, bytes, bytearray, memoryview, array or list with
+                exactly len(self) items
+
+        Returns:
+            The reordered sequence, of the same type (memoryview gives bytes)
+        """
+        if len(sequence) != len(self):
+            raise ValueError(
+                f"permutation of length {len(self)} cannot reorder "
+                f"{len(sequence)} items"
+            )
+        if len(self) > 1:
+            picked = itemgetter(*self.order)(sequence)
+        else:
+            picked = tuple(sequence[position] for position in self.order)
+
+        if isinstance(sequence, str):
+            return "".join(picked)
+        if isinstance(sequence, (bytes, memoryview)):
+            return bytes(picked)
+        if isinstance(sequence, bytearray):
+            return bytearray(picked)
+        if isinstance(sequence, array):
+            return array(sequence.typecode, picked)
+        return list(picked)
+
+
+def _is_reordering(order):
+    """True if 'order' holds every position from 0 to len(order)-1 once."""
+    if not order:
+        return True
+    return min(order) >= 0 and max(order) < len(order) and len(set(order)) == len(order)
@@ -0,0 +1,475 @@
+"""Pluggable phases and custom pipelines for CipherForge.
+
+engine.encrypt() always runs the same five phases in the same order.
+This module keeps a registry of phases (the five from engine.py plus the
+ciphers in additional_ciphers.py) and lets you build your own sequence:
+
+    from pipeline import Pipeline
+
+    custom = Pipeline(["phase1", "rail_fence", "phase3", "xor"])
+    ciphertext = custom.encrypt("Hello World!", key)
+    plaintext = custom.decrypt(ciphertext, key)
+
+Every phase is registered with a little metadata describing what kind of
+phase it is:
+
+- "substitution": changes WHAT each character is, never WHERE it is.
+  It provides translate tables - one per position, repeating - so
+  neighbouring substitutions can be merged into a single pass.
+- "permutation": changes WHERE each character is, never WHAT it is,
+  and keeps the length. It provides a Permutation (see permutation.py)
+  for each message length, so neighbouring permutations can be merged
+  into a single pass.
+- "general": anything else (inserting noise, skipping non-letters...),
+  which is simply run as it is.
+
+A substitution registered as position_independent (it treats every
+position the same way) can also swap places with a permutation, which
+lets even the default phase order merge Phase 1 with Phase 3.
+"""
+
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+import additional_ciphers
+import engine
+
+# The phase order used by engine.encrypt()
+DEFAULT_PHASES = ("phase1", "phase2", "phase3", "phase4", "phase5")
+
+KINDS = ("substitution", "permutation", "general")
+
+# How many combined permutations to remember, by (length, key)
+PERMUTATION_CACHE_SIZE = 64
+
+# Longer messages build their permutation every time. Each cached one
+# holds 16 bytes per position (with its inverse), so the cache stays
+# under 64 * 16 * 32K = 32 MB
+PERMUTATION_CACHE_MAX_LENGTH = 32 * 1024
+
+# How many sets of merged substitution tables to remember, by key
+SUBSTITUTION_CACHE_SIZE = 64
+
+Phase = namedtuple(
+    "Phase",
+    "name encrypt decrypt kind length_preserving tables permutation"
+    " position_independent",
+)
+Phase.__doc__ = """A registered phase and what kind of phase it is.
+
+name: Name used in Pipeline([...])
+encrypt, decrypt: The phase functions, called as function(text, key)
+kind: "substitution", "permutation" or "general"
+length_preserving: True if the output is always as long as the input
+tables: For substitutions - function(key) returning translate tables
+    (code to code, as made by str.maketrans), one per position, repeating
+    (a single table if position never matters)
+permutation: For permutations - function(length, key) returning a
+    Permutation of that length
+position_independent: For substitutions - True if every position is
+    treated the same way with any key, so the phase may be moved past
+    a permutation
+"""
+
+# Every registered phase, by name
+PHASES = {}
+
+
+def register_phase(
+    name,
+    encrypt,
+    decrypt,
+    kind="general",
+    tables=None,
+    permutation=None,
+    length_preserving=None,
+    position_independent=False,
+):
+    """
+    Add a phase to the registry so pipelines can use it by name.
+
+    Args:
+        name: Name for the phase (replaces any phase already called that)
+        encrypt: Function(text, key) that applies the phase
+        decrypt: Function(text, key) that reverses it
+        kind: "substitution", "permutation" or "general"
+        tables: Required for substitutions (see Phase)
+        permutation: Required for permutations (see Phase)
+        length_preserving: Whether output length always equals input
+            length (substitutions and permutations always do)
+        position_independent: Substitutions only - declare that the
+            phase treats every position the same way with any key
+            (default: False, so the phase is never reordered)
+
+    Returns:
+        The registered Phase
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}, got {kind!r}")
+    if kind == "substitution" and tables is None:
+        raise ValueError("substitution phases must provide tables")
+    if kind == "permutation" and permutation is None:
+        raise ValueError("permutation phases must provide permutation")
+    if position_independent and kind != "substitution":
+        raise ValueError("only substitution phases can be position_independent")
+
+    if kind != "general":
+        length_preserving = True
+    phase = Phase(
+        name,
+        encrypt,
+        decrypt,
+        kind,
+        bool(length_preserving),
+        tables,
+        permutation,
+        bool(position_independent),
+    )
+    PHASES[name] = phase
+    return phase
+
+
+###############################################
+# FUSING PHASES TOGETHER
+###############################################
+
+
+def _compose_tables(first, second):
+    """One translate table that does 'first' and then 'second'."""
+    combined = {}
+    for code in set(first) | set(second):
+        middle = first.get(code, code)
+        combined[code] = second.get(middle, middle)
+    return combined
+
+
+def _invert_table(table):
+    """Translate table that undoes 'table'."""
+    return {result: code for code, result in table.items()}
+
+
+class _Substitutions:
+    """Neighbouring substitution phases, applied in one pass."""
+
+    def __init__(self, phases):
+        self.phases = phases
+
+    def tables(self, key):
+        """
+        Every phase's tables merged into one set (cached per key).
+
+        Returns:
+            Tuple of (encrypt tables, decrypt tables)
+        """
+        frozen = _frozen_key(key)
+        if frozen is None:
+            return _merge_tables(tuple(self.phases), key)
+        return _cached_merge(tuple(self.phases), frozen)
+
+    def encrypt(self, text, key):
+        return self._apply(text, self.tables(key)[0])
+
+    def decrypt(self, text, key):
+        return self._apply(text, self.tables(key)[1])
+
+    @staticmethod
+    def _apply(text, tables):
+        if len(tables) == 1:
+            return text.translate(tables[0])
+
+        # Every Nth character uses the same table
+        step = len(tables)
+        chars = list(text)
+        for offset in range(min(step, len(chars))):
+            chars[offset::step] = "".join(chars[offset::step]).translate(
+                tables[offset]
+            )
+        return "".join(chars)
+
+
+def _merge_tables(phases, key):
+    """
+    Merge the tables of several phases (the pattern repeats at their lcm).
+
+    Raises:
+        ValueError: If a phase has no tables at all (an empty password)
+    """
+    all_tables = [phase.tables(key) for phase in phases]
+    for phase, tables in zip(phases, all_tables):
+        if not tables:
+            raise ValueError(f"phase {phase.name!r} has no tables for this key")
+    period = math.lcm(*(len(tables) for tables in all_tables))
+    merged = []
+    for position in range(period):
+        table = {}
+        for tables in all_tables:
+            table = _compose_tables(table, tables[position % len(tables)])
+        # Characters that stay the same don't need an entry
+        merged.append({code: new for code, new in table.items() if code != new})
+    return tuple(merged), tuple(_invert_table(table) for table in merged)
+
+
+@lru_cache(maxsize=SUBSTITUTION_CACHE_SIZE)
+def _cached_merge(phases, frozen):
+    return _merge_tables(phases, dict(frozen))
+
+
+class _Permutations:
+    """Neighbouring permutation phases, applied as one reordering."""
+
+    def __init__(self, phases):
+        self.phases = phases
+
+    def permutation(self, length, key):
+        """Every phase's permutation combined into one."""
+        frozen = _frozen_key(key)
+        if frozen is None or length > PERMUTATION_CACHE_MAX_LENGTH:
+            return _combine(tuple(self.phases), length, key)
+        return _cached_combine(tuple(self.phases), length, frozen)
+
+    def encrypt(self, text, key):
+        return self.permutation(len(text), key).apply(text)
+
+    def decrypt(self, text, key):
+        return self.permutation(len(text), key).invert().apply(text)
+
+
+def _combine(phases, length, key):
+    """Compose the permutations of several phases."""
+    combined = phases[0].permutation(length, key)
+    for phase in phases[1:]:
+        combined = combined.compose(phase.permutation(length, key))
+    return combined
+
+
+@lru_cache(maxsize=PERMUTATION_CACHE_SIZE)
+def _cached_combine(phases, length, frozen):
+    return _combine(phases, length, dict(frozen))
+
+
+def _frozen_key(key):
+    """Hashable copy of a key dictionary, or None if it can't be hashed."""
+    try:
+        frozen = tuple(sorted(key.items()))
+        hash(frozen)
+    except (AttributeError, TypeError):
+        return None
+    return frozen
+
+
+class _General:
+    """A phase that is run exactly as it is."""
+
+    def __init__(self, phase):
+        self.phases = [phase]
+
+    def encrypt(self, text, key):
+        return self.phases[0].encrypt(text, key)
+
+    def decrypt(self, text, key):
+        return self.phases[0].decrypt(text, key)
+
+
+def _movable(phase):
+    """Can this substitution swap places with a permutation?"""
+    return phase.kind == "substitution" and phase.position_independent
+
+
+def _build_steps(phases):
+    """Group the phases into steps, merging neighbours of the same kind."""
+    phases = list(phases)
+
+    # Let position-independent substitutions drift past permutations,
+    # so they end up next to other substitutions
+    moved = True
+    while moved:
+        moved = False
+        for index in range(len(phases) - 1):
+            here, after = phases[index], phases[index + 1]
+            if _movable(here) and after.kind == "permutation":
+                phases[index], phases[index + 1] = after, here
+                moved = True
+
+    steps = []
+    for phase in phases:
+        last = steps[-1] if steps else None
+        if phase.kind == "substitution" and isinstance(last, _Substitutions):
+            last.phases.append(phase)
+        elif phase.kind == "permutation" and isinstance(last, _Permutations):
+            last.phases.append(phase)
+        elif phase.kind == "substitution":
+            steps.append(_Substitutions([phase]))
+        elif phase.kind == "permutation":
+            steps.append(_Permutations([phase]))
+        else:
+            steps.append(_General(phase))
+    return steps
+
+
+###############################################
+# PIPELINES
+###############################################
+
+
+class Pipeline:
+    """
+    Any sequence of registered phases, used like encrypt()/decrypt().
+
+    Neighbouring phases of the same kind are merged when the pipeline is
+    built, so they cost a single pass over the text.
+    """
+
+    def __init__(self, phases=DEFAULT_PHASES):
+        """
+        Args:
+            phases: Sequence of phase names (or Phase records), in
+                encryption order
+        """
+        self.phases = tuple(_lookup(phase) for phase in phases)
+        self.steps = _build_steps(self.phases)
+        # The engine already has a fused path for the standard five phases
+        self.standard = self.phases == tuple(PHASES[name] for name in DEFAULT_PHASES)
+
+    def __repr__(self):
+        names = ", ".join(repr(phase.name) for phase in self.phases)
+        return f"Pipeline([{names}])"
+
+    def encrypt(self, text, key):
+        """
+        Apply every phase in order.
+
+        Args:
+            text: The plaintext to encrypt
+            key: Dictionary with settings for all phases
+
+        Returns:
+            Encrypted string
+        """
+        if self.standard:
+            return engine.encrypt(text, key)
+        for step in self.steps:
+            text = step.encrypt(text, key)
+        return text
+
+    def decrypt(self, text, key):
+        """
+        Reverse every phase, last one first.
+
+        Args:
+            text: The encrypted text
+            key: Same key used for encryption
+
+        Returns:
+            Original plaintext
+        """
+        if self.standard:
+            return engine.decrypt(text, key)
+        for step in reversed(self.steps):
+            text = step.decrypt(text, key)
+        return text
+
+    def describe(self):
+        """
+        Show how the phases were grouped into passes.
+
+        Returns:
+            List of (kind, [phase names]) - one entry per pass
+        """
+        kinds = {_Substitutions: "substitution", _Permutations: "permutation"}
+        return [
+            (kinds.get(type(step), "general"), [phase.name for phase in step.phases])
+            for step in self.steps
+        ]
+
+
+def _lookup(phase):
+    """Find a phase by name (Phase records are used as they are)."""
+    if isinstance(phase, Phase):
+        return phase
+    try:
+        return PHASES[phase]
+    except KeyError:
+        raise ValueError(f"unknown phase {phase!r}") from None
+
+
+###############################################
+# BUILT-IN PHASES
+###############################################
+#
+# The shift tables come from engine's cache, so they are shared: merging
+# only ever reads them and builds new tables.
+
+
+def _shift_table(shift):
+    """Translate table shifting printable ASCII by 'shift'."""
+    return engine._shift_table(shift % 95, False)
+
+
+def _phase1_tables(key):
+    """Phase 1: the same shift everywhere."""
+    return [_shift_table(key.get("shift", 5))]
+
+
+def _phase3_tables(key):
+    """Phase 3: one shift per password character."""
+    password = key.get("password", "SECRET")
+    return [_shift_table(ord(char) % 95) for char in password]
+
+
+def _xor_tables(key):
+    """XOR cipher: the same shift everywhere."""
+    return [_shift_table(key.get("xor_value", 42))]
+
+
+register_phase(
+    "phase1",
+    engine.phase1_encrypt,
+    engine.phase1_decrypt,
+    kind="substitution",
+    tables=_phase1_tables,
+    position_independent=True,
+)
+register_phase(
+    "phase2",
+    engine.phase2_encrypt,
+    engine.phase2_decrypt,
+    kind="permutation",
+    permutation=engine.phase2_permutation,
+)
+register_phase(
+    "phase3",
+    engine.phase3_encrypt,
+    engine.phase3_decrypt,
+    kind="substitution",
+    tables=_phase3_tables,
+)
+register_phase("phase4", engine.phase4_encrypt, engine.phase4_decrypt)
+register_phase(
+    "phase5",
+    engine.phase5_encrypt,
+    engine.phase5_decrypt,
+    kind="permutation",
+    permutation=engine.phase5_permutation,
+)
+register_phase(
+    "xor",
+    additional_ciphers.xor_encrypt,
+    additional_ciphers.xor_decrypt,
+    kind="substitution",
+    tables=_xor_tables,
+    position_independent=True,
+)
+register_phase(
+    "vigenere",
+    additional_ciphers.vigenere_encrypt,
+    additional_ciphers.vigenere_decrypt,
+    length_preserving=True,
+)
+register_phase(
+    "rail_fence",
+    additional_ciphers.rail_fence_encrypt,
+    additional_ciphers.rail_fence_decrypt,
+    kind="permutation",
+    permutation=additional_ciphers.rail_fence_permutation,
+)
@@ -0,0 +1,154 @@
+"""In-memory cache of encryption results for the web app.
+
+People often encrypt the same text with the same settings again and
+again (templates, examples in a lesson...). ResultCache remembers recent
+results so that repeated work is skipped:
+
+    cache = ResultCache(max_bytes=64 * 1024 * 1024)
+    digest = cache_key(message, key, "encrypt")
+    result = cache.get(digest)
+    if result is None:
+        result = encrypt(message, key)
+        cache.put(digest, result)
+
+Entries are looked up by a SHA-256 digest of (text, key, direction), so
+the cache never holds the input text itself. Everything stays in memory -
+nothing is ever written to disk. When the results add up to more than
+max_bytes, the least recently used ones are dropped.
+"""
+
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+from engine import compile_key
+
+
+def cache_key(text, key, direction):
+    """
+    Digest identifying one encrypt/decrypt call.
+
+    The key is normalised first, so {} and the same settings written out
+    in full give the same digest.
+
+    Args:
+        text: The message
+        key: Dictionary with settings for all phases (or a CompiledKey)
+        direction: "encrypt" or "decrypt"
+
+    Returns:
+        32-byte digest
+
+    Raises:
+        ValueError: If the key is not valid
+    """
+    compiled = compile_key(key)
+    settings = repr(
+        (
+            direction,
+            compiled.shift,
+            compiled.block_size,
+            compiled.password,
+            compiled.noise_interval,
+            compiled.noise_char,
+        )
+    )
+    digest = hashlib.sha256()
+    for part in (settings, text):
+        data = part.encode("utf-8", "surrogatepass")
+        # Length first, so the parts can't run into each other
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.digest()
+
+
+class ResultCache:
+    """
+    Least-recently-used cache of results, limited by total size in bytes.
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, max_bytes, max_entry_bytes=None):
+        """
+        Args:
+            max_bytes: Most memory the cached results may use
+            max_entry_bytes: Results bigger than this are never cached
+                (default: an eighth of max_bytes)
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = (
+            max_bytes // 8 if max_entry_bytes is None else max_entry_bytes
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # digest -> (result, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, digest):
+        """
+        Look up a result.
+
+        Returns:
+            The cached result, or None (counted as a miss)
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, digest, result):
+        """
+        Remember a result, dropping old ones if the cache gets too big.
+
+        Returns:
+            True if it was stored (False if it is too big to cache)
+        """
+        size = sys.getsizeof(result) + len(digest)
+        if size > self.max_entry_bytes:
+            return False
+
+        with self._lock:
+            old = self._entries.pop(digest, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[digest] = (result, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self._bytes -= dropped
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        """Forget every result (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Current counters.
+
+        Returns:
+            Dictionary with hits, misses, evictions, entries and bytes
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
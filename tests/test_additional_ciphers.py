@@ -0,0 +1,109 @@
+"""pytest-style tests for additional_ciphers.py.
+
+Run with: pytest -v
+"""
+
+import random
+
+import pytest
+import additional_ciphers
+from additional_ciphers import (
+    rail_fence_decrypt,
+    rail_fence_encrypt,
+    rail_fence_order,
+    vigenere_decrypt,
+    vigenere_encrypt,
+)
+
+
+def zigzag(text, rails):
+    """Rail fence the slow, obvious way: walk the zigzag one step at a time."""
+    fence = [[] for _ in range(rails)]
+    rail, direction = 0, 1
+    for char in text:
+        fence[rail].append(char)
+        rail += direction
+        if rail == 0 or rail == rails - 1:
+            direction *= -1
+    return "".join("".join(row) for row in fence)
+
+
+def vigenere_one_by_one(text, keyword, direction=1):
+    """Vigenère the slow, obvious way: one character at a time."""
+    result = []
+    key_index = 0
+    for char in text:
+        if char.isalpha():
+            shift = ord(keyword[key_index % len(keyword)].upper()) - ord("A")
+            base = ord("A") if char.isupper() else ord("a")
+            result.append(chr((ord(char) - base + direction * shift) % 26 + base))
+            key_index += 1
+        else:
+            result.append(char)
+    return "".join(result)
+
+
+class TestVigenere:
+    @pytest.fixture(params=["python", "numpy"])
+    def backend(self, request, monkeypatch):
+        """Run each test with and without the NumPy path."""
+        if request.param == "numpy":
+            pytest.importorskip("numpy")
+            monkeypatch.setattr(additional_ciphers, "VIGENERE_NUMPY_MIN", 0)
+        return request.param
+
+    def test_classic_example(self, backend):
+        key = {"vigenere_key": "LEMON"}
+        assert vigenere_encrypt("ATTACK AT DAWN", key) == "LXFOPV EF RNHR"
+        assert vigenere_decrypt("LXFOPV EF RNHR", key) == "ATTACK AT DAWN"
+
+    def test_matches_one_by_one(self, backend):
+        rng = random.Random(4)
+        alphabet = [chr(code) for code in range(32, 127)] + ["\n", "é", "Ж", "ß"]
+        for _ in range(200):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+            keyword = "".join(rng.choice("abcXYZ1!") for _ in range(rng.randint(1, 6)))
+            key = {"vigenere_key": keyword}
+            assert vigenere_encrypt(text, key) == vigenere_one_by_one(text, keyword)
+            assert vigenere_decrypt(text, key) == vigenere_one_by_one(
+                text, keyword, -1
+            )
+
+    def test_no_letters(self, backend):
+        assert vigenere_encrypt("123 !?", {"vigenere_key": ""}) == "123 !?"
+
+    def test_empty_keyword(self, backend):
+        with pytest.raises(ValueError):
+            vigenere_encrypt("Hello", {"vigenere_key": ""})
+
+
+class TestRailFence:
+    def test_docstring_example(self):
+        assert rail_fence_encrypt("HELLO WORLD", {"rails": 3}) == "HOREL OLLWD"
+
+    @pytest.mark.parametrize("rails", [2, 3, 4, 7, 50])
+    def test_matches_zigzag(self, rails):
+        for length in range(0, 60):
+            text = "".join(chr(65 + i % 26) + chr(97 + i % 7) for i in range(length))
+            encrypted = rail_fence_encrypt(text, {"rails": rails})
+            assert encrypted == zigzag(text, rails)
+            assert rail_fence_decrypt(encrypted, {"rails": rails}) == text
+
+    def test_order(self):
+        text = "The quick brown fox"
+        order = rail_fence_order(len(text), 4)
+        assert sorted(order) == list(range(len(text)))
+        assert "".join(text[i] for i in order) == rail_fence_encrypt(
+            text, {"rails": 4}
+        )
+
+    def test_fewer_than_two_rails(self):
+        assert rail_fence_encrypt("Hello", {"rails": 1}) == "Hello"
+        assert rail_fence_decrypt("Hello", {"rails": 0}) == "Hello"
+        assert list(rail_fence_order(3, 1)) == [0, 1, 2]
+
+    def test_large_text(self):
+        """Decryption used to be quadratic; a megabyte should now be quick."""
+        text = "abcdefghij" * 100_000
+        encrypted = rail_fence_encrypt(text, {"rails": 5})
+        assert rail_fence_decrypt(encrypted, {"rails": 5}) == text
@@ -0,0 +1,312 @@
+"""pytest-style tests for the Flask web application.
+
+Run with: pytest -v
+"""
+
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import app as webapp
+import database
+from engine import decrypt, decrypt_bytes, encrypt, encrypt_bytes
+from result_cache import ResultCache
+
+
+KEY = {"shift": 7, "block_size": 5, "password": "TESTKEY", "noise_interval": 4}
+
+
+@pytest.fixture(autouse=True)
+def users_db(tmp_path, monkeypatch):
+    """A fresh user database (with the demo users) for each test."""
+    monkeypatch.setattr(database, "DATABASE", str(tmp_path / "users.db"))
+    yield
+    database.close_all()
+
+
+@pytest.fixture(autouse=True)
+def results(monkeypatch):
+    """An empty result cache for each test."""
+    cache = ResultCache(webapp.RESULT_CACHE_BYTES)
+    monkeypatch.setattr(webapp, "results", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def latencies(monkeypatch):
+    """Fresh request timings for each test."""
+    monkeypatch.setattr(webapp, "latencies", webapp.LatencyHistogram())
+
+
+@pytest.fixture
+def client():
+    webapp.app.config["TESTING"] = True
+    with webapp.app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def logged_in(client):
+    reply = client.post(
+        "/login", data={"username": "student", "password": "password123"}
+    )
+    assert reply.status_code == 302
+    return client
+
+
+@pytest.fixture
+def background(monkeypatch):
+    """Send every message to a (thread) worker pool instead of inline."""
+    monkeypatch.setattr(webapp, "API_INLINE_LIMIT", 0)
+    monkeypatch.setattr(webapp, "_jobs", {})
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(webapp, "_pool", pool)
+    yield
+    pool.shutdown()
+
+
+def wait_for(client, url):
+    """Poll a job until it has finished."""
+    for _ in range(200):
+        reply = client.get(url).get_json()
+        if reply["status"] not in ("queued", "running"):
+            return reply
+        time.sleep(0.01)
+    raise AssertionError("job never finished")
+
+
+def test_login_uses_database(client):
+    reply = client.post("/login", data={"username": "admin", "password": "nope"})
+    assert b"Invalid credentials" in reply.data
+
+    database.create_user("carol", "c4rol")
+    reply = client.post("/login", data={"username": "carol", "password": "c4rol"})
+    assert reply.headers["Location"].endswith("/workshop")
+
+
+def test_login_throttled(client, monkeypatch):
+    monkeypatch.setattr(database._failed_logins, "limit", 1)
+    monkeypatch.setattr(database._failed_logins, "backoff", 30)
+    for _ in range(2):
+        client.post("/login", data={"username": "admin", "password": "nope"})
+    reply = client.post("/login", data={"username": "admin", "password": "nope"})
+    assert reply.status_code == 429
+    assert b"Too many login attempts" in reply.data
+    assert 0 < int(reply.headers["Retry-After"]) <= 30
+
+    # The real user, logging in from somewhere else, isn't locked out
+    reply = client.post(
+        "/login",
+        data={"username": "admin", "password": "supersecret"},
+        environ_base={"REMOTE_ADDR": "10.0.0.2"},
+    )
+    assert reply.status_code == 302
+
+
+def test_session_caches_identity(logged_in, monkeypatch):
+    calls = []
+    monkeypatch.setattr(database, "user_exists", lambda name: calls.append(name))
+    assert logged_in.get("/workshop").status_code == 200
+    assert calls == []
+
+
+def test_deleted_user_is_logged_out(logged_in, monkeypatch):
+    monkeypatch.setattr(webapp, "SESSION_RECHECK", 0)
+    database.delete_user("student")
+    reply = logged_in.get("/workshop")
+    assert reply.status_code == 302
+    assert reply.headers["Location"].endswith("/login")
+
+
+def test_workshop_still_works(logged_in):
+    page = logged_in.post(
+        "/workshop",
+        data={"message": "Hello", "action": "encrypt", "password": "TESTKEY"},
+    )
+    assert page.status_code == 200
+
+
+def test_api_needs_login(client):
+    reply = client.post("/api/encrypt", json={"message": "Hello"})
+    assert reply.status_code == 401
+
+
+def test_api_inline(logged_in):
+    reply = logged_in.post("/api/encrypt", json={"message": "Hello", "key": KEY})
+    assert reply.status_code == 200
+    data = reply.get_json()
+    assert data["result"] == encrypt("Hello", KEY)
+    assert data["latency_ms"] >= 0
+
+    reply = logged_in.post("/api/decrypt", json={"message": data["result"], "key": KEY})
+    assert reply.get_json()["result"] == "Hello"
+
+
+def test_api_reuses_cached_results(logged_in, results):
+    request = {"message": "Hello", "key": KEY}
+    first = logged_in.post("/api/encrypt", json=request).get_json()
+    second = logged_in.post("/api/encrypt", json=request).get_json()
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["result"] == first["result"] == encrypt("Hello", KEY)
+    stats = results.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_api_cache_can_be_skipped(logged_in, results):
+    request = {"message": "Hello", "key": KEY}
+    logged_in.post("/api/encrypt", json=request)
+    reply = logged_in.post("/api/encrypt", json=dict(request, cache=False))
+    assert not reply.get_json()["cached"]
+    reply = logged_in.post(
+        "/api/encrypt", json=request, headers={"Cache-Control": "no-store"}
+    )
+    assert not reply.get_json()["cached"]
+    assert results.stats()["hits"] == 0
+
+
+def test_workshop_uses_cache(logged_in, results):
+    form = {"action": "encrypt", "message": "Hello", "password": "TESTKEY"}
+    logged_in.post("/workshop", data=form)
+    reply = logged_in.post("/workshop", data=form)
+    assert reply.status_code == 200
+    assert results.stats()["hits"] == 1
+
+
+def test_api_bad_requests(logged_in):
+    assert logged_in.post("/api/encrypt", data="nope").status_code == 400
+    assert logged_in.post("/api/encrypt", json={"message": 5}).status_code == 400
+    bad_key = {"message": "Hi", "key": {"block_size": 0}}
+    assert logged_in.post("/api/encrypt", json=bad_key).status_code == 400
+    assert logged_in.post("/api/shred", json={"message": "Hi"}).status_code == 404
+
+
+def test_api_background_job(logged_in, background, results):
+    message = "A longer message for the worker pool. " * 10
+    reply = logged_in.post("/api/encrypt", json={"message": message, "key": KEY})
+    assert reply.status_code == 202
+    url = reply.get_json()["url"]
+    assert reply.headers["Location"] == url
+
+    data = wait_for(logged_in, url)
+    assert data["status"] == "done"
+    assert decrypt(data["result"], KEY) == message
+    assert data["latency_ms"] >= data["work_ms"] >= 0
+
+    # A result is handed out only once
+    assert logged_in.get(url).status_code == 404
+
+    # ...but the same request again is answered straight from the cache
+    reply = logged_in.post("/api/encrypt", json={"message": message, "key": KEY})
+    assert reply.status_code == 200
+    assert reply.get_json()["cached"]
+    stats = results.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_api_queue_full(logged_in, background, monkeypatch):
+    monkeypatch.setattr(webapp, "API_MAX_JOBS", 0)
+    reply = logged_in.post("/api/encrypt", json={"message": "Hello", "key": KEY})
+    assert reply.status_code == 429
+    assert reply.headers["Retry-After"] == "1"
+
+
+def finished_job():
+    """Wait for the only background job to finish, without collecting it."""
+    (job,) = webapp._jobs.values()
+    job["future"].result()
+    while job["finished"] is None:
+        time.sleep(0.01)
+    return job
+
+
+def test_uncollected_results_count(logged_in, background, monkeypatch):
+    monkeypatch.setattr(webapp, "API_MAX_JOBS", 1)
+    reply = logged_in.post("/api/encrypt", json={"message": "Hello", "key": KEY})
+    url = reply.get_json()["url"]
+    finished_job()
+
+    reply = logged_in.post("/api/encrypt", json={"message": "Again", "key": KEY})
+    assert reply.status_code == 429
+
+    # Collecting the result makes room again
+    assert wait_for(logged_in, url)["status"] == "done"
+    reply = logged_in.post("/api/encrypt", json={"message": "Again", "key": KEY})
+    assert reply.status_code == 202
+
+
+def test_old_results_expire_when_read(logged_in, background, monkeypatch):
+    reply = logged_in.post("/api/encrypt", json={"message": "Hello", "key": KEY})
+    url = reply.get_json()["url"]
+    finished_job()["finished"] -= webapp.API_RESULT_TTL + 1
+    assert logged_in.get(url).status_code == 404
+    assert webapp._jobs == {}
+
+
+def test_jobs_belong_to_their_owner(logged_in, background, client):
+    reply = logged_in.post("/api/encrypt", json={"message": "Hello", "key": KEY})
+    url = reply.get_json()["url"]
+    with client.session_transaction() as session:
+        session["username"] = "admin"
+    assert client.get(url).status_code == 404
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Stream in tiny pieces so even short tests cross chunk boundaries."""
+    monkeypatch.setattr(webapp, "STREAM_CHUNK_SIZE", 7)
+
+
+def test_stream_raw_body(logged_in, small_chunks):
+    data = bytes(range(256)) * 3 + b"tail"
+    query = "?password=TESTKEY&block_size=5&noise_interval=4&shift=7"
+    reply = logged_in.post("/stream/encrypt" + query, data=data)
+    assert reply.status_code == 200
+    assert reply.is_streamed
+    assert reply.data == encrypt_bytes(data, KEY)
+    assert reply.content_length == len(reply.data)
+
+    reply = logged_in.post("/stream/decrypt" + query, data=reply.data)
+    assert reply.data == data
+    assert reply.content_length == len(data)
+
+
+def test_stream_body_is_never_parsed_as_a_form(logged_in):
+    """curl --data-binary sends a form content type by default."""
+    reply = logged_in.post(
+        "/stream/encrypt",
+        data=b"a=1&b=2",
+        content_type="application/x-www-form-urlencoded",
+    )
+    assert reply.data == encrypt_bytes(b"a=1&b=2", {})
+
+
+def test_stream_file_upload(logged_in, small_chunks):
+    data = b"Upload me, byte by byte." * 20
+    form = {"file": (io.BytesIO(data), "notes.txt"), "password": "TESTKEY"}
+    reply = logged_in.post("/stream/encrypt", data=form)
+    assert reply.data == encrypt_bytes(data, {"password": "TESTKEY"})
+    assert 'filename="notes.txt.enc"' in reply.headers["Content-Disposition"]
+    assert reply.content_length == len(reply.data)
+    assert decrypt_bytes(reply.data, {"password": "TESTKEY"}) == data
+
+
+def test_stream_bad_key(logged_in):
+    assert logged_in.post("/stream/encrypt?block_size=x", data=b"a").status_code == 400
+    reply = logged_in.post("/stream/encrypt?noise_char=%E2%82%AC", data=b"a")
+    assert reply.status_code == 400
+    huge = webapp.STREAM_MAX_BLOCK_SIZE + 1
+    reply = logged_in.post(f"/stream/decrypt?block_size={huge}", data=b"a")
+    assert reply.status_code == 400
+
+
+def test_metrics(logged_in):
+    logged_in.post("/api/encrypt", json={"message": "Hello", "key": KEY})
+    logged_in.post("/api/encrypt", json={"message": "Hello", "key": KEY})
+    reply = logged_in.get("/metrics")
+    assert reply.mimetype == "text/plain"
+    text = reply.get_data(as_text=True)
+    assert 'cipherforge_request_seconds_count{endpoint="api_convert"} 2' in text
+    assert 'seconds_bucket{endpoint="api_convert",le="+Inf"} 2' in text
+    assert "cipherforge_result_cache_hits_total 1" in text
+    assert 'cipherforge_step_calls_total{step="encrypt"}' in text
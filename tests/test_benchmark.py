@@ -0,0 +1,87 @@
+"""pytest-style tests for the benchmark suite.
+
+Run with: pytest -v
+
+These only check that the harness works - the sizes are kept tiny.
+"""
+
+import json
+
+import pytest
+import benchmark
+
+
+def test_parse_size():
+    assert benchmark.parse_size("16") == 16
+    assert benchmark.parse_size("64K") == 64 * 1024
+    assert benchmark.parse_size("100m") == 100 * 1024 * 1024
+
+
+def test_make_text_is_repeatable():
+    text = benchmark.make_text(5000)
+    assert len(text) == 5000
+    assert text == benchmark.make_text(5000)
+    assert all(32 <= ord(char) <= 126 for char in text)
+
+
+def test_only_relevant_settings_are_varied():
+    """Phase 1 ignores the password and block size, so it runs once per size."""
+    results = benchmark.run_benchmarks(
+        names=["phase1_encrypt", "encrypt"],
+        sizes=[16, 100],
+        password_lengths=[1, 8],
+        block_sizes=[2, 4, 8],
+        min_seconds=0,
+    )
+    counts = {}
+    for result in results:
+        counts[result["name"]] = counts.get(result["name"], 0) + 1
+        assert result["calls"] >= 1
+        assert result["mb_per_s"] >= 0
+    assert counts == {"phase1_encrypt": 2, "encrypt": 2 * 2 * 3}
+
+
+def test_slow_functions_stop_early():
+    results = benchmark.run_benchmarks(
+        names=["phase4_encrypt"], sizes=[16, 32, 64], max_seconds=0, min_seconds=0
+    )
+    assert [result["size"] for result in results] == [16]
+
+
+def test_unknown_benchmark():
+    with pytest.raises(ValueError):
+        benchmark.run_benchmarks(names=["phase9_encrypt"])
+
+
+def test_compare_finds_regressions():
+    old = {
+        "name": "encrypt",
+        "size": 16,
+        "password_length": 6,
+        "block_size": 4,
+        "mb_per_s": 100.0,
+    }
+    slower = dict(old, mb_per_s=50.0)
+    similar = dict(old, mb_per_s=90.0)
+    assert benchmark.compare([similar], [old], tolerance=0.25) == []
+    assert benchmark.compare([slower], [old], tolerance=0.25) == [(slower, old, 0.5)]
+
+
+def test_main_saves_and_compares(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    argv = ["--only", "xor_encrypt", "--sizes", "16", "-o", str(output)]
+    assert benchmark.main(argv) == 0
+
+    saved = json.loads(output.read_text())
+    assert saved["results"][0]["name"] == "xor_encrypt"
+
+    # Anything counts as slower with a negative tolerance
+    argv = ["--only", "xor_encrypt", "--sizes", "16", "--baseline", str(output)]
+    assert benchmark.main(argv + ["--tolerance", "-10"]) == 1
+    assert "REGRESSION xor_encrypt" in capsys.readouterr().err
+
+
+def test_login_benchmark():
+    report = benchmark.run_login_benchmark(clients=2, logins=1, pages=1)
+    assert report["logins"] == 2
+    assert report["logins_per_s"] > 0
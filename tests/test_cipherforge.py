@@ -0,0 +1,68 @@
+"""pytest-style tests for the CipherForge command-line tool.
+
+Run with: pytest -v
+"""
+
+import io
+
+import pytest
+import cipherforge
+from engine import encrypt_bytes
+
+
+KEY_ARGS = ["--password", "TESTKEY", "--block-size", "5", "--noise-interval", "4"]
+KEY = {"password": "TESTKEY", "block_size": 5, "noise_interval": 4}
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Use tiny chunks so even short tests cross chunk boundaries."""
+    monkeypatch.setattr(cipherforge, "CHUNK_SIZE", 64)
+
+
+def test_file_round_trip(tmp_path, small_chunks):
+    """Encrypting then decrypting a file should give it back."""
+    original = bytes(range(256)) * 5 + b"tail"
+    plain = tmp_path / "plain.bin"
+    plain.write_bytes(original)
+
+    encrypted = tmp_path / "cipher.bin"
+    decrypted = tmp_path / "decrypted.bin"
+
+    cipherforge.main(["encrypt", str(plain), "-o", str(encrypted), "-q"] + KEY_ARGS)
+    assert encrypted.read_bytes() == encrypt_bytes(original, KEY)
+
+    cipherforge.main(["decrypt", str(encrypted), "-o", str(decrypted), "-q"] + KEY_ARGS)
+    assert decrypted.read_bytes() == original
+
+
+def test_stdin_to_stdout(small_chunks):
+    """Streams should give the same result as files."""
+    original = b"Streaming through stdin and stdout! " * 20
+    args = cipherforge.build_parser().parse_args(["encrypt"] + KEY_ARGS)
+    output = io.BytesIO()
+    read, written = cipherforge.run(args, stdin=io.BytesIO(original), stdout=output)
+    assert output.getvalue() == encrypt_bytes(original, KEY)
+    assert (read, written) == (len(original), len(output.getvalue()))
+
+
+def test_empty_file(tmp_path):
+    """An empty input file gives an empty output file."""
+    (tmp_path / "empty").write_bytes(b"")
+    output = tmp_path / "out"
+    cipherforge.main(["encrypt", str(tmp_path / "empty"), "-o", str(output), "-q"])
+    assert output.read_bytes() == b""
+
+
+def test_reports_throughput(tmp_path, capsys):
+    """Without --quiet the throughput is reported on stderr."""
+    (tmp_path / "in").write_bytes(b"Hello World!")
+    cipherforge.main(["encrypt", str(tmp_path / "in"), "-o", str(tmp_path / "out")])
+    assert "MB/s" in capsys.readouterr().err
+
+
+def test_bad_key_is_an_error(tmp_path):
+    """Invalid key settings exit with an error message."""
+    (tmp_path / "in").write_bytes(b"Hello")
+    with pytest.raises(SystemExit):
+        cipherforge.main(["encrypt", str(tmp_path / "in"), "--block-size", "0"])
@@ -0,0 +1,106 @@
+"""pytest-style tests for the key recovery tool.
+
+Run with: pytest -v
+"""
+
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import cryptanalysis
+from engine import decrypt, encrypt
+
+
+def random_key(rng):
+    length = rng.randint(1, 12)
+    return {
+        "shift": rng.randint(1, 94),
+        "block_size": rng.randint(2, 20),
+        "password": "".join(chr(rng.randint(33, 126)) for _ in range(length)),
+        "noise_interval": rng.randint(2, 10),
+        "noise_char": rng.choice("~#@*"),
+    }
+
+
+def random_text(rng, length):
+    return "".join(chr(rng.randint(32, 126)) for _ in range(length))
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_recovers_equivalent_key(seed, executor):
+    rng = random.Random(seed)
+    key = random_key(rng)
+    plaintext = random_text(rng, rng.randint(60, 300))
+    ciphertext = encrypt(plaintext, key)
+    offset = rng.randint(0, len(plaintext) - 40)
+
+    report = cryptanalysis.recover_key(
+        ciphertext, plaintext[offset : offset + 40], offset=offset, executor=executor
+    )
+    found = report["key"]
+    assert found["shift"] == 0
+    assert found["block_size"] == key["block_size"]
+    assert found["noise_interval"] == key["noise_interval"]
+    assert found["noise_char"] == key["noise_char"]
+    assert decrypt(ciphertext, found) == plaintext
+    assert report["candidates"] > 0
+    assert report["keys_per_s"] > 0
+
+
+def test_without_executor():
+    key = {"shift": 11, "block_size": 5, "password": "hunter2"}
+    plaintext = "Meet me by the old oak tree at noon. Bring the map."
+    ciphertext = encrypt(plaintext, key)
+    report = cryptanalysis.recover_key(ciphertext, "Meet me by the old oak", workers=1)
+    assert decrypt(ciphertext, report["key"]) == plaintext
+
+
+def test_no_key_found(executor):
+    ciphertext = encrypt(random_text(random.Random(7), 500), {"password": "abcdefgh"})
+    report = cryptanalysis.recover_key(
+        ciphertext, "Hello there, how are you today?", executor=executor
+    )
+    assert report["key"] is None
+    assert report["candidates"] > 0
+
+
+def test_known_text_too_short():
+    with pytest.raises(ValueError):
+        cryptanalysis.recover_key(encrypt("Hello World!", {}), "Hell")
+
+
+def test_noise_candidates():
+    ciphertext = encrypt("Hello World!", {"noise_interval": 3, "noise_char": "#"})
+    found = list(cryptanalysis.noise_candidates(ciphertext))
+    assert (3, "#") in [(interval, char) for interval, char, _ in found]
+
+
+def test_block_positions():
+    # 10 characters in blocks of 4: [3 2 1 0] [7 6 5 4] [9 8]
+    assert cryptanalysis.block_positions(0, 10, 4, 10) == [3, 2, 1, 0, 7, 6, 5, 4, 9, 8]
+
+
+def test_password_for_covers_every_shift():
+    password = cryptanalysis.password_for(range(95))
+    assert [ord(char) % 95 for char in password] == list(range(95))
+    assert all(32 <= ord(char) <= 126 for char in password)
+
+
+def test_main(tmp_path, capsys):
+    key = {"shift": 3, "block_size": 6, "password": "TOPSECRET", "noise_char": "^"}
+    plaintext = "To whom it may concern: the shipment arrives on Tuesday."
+    path = tmp_path / "message.enc"
+    path.write_bytes(encrypt(plaintext, key).encode("latin-1"))
+
+    argv = [str(path), "--known", plaintext[:30], "--workers", "1"]
+    assert cryptanalysis.main(argv) == 0
+    captured = capsys.readouterr()
+    assert decrypt(encrypt(plaintext, key), json.loads(captured.out)) == plaintext
+    assert "keys/s" in captured.err
@@ -0,0 +1,228 @@
+"""pytest-style tests for database.py.
+
+Run with: pytest -v
+"""
+
+import csv
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh database file for each test."""
+    monkeypatch.setattr(database, "DATABASE", str(tmp_path / "users.db"))
+    database.init_db()
+    yield database
+    database.close_all()
+
+
+def test_users(db):
+    assert db.create_user("admin", "supersecret")
+    assert not db.create_user("admin", "duplicate")
+    assert db.verify_user("admin", "supersecret")
+    assert not db.verify_user("admin", "wrong")
+    assert not db.verify_user("unknown", "test")
+    assert [user["username"] for user in db.list_users()] == ["admin"]
+    assert db.delete_user("admin")
+    assert not db.delete_user("admin")
+    assert list(db.list_users()) == []
+
+
+def test_wal_mode(db):
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_connection_reused_per_thread(db):
+    with db.connection() as first:
+        pass
+    with db.connection() as second:
+        pass
+    assert first is second
+
+    others = []
+
+    def borrow():
+        with db.connection() as conn:
+            others.append(conn)
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    thread.join()
+    assert others[0] is not first
+
+
+def test_connections_closed_when_thread_exits(db):
+    """Short-lived threads (one per request) must not leak connections."""
+    opened = []
+
+    def borrow():
+        with db.connection() as conn:
+            opened.append(conn)
+
+    for _ in range(20):
+        thread = threading.Thread(target=borrow)
+        thread.start()
+        thread.join()
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert len(db._all_pools) <= 1  # Just this thread's
+
+
+def test_rollback_on_error(db):
+    with pytest.raises(RuntimeError):
+        with db.connection() as conn:
+            conn.execute(
+                "INSERT INTO users (username, password_hash) VALUES ('x', 'y')"
+            )
+            raise RuntimeError("changed my mind")
+    assert list(db.list_users()) == []
+
+
+def test_close_all_reconnects(db):
+    with db.connection() as before:
+        pass
+    db.close_all()
+    with pytest.raises(sqlite3.ProgrammingError):
+        before.execute("SELECT 1")
+    with db.connection() as after:
+        assert after.execute("SELECT 1").fetchone()[0] == 1
+
+
+def count_queries(db, monkeypatch):
+    """Count how many times the database is actually used."""
+    calls = []
+    real = db.connection
+
+    def counting():
+        calls.append(1)
+        return real()
+
+    monkeypatch.setattr(db, "connection", counting)
+    return calls
+
+
+def test_verify_uses_cache(db, monkeypatch):
+    db.create_user("admin", "supersecret")
+    calls = count_queries(db, monkeypatch)
+    assert db.verify_user("admin", "supersecret")
+    assert not db.verify_user("admin", "wrong")
+    assert db.verify_user_async("admin", "supersecret").result()
+    assert len(calls) == 1
+
+
+def test_cache_forgets_deleted_and_created_users(db):
+    db.create_user("admin", "supersecret")
+    assert db.verify_user("admin", "supersecret")
+    db.delete_user("admin")
+    assert not db.verify_user("admin", "supersecret")
+    db.create_user("admin", "newpassword")
+    assert db.verify_user("admin", "newpassword")
+
+
+def test_cache_expires(db, monkeypatch):
+    monkeypatch.setattr(db._user_cache, "ttl", 0)
+    db.create_user("admin", "supersecret")
+    calls = count_queries(db, monkeypatch)
+    db.verify_user("admin", "supersecret")
+    db.verify_user("admin", "supersecret")
+    assert len(calls) == 2
+
+
+def test_unknown_users_still_hash(db, monkeypatch):
+    """Unknown usernames must cost a hash check too (no timing leak)."""
+    checked = []
+    real = db.check_password_hash
+    monkeypatch.setattr(
+        db, "check_password_hash", lambda *args: checked.append(1) or real(*args)
+    )
+    assert not db.verify_user("nobody", "guess")
+    assert checked == [1]
+
+
+def test_failed_logins_back_off(db, monkeypatch):
+    """After too many failures the password isn't even checked."""
+    monkeypatch.setattr(db._failed_logins, "limit", 2)
+    monkeypatch.setattr(db._failed_logins, "backoff", 60)
+    db.create_user("admin", "supersecret")
+    checked = []
+    real = db.check_password_hash
+    monkeypatch.setattr(
+        db, "check_password_hash", lambda *args: checked.append(1) or real(*args)
+    )
+
+    # A success starts the count again
+    assert not db.verify_user("admin", "wrong")
+    assert db.verify_user("admin", "supersecret")
+    assert not db.verify_user("admin", "wrong")
+    assert not db.verify_user("admin", "wrong")
+    assert not db.verify_user("admin", "wrong")
+    assert len(checked) == 5
+
+    with pytest.raises(db.LoginThrottled) as throttled:
+        db.verify_user("admin", "supersecret")
+    assert 0 < throttled.value.retry_after <= 60
+    assert len(checked) == 5
+    # Other usernames, and the same one from elsewhere, are not affected
+    assert not db.verify_user("nobody", "guess")
+    assert db.verify_user("admin", "supersecret", client="10.0.0.2")
+
+
+def test_backoff_doubles():
+    failures = database._FailedLogins(limit=1, backoff=1, backoff_max=3, size=2)
+    waits = []
+    for _ in range(5):
+        failures.failed("admin")
+        waits.append(round(failures.wait("admin")))
+    assert waits == [0, 1, 2, 3, 3]
+    failures.failed("bob")
+    failures.failed("carol")
+    assert failures.wait("admin") == 0  # Only the most recent are kept
+
+
+def test_hash_queue_limit(db, monkeypatch):
+    """Logins are refused straight away when too many checks are waiting."""
+    monkeypatch.setattr(db, "HASH_QUEUE_LIMIT", 0)
+    with pytest.raises(db.LoginThrottled):
+        db.verify_user("admin", "supersecret")
+
+
+def test_import_users(db):
+    db.create_user("admin", "supersecret")
+    users = [("alice", "a1"), ("bob", "b2"), ("admin", "x"), ("alice", "again")]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        report = db.import_users(users, executor=executor)
+    assert report == {"created": ["alice", "bob"], "duplicates": ["alice", "admin"]}
+    assert db.verify_user("alice", "a1")
+    assert db.verify_user("bob", "b2")
+    assert db.verify_user("admin", "supersecret")
+
+
+def test_import_forgets_cached_unknown_users(db):
+    assert not db.verify_user("carol", "c3")
+    db.import_users([("carol", "c3")])
+    assert db.verify_user("carol", "c3")
+
+
+def test_list_users_streams(db):
+    db.import_users([(f"user{n}", "pw") for n in range(3)])
+    users = db.list_users()
+    assert next(users)["username"] == "user0"
+    assert [user["username"] for user in users] == ["user1", "user2"]
+
+
+def test_export_users(db, tmp_path):
+    db.import_users([("alice", "a1"), ("bob", "b2")])
+    path = tmp_path / "users.csv"
+    assert db.export_users(path) == 2
+    with open(path, newline="") as source:
+        rows = list(csv.DictReader(source))
+    assert [row["username"] for row in rows] == ["alice", "bob"]
+    assert "password_hash" not in rows[0]
@@ -0,0 +1,70 @@
+"""pytest-style tests for permutation.py and the transposition phases.
+
+Run with: pytest -v
+"""
+
+from array import array
+
+import pytest
+from additional_ciphers import rail_fence_encrypt, rail_fence_permutation
+from engine import (
+    phase2_encrypt,
+    phase2_permutation,
+    phase5_encrypt,
+    phase5_permutation,
+)
+from permutation import Permutation
+
+
+def test_apply_keeps_the_type():
+    cycle = Permutation([2, 0, 1])
+    assert cycle.apply("abc") == "cab"
+    assert cycle.apply(b"abc") == b"cab"
+    assert cycle.apply(bytearray(b"abc")) == bytearray(b"cab")
+    assert cycle.apply(memoryview(b"abc")) == b"cab"
+    assert cycle.apply([1, 2, 3]) == [3, 1, 2]
+    assert cycle.apply(array("i", [1, 2, 3])) == array("i", [3, 1, 2])
+
+
+def test_short_permutations():
+    assert Permutation([]).apply("") == ""
+    assert Permutation([0]).apply("x") == "x"
+
+
+def test_compose_and_invert():
+    first = Permutation([1, 2, 3, 0])
+    second = Permutation([3, 2, 1, 0])
+    text = "abcd"
+    assert first.compose(second).apply(text) == second.apply(first.apply(text))
+    assert first.compose(first.invert()).is_identity()
+    assert first.invert().apply(first.apply(text)) == text
+    assert first.invert().invert() is first
+
+
+@pytest.mark.parametrize("order", [[0, 0, 1], [1, 2, 3], [-1, 0, 1]])
+def test_not_a_permutation(order):
+    with pytest.raises(ValueError):
+        Permutation(order)
+
+
+def test_length_mismatch():
+    with pytest.raises(ValueError):
+        Permutation([1, 0]).apply("abc")
+    with pytest.raises(ValueError):
+        Permutation([1, 0]).compose(Permutation.identity(3))
+
+
+@pytest.mark.parametrize("length", [0, 1, 2, 5, 9, 16, 33])
+def test_phases_match_their_permutations(length):
+    text = "".join(chr(65 + i % 58) for i in range(length))
+    for block_size in [1, 2, 4, 7]:
+        key = {"block_size": block_size}
+        assert phase2_permutation(length, key).apply(text) == phase2_encrypt(
+            text, key
+        )
+    assert phase5_permutation(length, {}).apply(text) == phase5_encrypt(text, {})
+    for rails in [2, 3, 5]:
+        key = {"rails": rails}
+        assert rail_fence_permutation(length, key).apply(text) == rail_fence_encrypt(
+            text, key
+        )
@@ -0,0 +1,184 @@
+"""pytest-style tests for the phase registry and custom pipelines.
+
+Run with: pytest -v
+
+A pipeline must give exactly the same result as calling its phase
+functions one after another, however the phases get merged.
+"""
+
+import random
+
+import pytest
+import engine
+import pipeline
+from pipeline import PHASES, Pipeline, register_phase
+
+
+# ASCII only - the Vigenère cipher can't undo accented letters
+ALPHABET = [chr(code) for code in range(32, 127)] + ["\n", "\t"]
+
+
+def run_phases(names, text, key, action):
+    """Reference result: call each phase function in turn."""
+    if action == "decrypt":
+        names = reversed(names)
+    for name in names:
+        text = getattr(PHASES[name], action)(text, key)
+    return text
+
+
+@pytest.fixture
+def key():
+    return {
+        "shift": 17,
+        "block_size": 5,
+        "password": "Pa$$word",
+        "noise_interval": 3,
+        "noise_char": "#",
+        "xor_value": 99,
+        "rails": 4,
+        "vigenere_key": "LEMON",
+    }
+
+
+def test_builtin_phases_registered():
+    """The engine phases and the additional ciphers should all be there."""
+    for name in ["phase1", "phase2", "phase3", "phase4", "phase5"]:
+        assert name in PHASES
+    assert PHASES["xor"].kind == "substitution"
+    assert PHASES["rail_fence"].kind == "permutation"
+    assert PHASES["vigenere"].kind == "general"
+    assert PHASES["phase4"].length_preserving is False
+
+
+def test_default_pipeline_matches_engine(key):
+    """Pipeline() is the normal 5-phase algorithm."""
+    message = "Hello World! The quick brown fox."
+    ciphertext = Pipeline().encrypt(message, key)
+    assert ciphertext == engine.encrypt(message, key)
+    assert Pipeline().decrypt(ciphertext, key) == message
+
+
+@pytest.mark.parametrize(
+    "names",
+    [
+        ["phase1", "phase3", "xor"],
+        ["phase2", "rail_fence", "phase5"],
+        ["xor", "rail_fence", "phase3", "vigenere", "phase4", "phase5"],
+        ["rail_fence", "phase1", "phase2", "phase1", "phase3"],
+    ],
+)
+def test_custom_pipeline_matches_phases(key, names):
+    """Merged passes should match running each phase separately."""
+    rng = random.Random(9)
+    pipeline = Pipeline(names)
+    for length in [0, 1, 2, 7, 40, 301]:
+        text = "".join(rng.choice(ALPHABET) for _ in range(length))
+        encrypted = pipeline.encrypt(text, key)
+        assert encrypted == run_phases(names, text, key, "encrypt")
+        assert pipeline.decrypt(encrypted, key) == text
+
+
+def test_neighbours_are_merged():
+    """Substitutions and permutations next to each other share a pass."""
+    pipeline = Pipeline(["phase2", "rail_fence", "phase3", "xor", "phase4"])
+    assert pipeline.describe() == [
+        ("permutation", ["phase2", "rail_fence"]),
+        ("substitution", ["phase3", "xor"]),
+        ("general", ["phase4"]),
+    ]
+
+
+def test_simple_substitution_moves_past_permutation():
+    """Phase 1 can join Phase 3 because a fixed shift doesn't care where."""
+    steps = Pipeline(["phase1", "phase2", "phase3"]).describe()
+    assert steps == [
+        ("permutation", ["phase2"]),
+        ("substitution", ["phase1", "phase3"]),
+    ]
+
+
+def test_only_declared_substitutions_move(key, monkeypatch):
+    """A substitution is never moved unless it says position doesn't matter."""
+    monkeypatch.setitem(PHASES, "pwshift", None)
+
+    def pwshift_tables(key):
+        printable = "".join(chr(code) for code in range(32, 127))
+        return [
+            str.maketrans(printable, printable[shift:] + printable[:shift])
+            for shift in (ord(char) % 95 for char in key.get("pw", "A"))
+        ]
+
+    # One table with the default key, but one per character of "pw"
+    register_phase(
+        "pwshift", str.upper, str.lower, kind="substitution", tables=pwshift_tables
+    )
+    pipeline = Pipeline(["pwshift", "phase2"])
+    assert [kind for kind, _ in pipeline.describe()] == ["substitution", "permutation"]
+
+    key = dict(key, pw="XYZ")
+    encrypted = pipeline.encrypt("Hello World!", key)
+    expected = PHASES["phase2"].encrypt(
+        Pipeline(["pwshift"]).encrypt("Hello World!", key), key
+    )
+    assert encrypted == expected
+    assert pipeline.decrypt(encrypted, key) == "Hello World!"
+
+
+def test_position_independent_needs_substitution():
+    with pytest.raises(ValueError):
+        register_phase("bad", str.upper, str.lower, position_independent=True)
+
+
+def test_register_custom_phase(key, monkeypatch):
+    """New phases can be registered and used by name."""
+    monkeypatch.setitem(PHASES, "upper_swap", None)
+    swap = lambda text, key: text.swapcase()
+    register_phase("upper_swap", swap, swap, length_preserving=True)
+    pipeline = Pipeline(["phase1", "upper_swap"])
+    assert pipeline.decrypt(pipeline.encrypt("Hello", key), key) == "Hello"
+
+
+def test_invalid_phases():
+    with pytest.raises(ValueError):
+        Pipeline(["no_such_phase"])
+    with pytest.raises(ValueError):
+        register_phase("bad", str.upper, str.lower, kind="substitution")
+    with pytest.raises(ValueError):
+        register_phase("bad", str.upper, str.lower, kind="mystery")
+
+
+@pytest.mark.parametrize("names", [["phase3"], ["phase1", "phase3"]])
+def test_empty_password_is_rejected(names):
+    """Without a table to use, the text must not come back unchanged."""
+    for action in ("encrypt", "decrypt"):
+        with pytest.raises(ValueError):
+            getattr(Pipeline(names), action)("Hello World", {"password": ""})
+
+
+def test_merged_tables_are_cached(key, monkeypatch):
+    """Merging the tables costs once per key, not once per message."""
+    calls = []
+
+    def counted_tables(key):
+        calls.append(key)
+        return [{ord("a"): ord("b"), ord("b"): ord("a")}]
+
+    monkeypatch.setitem(PHASES, "ab_swap", None)
+    register_phase(
+        "ab_swap", str.upper, str.lower, kind="substitution", tables=counted_tables
+    )
+    pipeline = Pipeline(["phase3", "ab_swap"])
+    for message in ["abc", "cab", "a longer message"]:
+        assert pipeline.decrypt(pipeline.encrypt(message, key), key) == message
+    assert len(calls) == 1
+
+
+def test_long_permutations_are_not_cached(key, monkeypatch):
+    """Only short messages keep their permutation in memory."""
+    monkeypatch.setattr(pipeline, "PERMUTATION_CACHE_MAX_LENGTH", 10)
+    pipeline._cached_combine.cache_clear()
+    custom = Pipeline(["rail_fence", "phase5"])
+    for text in ["short", "a bit longer than ten"]:
+        assert custom.decrypt(custom.encrypt(text, key), key) == text
+    assert pipeline._cached_combine.cache_info().currsize == 1
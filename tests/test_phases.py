@@ -104,6 +104,22 @@ class TestPhase3:
         encrypted = phase3_encrypt(original, key)
         decrypted = phase3_decrypt(encrypted, key)
         assert decrypted == original
+    
+    @pytest.mark.parametrize("text", ["", "\n\n", "\u00e9\n"])
+    def test_empty_password_leaves_unshifted_text(self, text):
+        """Text without printable ASCII has nothing to shift."""
+        key = {"password": ""}
+        assert phase3_encrypt(text, key) == text
+        assert phase3_decrypt(text, key) == text
+        assert decrypt(encrypt(text, key), key) == text
+    
+    def test_password_must_be_a_string(self):
+        """Other kinds of password are refused with a clear error."""
+        key = {"password": ["S", "E"]}
+        with pytest.raises(ValueError, match="password"):
+            phase3_encrypt("Hello", key)
+        with pytest.raises(ValueError, match="password"):
+            phase3_decrypt("Hello", key)
 
 
 class TestPhase4:
@@ -127,6 +143,38 @@ class TestPhase4:
         encrypted = phase4_encrypt(original, key)
         decrypted = phase4_decrypt(encrypted, key)
         assert decrypted == original
+    
+    @pytest.mark.parametrize("text", ["", "ab", "abc", "abcdefg", "héllo wörld"])
+    def test_noise_positions(self, key, text):
+        """Noise should follow every 3rd real character, even at the end."""
+        encrypted = phase4_encrypt(text, key)
+        assert encrypted[3::4] == "~" * (len(text) // 3)
+        assert encrypted.replace("~", "") == text
+        assert phase4_decrypt(encrypted, key) == text
+    
+    def test_verify_accepts_intact_noise(self, key):
+        """A validating decrypt should give the same result."""
+        encrypted = phase4_encrypt("Hello World", key)
+        assert phase4_decrypt(encrypted, key, verify=True) == "Hello World"
+    
+    def test_verify_detects_tampering(self, key):
+        """Changed noise should be reported with its position."""
+        encrypted = phase4_encrypt("Hello World", key)
+        tampered = encrypted[:7] + "X" + encrypted[8:]
+        with pytest.raises(ValueError, match="position 7"):
+            phase4_decrypt(tampered, key, verify=True)
+        # Without verify the noise is simply dropped
+        assert phase4_decrypt(tampered, key) == "Hello World"
+    
+    @pytest.mark.parametrize("interval", [0, -3, 2.5])
+    @pytest.mark.parametrize("text", ["", "Hello World"])
+    def test_invalid_interval(self, interval, text):
+        """Noise intervals below 1 are refused, even for empty text."""
+        key = {"noise_interval": interval}
+        with pytest.raises(ValueError, match="noise_interval"):
+            phase4_encrypt(text, key)
+        with pytest.raises(ValueError, match="noise_interval"):
+            phase4_decrypt(text, key)
 
 
 class TestPhase5:
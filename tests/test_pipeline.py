@@ -0,0 +1,563 @@
+"""pytest-style tests for the fast CipherForge pipeline.
+
+Run with: pytest -v
+
+The fast paths must give exactly the same output as running the five
+phase functions one after another, so most tests compare the two.
+"""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import engine
+from engine import (
+    encrypt, decrypt,
+    compile_key, CompiledKey,
+    encrypt_bytes, decrypt_bytes, encrypt_into, decrypt_into, ciphertext_length,
+    Encryptor, Decryptor,
+    cipher_period, encrypt_parallel, decrypt_parallel,
+    encrypt_many, decrypt_many, encrypt_many_keyed, decrypt_many_keyed,
+    phase3_encrypt, Profile, profiling,
+)
+
+
+# Printable ASCII plus a few characters that must pass through unchanged
+ALPHABET = [chr(code) for code in range(32, 127)] + ["\n", "\t", "\x7f", "é", "€"]
+
+
+def random_key(rng):
+    """Build a random (valid) key."""
+    return {
+        "shift": rng.randint(-100, 200),
+        "block_size": rng.randint(1, 12),
+        "password": "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 9))),
+        "noise_interval": rng.randint(1, 8),
+        "noise_char": rng.choice(["~", "$", "é", "€"]),
+    }
+
+
+def random_text(rng, length):
+    """Build a random message of the given length."""
+    return "".join(rng.choice(ALPHABET) for _ in range(length))
+
+
+class TestFusedPipeline:
+    """Tests for the fused encrypt()/decrypt() pipeline."""
+
+    @pytest.fixture
+    def full_key(self):
+        """Complete key with all phase parameters."""
+        return {
+            "shift": 7,
+            "block_size": 5,
+            "password": "TESTKEY",
+            "noise_interval": 4,
+            "noise_char": "$",
+        }
+
+    @pytest.mark.parametrize("message", [
+        "",
+        "A",
+        "AB",
+        "Hello World!",
+        "The quick brown fox jumps over the lazy dog!",
+        "Tabs\tand\nnewlines",
+        "Café costs €5",
+    ])
+    def test_matches_phase_by_phase(self, full_key, message):
+        """Fused output should equal the phase-by-phase output."""
+        fused = encrypt(message, full_key)
+        assert fused == encrypt(message, full_key, phase_by_phase=True)
+        assert decrypt(fused, full_key) == message
+
+    def test_default_key_values(self):
+        """Missing settings should use the same defaults as the phases."""
+        message = "Defaults all round"
+        assert encrypt(message, {}) == encrypt(message, {}, phase_by_phase=True)
+
+    def test_random_keys_and_lengths(self):
+        """Fused and phase-by-phase paths should agree for many keys."""
+        rng = random.Random(2026)
+        for _ in range(300):
+            key = random_key(rng)
+            message = random_text(rng, rng.randint(0, 80))
+            encrypted = encrypt(message, key)
+            assert encrypted == encrypt(message, key, phase_by_phase=True)
+            assert decrypt(encrypted, key) == message
+
+    def test_decrypt_matches_on_any_input(self, full_key):
+        """Decrypting arbitrary text should match the phase functions too."""
+        rng = random.Random(7)
+        for length in range(30):
+            text = random_text(rng, length)
+            assert decrypt(text, full_key) == decrypt(
+                text, full_key, phase_by_phase=True
+            )
+
+    def test_unusual_key_falls_back(self):
+        """Keys the fused path cannot handle keep their old behaviour."""
+        key = {"noise_char": "~~", "noise_interval": 2}
+        message = "Multi-character noise"
+        assert encrypt(message, key) == encrypt(message, key, phase_by_phase=True)
+
+
+class TestVerify:
+    """decrypt(..., verify=True) catches corrupt or tampered ciphertext."""
+
+    KEY = {"password": "TESTKEY", "noise_interval": 3}
+
+    @pytest.mark.parametrize("options", [
+        {}, {"backend": "numpy"}, {"phase_by_phase": True},
+    ])
+    def test_intact(self, options):
+        encrypted = encrypt("Hello, World!", self.KEY)
+        assert decrypt(encrypted, self.KEY, verify=True, **options) == "Hello, World!"
+
+    @pytest.mark.parametrize("backend", ["python", "numpy"])
+    def test_every_noise_slot_is_checked(self, backend):
+        encrypted = encrypt("Hello, World!", self.KEY)
+        noise = [i for i in range(len(encrypted)) if encrypted[i] == "~"]
+        assert len(noise) == 4
+        for position in noise:
+            tampered = encrypted[:position] + "x" + encrypted[position + 1:]
+            with pytest.raises(ValueError, match=f"position {position}$"):
+                decrypt(tampered, self.KEY, verify=True, backend=backend)
+
+    def test_bytes(self):
+        encrypted = bytearray(encrypt_bytes(b"Hello, World!", self.KEY))
+        assert decrypt_bytes(encrypted, self.KEY, verify=True) == b"Hello, World!"
+        encrypted[encrypted.index(b"~")] = ord("x")
+        with pytest.raises(ValueError):
+            decrypt_bytes(encrypted, self.KEY, verify=True)
+
+    def test_non_ascii_noise(self):
+        key = {"noise_char": "é"}
+        encrypted = encrypt("plain ASCII", key)
+        assert decrypt(encrypted, key, verify=True) == "plain ASCII"
+        with pytest.raises(ValueError):
+            decrypt(encrypted.replace("é", "e"), key, verify=True)
+
+    @pytest.mark.parametrize("message", ["", "ab", "plain ASCII", "Café €5"])
+    def test_noise_outside_latin1(self, message):
+        """Noise that doesn't fit in a byte still round-trips as text."""
+        key = {"noise_char": "€"}
+        encrypted = encrypt(message, key)
+        assert decrypt(encrypted, key) == message
+        assert decrypt(encrypted, key, verify=True) == message
+        with pytest.raises(ValueError, match="one byte"):
+            decrypt_bytes(b"ab", key)
+        with pytest.raises(ValueError, match="one byte"):
+            decrypt_into(b"ab", bytearray(2), key)
+
+
+class TestCompiledKey:
+    """Tests for compile_key() and CompiledKey."""
+
+    @pytest.fixture
+    def key(self):
+        """Standard key used by the compiled key tests."""
+        return {
+            "shift": 5,
+            "block_size": 4,
+            "password": "SECRET",
+            "noise_interval": 3,
+            "noise_char": "~",
+        }
+
+    def test_tables(self, key):
+        """Compiled tables should hold the per-position shifts."""
+        compiled = compile_key(key)
+        assert compiled.encrypt_shifts == bytes((5 + ord(c)) % 95 for c in "SECRET")
+        assert compiled.decrypt_shifts[0] == -(5 + ord("S")) % 95
+
+    def test_huge_block_size(self, key):
+        """Nothing is built per block position, so any block size is cheap."""
+        key["block_size"] = 10**12
+        assert decrypt(encrypt("hello", key), key) == "hello"
+
+    def test_password_schedule_is_shared(self, key):
+        """Keys with the same password share one Phase 3 schedule."""
+        compile_key(key)
+        hits = engine._password_shifts.cache_info().hits
+        second = compile_key(dict(key, shift=9, noise_interval=5))
+        assert engine._password_shifts.cache_info().hits == hits + 1
+        assert second.encrypt_shifts[0] == (9 + ord("S")) % 95
+
+    @pytest.mark.parametrize("length", [0, 1, 299, 300, 1199, 1200, 2500])
+    def test_long_passphrase(self, length):
+        """Short and long messages with a long passphrase use different
+        code paths, but both must match the phase functions."""
+        rng = random.Random(length)
+        key = {"password": random_text(rng, 300), "noise_interval": 7}
+        message = random_text(rng, length)
+        encrypted = encrypt(message, key)
+        assert encrypted == encrypt(message, key, phase_by_phase=True)
+        assert decrypt(encrypted, key) == message
+        assert encrypt_bytes(message.encode("utf-8"), key) == encrypt(
+            message.encode("utf-8").decode("latin-1"), key
+        ).encode("latin-1")
+
+    def test_cached_by_contents(self, key):
+        """Equal dictionaries should share one compiled key."""
+        assert compile_key(key) is compile_key(dict(key))
+        assert compile_key(compile_key(key)) is compile_key(key)
+
+    def test_compiled_key_encrypts_the_same(self, key):
+        """A CompiledKey should work anywhere a key dictionary does."""
+        compiled = compile_key(key)
+        message = "Compiled once, used many times"
+        assert encrypt(message, compiled) == encrypt(message, key)
+        assert decrypt(encrypt(message, compiled), compiled) == message
+        assert phase3_encrypt(message, compiled) == phase3_encrypt(message, key)
+
+    def test_immutable(self, key):
+        """Compiled keys cannot be changed after they are built."""
+        compiled = compile_key(key)
+        assert isinstance(compiled, CompiledKey)
+        with pytest.raises(AttributeError):
+            compiled.shift = 9
+
+    @pytest.mark.parametrize("bad", [
+        {"password": ""},
+        {"block_size": 0},
+        {"noise_interval": -1},
+        {"noise_char": "~~"},
+        {"shift": "5"},
+        {"password": ["S"]},
+    ])
+    def test_invalid_keys(self, bad):
+        """Invalid settings should be reported as ValueError."""
+        with pytest.raises(ValueError):
+            compile_key(bad)
+
+
+class TestNumpyBackend:
+    """Tests for backend="numpy" (skipped checks need NumPy installed)."""
+
+    @pytest.fixture
+    def full_key(self):
+        """Complete key with all phase parameters."""
+        return {
+            "shift": 7,
+            "block_size": 5,
+            "password": "TESTKEY",
+            "noise_interval": 4,
+            "noise_char": "$",
+        }
+
+    def test_matches_python_backend(self):
+        """NumPy output should equal the pure-Python output."""
+        pytest.importorskip("numpy")
+        rng = random.Random(3)
+        for _ in range(200):
+            key = random_key(rng)
+            message = random_text(rng, rng.randint(0, 80))
+            encrypted = encrypt(message, key, backend="numpy")
+            assert encrypted == encrypt(message, key, phase_by_phase=True)
+            assert decrypt(encrypted, key, backend="numpy") == message
+
+    @pytest.mark.parametrize("stride_max", [0, 1000])
+    def test_strided_and_reshaped(self, stride_max, monkeypatch):
+        """Both ways of copying columns give the same result."""
+        numpy_backend = pytest.importorskip("numpy_backend")
+        monkeypatch.setattr(numpy_backend, "STRIDE_MAX", stride_max)
+        rng = random.Random(stride_max)
+        for _ in range(50):
+            key = random_key(rng)
+            message = random_text(rng, rng.randint(0, 80))
+            ascii_message = message.encode("ascii", "replace").decode("ascii")
+            for text in (message, ascii_message):
+                encrypted = encrypt(text, key, backend="numpy")
+                assert encrypted == encrypt(text, key)
+                assert decrypt(encrypted, key, backend="numpy") == text
+
+    def test_falls_back_without_numpy(self, full_key, monkeypatch):
+        """Without NumPy the pure-Python engine should be used."""
+        import sys
+
+        monkeypatch.setitem(sys.modules, "numpy_backend", None)
+        message = "No NumPy here"
+        encrypted = encrypt(message, full_key, backend="numpy")
+        assert encrypted == encrypt(message, full_key)
+        assert decrypt(encrypted, full_key, backend="numpy") == message
+
+    def test_unknown_backend(self, full_key):
+        """Asking for a backend that does not exist is an error."""
+        with pytest.raises(ValueError):
+            encrypt("Hello", full_key, backend="gpu")
+
+
+class TestBytesApi:
+    """Tests for encrypt_bytes(), decrypt_bytes() and encrypt_into()."""
+
+    @pytest.fixture
+    def full_key(self):
+        """Complete key with all phase parameters."""
+        return {
+            "shift": 7,
+            "block_size": 5,
+            "password": "TESTKEY",
+            "noise_interval": 4,
+            "noise_char": "$",
+        }
+
+    @pytest.mark.parametrize("data", [b"", b"A", b"Hello World!", bytes(range(256))])
+    def test_matches_text_version(self, full_key, data):
+        """Bytes should encrypt like text with one character per byte."""
+        text = data.decode("latin-1")
+        encrypted = encrypt_bytes(data, full_key)
+        assert encrypted == encrypt(text, full_key).encode("latin-1")
+        assert decrypt_bytes(encrypted, full_key) == data
+
+    def test_accepts_bytes_like(self, full_key):
+        """bytearray and memoryview inputs should work too."""
+        data = b"Bytes-like input"
+        expected = encrypt_bytes(data, full_key)
+        assert encrypt_bytes(bytearray(data), full_key) == expected
+        assert encrypt_bytes(memoryview(data), full_key) == expected
+        assert decrypt_bytes(memoryview(expected), full_key) == data
+
+    def test_ciphertext_length(self, full_key):
+        """Predicted length should match the real ciphertext."""
+        for length in range(20):
+            data = b"x" * length
+            assert len(encrypt_bytes(data, full_key)) == ciphertext_length(
+                length, full_key
+            )
+
+    def test_encrypt_into(self, full_key):
+        """encrypt_into() should fill the front of the buffer."""
+        data = b"Write me into a buffer"
+        size = ciphertext_length(len(data), full_key)
+        buffer = bytearray(b"#" * (size + 3))
+        written = encrypt_into(data, memoryview(buffer), full_key)
+        assert written == size
+        assert bytes(buffer[:size]) == encrypt_bytes(data, full_key)
+        assert buffer[size:] == b"###"
+
+    def test_encrypt_into_same_buffer(self, full_key):
+        """Encrypting a buffer into itself should work."""
+        data = b"In place please"
+        size = ciphertext_length(len(data), full_key)
+        buffer = bytearray(data) + bytearray(size - len(data))
+        encrypt_into(memoryview(buffer)[: len(data)], buffer, full_key)
+        assert bytes(buffer) == encrypt_bytes(data, full_key)
+
+    def test_buffer_too_small(self, full_key):
+        """A buffer that cannot hold the ciphertext is an error."""
+        with pytest.raises(ValueError):
+            encrypt_into(b"Too long for the buffer", bytearray(5), full_key)
+
+
+def random_chunks(rng, text):
+    """Cut text into random pieces (including empty ones)."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + rng.randint(0, 9)
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+class TestStreaming:
+    """Tests for the Encryptor and Decryptor streaming objects."""
+
+    def test_any_chunking_matches_encrypt(self):
+        """However the input is cut up, the output should be the same."""
+        rng = random.Random(11)
+        for _ in range(300):
+            key = random_key(rng)
+            message = random_text(rng, rng.randint(0, 60))
+
+            encryptor = Encryptor(key)
+            pieces = [encryptor.update(c) for c in random_chunks(rng, message)]
+            encrypted = "".join(pieces) + encryptor.finalize()
+            assert encrypted == encrypt(message, key)
+
+            decryptor = Decryptor(key)
+            pieces = [decryptor.update(c) for c in random_chunks(rng, encrypted)]
+            assert "".join(pieces) + decryptor.finalize() == message
+
+    def test_one_character_at_a_time(self):
+        """Single-character chunks carry all the state between calls."""
+        key = {"password": "LONGERPASSWORD", "block_size": 7, "noise_interval": 2}
+        message = "Streaming one character at a time!"
+        encryptor = Encryptor(key)
+        encrypted = "".join(encryptor.update(c) for c in message)
+        encrypted += encryptor.finalize()
+        assert encrypted == encrypt(message, key)
+
+    def test_verify(self):
+        """A validating Decryptor reports the same position as decrypt()."""
+        key = {"noise_interval": 2, "noise_char": "é"}
+        encrypted = encrypt("Check every noise character", key)
+        decryptor = Decryptor(key, verify=True)
+        pieces = [decryptor.update(c) for c in encrypted]
+        assert "".join(pieces) + decryptor.finalize() == decrypt(encrypted, key)
+
+        tampered = encrypted[:10] + "#" + encrypted[11:]
+        with pytest.raises(ValueError) as expected:
+            decrypt(tampered, key, verify=True)
+        decryptor = Decryptor(key, verify=True)
+        with pytest.raises(ValueError) as streamed:
+            for char in tampered:
+                decryptor.update(char)
+            decryptor.finalize()
+        assert str(streamed.value) == str(expected.value)
+
+    def test_no_updates_after_finalize(self):
+        """A finished stream cannot be used again."""
+        encryptor = Encryptor({})
+        encryptor.finalize()
+        with pytest.raises(ValueError):
+            encryptor.update("more")
+
+
+class TestParallel:
+    """Tests for cipher_period(), encrypt_parallel() and decrypt_parallel()."""
+
+    @pytest.fixture(autouse=True)
+    def small_shards(self, monkeypatch):
+        """Split even short messages so the tests cross shard boundaries."""
+        monkeypatch.setattr(engine, "PARALLEL_MIN_SHARD", 1)
+
+    def test_period_splits_cleanly(self):
+        """Messages cut at the period should encrypt piece by piece."""
+        rng = random.Random(13)
+        for _ in range(200):
+            key = random_key(rng)
+            period = cipher_period(key)
+            first = random_text(rng, period * rng.randint(1, 3))
+            second = random_text(rng, rng.randint(0, 30))
+            assert encrypt(first + second, key) == encrypt(first, key) + encrypt(
+                second, key
+            )
+
+    def test_matches_encrypt(self):
+        """Sharded results should equal encrypt()/decrypt()."""
+        rng = random.Random(17)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            for _ in range(100):
+                key = random_key(rng)
+                message = random_text(rng, rng.randint(0, 200))
+                encrypted = encrypt_parallel(message, key, workers=3, executor=pool)
+                assert encrypted == encrypt(message, key)
+                assert decrypt_parallel(encrypted, key, 3, pool) == message
+
+    def test_long_period_is_not_split(self):
+        """A period longer than the message leaves nothing to share out."""
+        key = {"block_size": 10**12, "password": "P" * 997, "noise_interval": 7}
+        message = "Too short to split at such a long period. " * 20
+
+        class NoExecutor:
+            def map(self, *args):
+                raise AssertionError("should have been encrypted here")
+
+        encrypted = encrypt_parallel(message, key, 4, NoExecutor())
+        assert encrypted == encrypt(message, key)
+        assert decrypt_parallel(encrypted, key, 4, NoExecutor()) == message
+
+    def test_process_pool(self):
+        """The default process pool should give the same result."""
+        key = {"password": "PARALLEL", "block_size": 6, "noise_interval": 5}
+        message = "Split me across processes! " * 40
+        encrypted = encrypt_parallel(message, key, workers=2)
+        assert encrypted == encrypt(message, key)
+        assert decrypt_parallel(encrypted, key, workers=2) == message
+
+
+class TestBatches:
+    """Tests for encrypt_many() and friends."""
+
+    @pytest.fixture
+    def messages(self):
+        """Lots of short messages, many sharing a length."""
+        rng = random.Random(19)
+        lengths = [0, 1, 5, 8, 8, 8, 64]
+        return [random_text(rng, rng.choice(lengths)) for _ in range(300)]
+
+    def test_encrypt_many_matches_encrypt(self, messages):
+        """Batch results should equal calling encrypt() on each message."""
+        rng = random.Random(23)
+        for _ in range(20):
+            key = random_key(rng)
+            encrypted = encrypt_many(messages, key)
+            assert encrypted == [encrypt(message, key) for message in messages]
+            assert decrypt_many(encrypted, key) == messages
+
+    def test_noise_outside_latin1(self):
+        """Short ciphertexts have no noise and are still batched as ASCII."""
+        key = {"noise_char": "€"}
+        messages = ["ab", "cd", "xyz!", "Hello there"] * 5
+        encrypted = encrypt_many(messages, key)
+        assert encrypted == [encrypt(message, key) for message in messages]
+        assert decrypt_many(encrypted, key) == messages
+
+    def test_decrypt_many_any_input(self):
+        """Batch decryption should match decrypt() even on junk input."""
+        rng = random.Random(29)
+        key = random_key(rng)
+        junk = [random_text(rng, 7) for _ in range(20)]
+        assert decrypt_many(junk, key) == [decrypt(text, key) for text in junk]
+
+    def test_keyed_keeps_order(self, messages):
+        """Messages with different keys come back in input order."""
+        keys = [{"password": "ONE"}, {"password": "TWO", "shift": 9}, {}]
+        pairs = [(message, keys[i % 3]) for i, message in enumerate(messages)]
+        encrypted = encrypt_many_keyed(pairs)
+        assert encrypted == [encrypt(message, key) for message, key in pairs]
+        back = decrypt_many_keyed(zip(encrypted, (key for _, key in pairs)))
+        assert back == messages
+
+    def test_executor(self, messages, monkeypatch):
+        """Work spread over an executor gives the same results."""
+        monkeypatch.setattr(engine, "BATCH_CHUNK", 7)
+        key = {"password": "POOL"}
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            encrypted = encrypt_many(messages, key, executor=pool)
+            pairs = [(message, {"shift": len(message)}) for message in messages]
+            keyed = encrypt_many_keyed(pairs, executor=pool)
+        assert encrypted == [encrypt(message, key) for message in messages]
+        assert keyed == [encrypt(message, key) for message, key in pairs]
+
+
+class TestProfiling:
+    """Opt-in timings for every step of the cipher."""
+
+    def test_fused_steps(self):
+        with profiling() as profile:
+            encrypted = encrypt("Hello, World!", {"noise_interval": 4})
+            decrypt(encrypted, {"noise_interval": 4})
+        steps = profile.as_dict()
+        assert set(steps) == {
+            "encrypt", "phase2_encrypt", "phase1+phase3_encrypt",
+            "phase4+phase5_encrypt", "decrypt", "phase4+phase5_decrypt",
+            "phase1+phase3_decrypt", "phase2_decrypt",
+        }
+        assert steps["encrypt"]["calls"] == 1
+        assert steps["phase4+phase5_encrypt"]["bytes_in"] == 13
+        assert steps["phase4+phase5_encrypt"]["bytes_out"] == 16
+        assert steps["encrypt"]["seconds"] >= steps["phase2_encrypt"]["seconds"]
+
+    def test_phase_by_phase(self):
+        with profiling() as profile:
+            encrypt("Hello", {}, phase_by_phase=True)
+        steps = profile.as_dict()
+        assert [f"phase{n}_encrypt" in steps for n in range(1, 6)] == [True] * 5
+        assert steps["phase4_encrypt"]["bytes_out"] == 6
+
+    def test_only_records_while_enabled(self):
+        profile = Profile()
+        with profiling(profile):
+            encrypt("Hello", {})
+        encrypt("Hello", {})
+        assert profile.as_dict()["encrypt"]["calls"] == 1
+
+    def test_prometheus(self):
+        with profiling() as profile:
+            encrypt_bytes(b"Hello", {})
+        text = profile.prometheus()
+        assert "# TYPE cipherforge_step_calls_total counter" in text
+        assert 'cipherforge_step_bytes_out_total{step="phase4+phase5_encrypt"} 6' in text
@@ -0,0 +1,65 @@
+"""pytest-style tests for result_cache.py.
+
+Run with: pytest -v
+"""
+
+import pytest
+from result_cache import ResultCache, cache_key
+
+
+def test_key_is_normalised():
+    defaults = {
+        "shift": 5,
+        "block_size": 4,
+        "password": "SECRET",
+        "noise_interval": 3,
+        "noise_char": "~",
+    }
+    assert cache_key("Hi", {}, "encrypt") == cache_key("Hi", defaults, "encrypt")
+    assert cache_key("Hi", {}, "encrypt") != cache_key("Hi", {}, "decrypt")
+    assert cache_key("Hi", {}, "encrypt") != cache_key("Hi", {"shift": 6}, "encrypt")
+    assert cache_key("Hi", {}, "encrypt") != cache_key("Hi!", {}, "encrypt")
+
+
+def test_key_does_not_contain_text():
+    assert b"Hello" not in cache_key("Hello", {}, "encrypt")
+
+
+def test_bad_key():
+    with pytest.raises(ValueError):
+        cache_key("Hi", {"block_size": 0}, "encrypt")
+
+
+def test_hits_and_misses():
+    cache = ResultCache(max_bytes=10000)
+    assert cache.get(b"a") is None
+    assert cache.put(b"a", "result")
+    assert cache.get(b"a") == "result"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResultCache(max_bytes=250, max_entry_bytes=250)
+    for digest in (b"a", b"b"):
+        cache.put(digest, "x" * 50)
+    cache.get(b"a")  # b is now the oldest
+    cache.put(b"c", "x" * 50)
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 250
+
+
+def test_big_results_are_not_cached():
+    cache = ResultCache(max_bytes=800)
+    assert not cache.put(b"a", "x" * 200)
+    assert len(cache) == 0
+
+
+def test_clear():
+    cache = ResultCache(max_bytes=10000)
+    cache.put(b"a", "result")
+    cache.clear()
+    assert cache.get(b"a") is None
+    assert cache.stats()["bytes"] == 0